@@ -0,0 +1,4 @@
+"""
+Offline benchmarks for the scrapers' parse paths.
+Run from the repo root, e.g. ``python -m benchmarks.bench_parsers``.
+"""
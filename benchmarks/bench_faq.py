@@ -0,0 +1,71 @@
+"""
+Per-page FAQ extraction time: the three independent full-page ``re.search``
+calls parse_page/parse_faq_trends used to run vs. ``scraping.faq.scan_faq``.
+
+Results must agree on every page; the benchmark aborts otherwise.
+
+    python -m benchmarks.bench_faq [--pages 5] [--repeat 3]
+"""
+
+import argparse
+import re
+import time
+
+from benchmarks.pages import adversarial_faq_page, faq_page
+from scraping.faq import scan_faq
+
+
+def legacy_faq(html: str):
+    """The pre-scanner extraction, kept verbatim as the baseline"""
+    rate = rental_yield = trend = None
+    rate_match = re.search(r"average flat rates in .*? is ₹ ([\d,]+) per sq ft", html, re.IGNORECASE)
+    if rate_match:
+        rate = int(rate_match.group(1).replace(",", ""))
+    yield_match = re.search(r"average rental yield in .*? is ([\d\.]+)\s*%", html, re.IGNORECASE)
+    if yield_match:
+        rental_yield = float(yield_match.group(1))
+    trend_match = re.search(r"moved:\s*([\d\.\-]+)\s*%\s*since\s*1\s*year\s*([\d\.\-]+)\s*%\s*since\s*3\s*year\s*([\d\.\-]+)\s*%\s*since\s*5\s*year", html, re.IGNORECASE)
+    if trend_match:
+        trend = tuple(float(g.replace("-", "-0")) for g in trend_match.groups())
+    return rate, rental_yield, trend
+
+
+def scanner_faq(html: str):
+    rates = scan_faq(html)
+    trend = (rates.change_1y, rates.change_3y, rates.change_5y) if rates.has_trend else None
+    return rates.current_rate, rates.rental_yield, trend
+
+
+def _time_per_page(fn, pages, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for page in pages:
+            fn(page)
+        best = min(best, time.perf_counter() - start)
+    return best / len(pages) * 1000
+
+
+def run(n_pages: int = 5, repeat: int = 3):
+    cases = {
+        "faq 1MB": [faq_page(seed=i) for i in range(n_pages)],
+        "faq no trend": [faq_page(seed=i, trend=False) for i in range(n_pages)],
+        "adversarial": [adversarial_faq_page(seed=i) for i in range(max(1, n_pages // 5))],
+    }
+    for name, pages in cases.items():
+        for page in pages:
+            if legacy_faq(page) != scanner_faq(page):
+                raise SystemExit(f"{name}: scanner disagrees with legacy regexes: {legacy_faq(page)} vs {scanner_faq(page)}")
+        kb = sum(len(p) for p in pages) / len(pages) / 1024
+        legacy_ms = _time_per_page(legacy_faq, pages, repeat)
+        scan_ms = _time_per_page(scanner_faq, pages, repeat)
+        print(f"{name:14s} {kb:7.0f} KB/page  3x re.search {legacy_ms:9.2f} ms  "
+              f"scan_faq {scan_ms:8.2f} ms  speedup x{legacy_ms / scan_ms:.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.pages, args.repeat)
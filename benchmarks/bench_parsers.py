@@ -0,0 +1,64 @@
+"""
+Per-page parse time: full ``html.parser`` tree (the old path) vs. the
+configured backend with card-only strained parsing (the current path).
+
+Both paths must produce identical records; the benchmark aborts otherwise.
+
+    python -m benchmarks.bench_parsers [--pages 5] [--repeat 3]
+"""
+
+import argparse
+import time
+
+from benchmarks.pages import listing_page, rates_page
+from scraper_mira_road import parse_rate_cards
+from scrape_properties_enhanced import parse_listing_page
+from scraping.parsing import DEFAULT_BACKEND
+
+
+def _strip_volatile(records):
+    return [{k: v for k, v in r.items() if k != "scraped_at"} for r in records or []]
+
+
+def _time_per_page(fn, pages, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for page in pages:
+            fn(page)
+        best = min(best, time.perf_counter() - start)
+    return best / len(pages) * 1000
+
+
+def run(n_pages: int = 5, repeat: int = 3):
+    cases = {
+        "rate cards": (
+            [rates_page(seed=i).encode("utf-8") for i in range(n_pages)],
+            lambda c: parse_rate_cards(c, backend="html.parser", parse_only=None),
+            lambda c: parse_rate_cards(c),
+        ),
+        "listing cards": (
+            [listing_page(seed=i).encode("utf-8") for i in range(n_pages)],
+            lambda c: parse_listing_page(c, "mira-road-east-mumbai", backend="html.parser", parse_only=None),
+            lambda c: parse_listing_page(c, "mira-road-east-mumbai"),
+        ),
+    }
+
+    print(f"backend: {DEFAULT_BACKEND} (strained) vs html.parser (full tree)")
+    for name, (pages, legacy, fast) in cases.items():
+        for page in pages:
+            if _strip_volatile(legacy(page)) != _strip_volatile(fast(page)):
+                raise SystemExit(f"{name}: fast path records differ from html.parser output")
+        kb = sum(len(p) for p in pages) / len(pages) / 1024
+        legacy_ms = _time_per_page(legacy, pages, repeat)
+        fast_ms = _time_per_page(fast, pages, repeat)
+        print(f"{name:14s} {kb:7.0f} KB/page  html.parser {legacy_ms:8.2f} ms  "
+              f"{DEFAULT_BACKEND} {fast_ms:8.2f} ms  speedup x{legacy_ms / fast_ms:.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.pages, args.repeat)
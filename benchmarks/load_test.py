@@ -0,0 +1,130 @@
+"""
+Load test of the scrapers' fetch layer against the local mock site.
+
+Starts ``benchmarks.mock_site`` in-process, builds the URLs the scrapers
+request (locality trend pages, TREND_URLS, POSSIBLE_URLS and listing pages)
+on the mock's address, and fetches them with ``scraping.fetch.fetch_all``
+using one of the scrapers' ``create_session`` retry configurations. Reports
+throughput, status mix, tail latency and how many server requests each URL
+cost (retries from urllib3 and from throttled_get included).
+
+    python -m benchmarks.load_test --session all_localities --concurrency 16 \\
+        --latency lognormal:0.08,0.6 --throttle-rate 0.05 --error-rate 0.02 --reset-rate 0.01
+"""
+
+import argparse
+import logging
+import time
+from collections import Counter
+from typing import Callable, Dict, List
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from benchmarks.mock_site import add_fault_arguments, serve, site_from_args
+from scraping.fetch import fetch_all
+from scraping.rate_limit import AdaptiveRateLimiter
+
+SESSIONS = ("all_localities", "mira_road", "properties")
+
+
+def session_factory(name: str) -> Callable:
+    """``create_session`` of the named scraper (imported lazily; the modules configure logging on import)"""
+    if name == "all_localities":
+        from scrape_all_localities import create_session
+    elif name == "mira_road":
+        from scraper_mira_road import create_session
+    else:
+        from scrape_properties_enhanced import create_session
+    return create_session
+
+
+def scraper_urls(listing_pages: int) -> List[str]:
+    """Every URL shape the scrapers fetch, on the real host"""
+    from scrape_all_localities import LOCALITIES, get_url
+    from scrape_properties_enhanced import LOCALITIES as LISTING_LOCALITIES, listing_url
+    from scraper_mira_road import POSSIBLE_URLS, TREND_URLS
+
+    urls = [get_url(locality) for locality in LOCALITIES]
+    urls += [url for _, url in TREND_URLS] + list(POSSIBLE_URLS)
+    urls += [listing_url(locality, page) for locality in LISTING_LOCALITIES for page in range(1, listing_pages + 1)]
+    return urls
+
+
+def rebase(url: str, base: str) -> str:
+    parts = urlsplit(url)
+    return f"{base}{parts.path}" + (f"?{parts.query}" if parts.query else "")
+
+
+def report(results, elapsed: float, served: Counter) -> Dict:
+    latencies = np.array([r.elapsed for r in results])
+    outcomes = Counter(str(r.status) if r.status is not None else "error" for r in results)
+    ok = outcomes.get("200", 0)
+    return {
+        "urls": len(results),
+        "ok": ok,
+        "elapsed_s": elapsed,
+        "throughput_rps": len(results) / elapsed,
+        "goodput_rps": ok / elapsed,
+        "latency_p50_s": float(np.percentile(latencies, 50)),
+        "latency_p90_s": float(np.percentile(latencies, 90)),
+        "latency_p99_s": float(np.percentile(latencies, 99)),
+        "latency_max_s": float(latencies.max()),
+        "outcomes": dict(outcomes),
+        "server": dict(served),
+        "requests_per_url": served["requests"] / len(results),
+    }
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.ERROR, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Load-test the fetch layer against the local mock 99acres")
+    parser.add_argument("--session", choices=SESSIONS, default="all_localities",
+                        help="Whose create_session (retry configuration) to use")
+    parser.add_argument("--rounds", type=int, default=1, help="Times to fetch the whole URL set")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight overall")
+    parser.add_argument("--per-host", type=int, default=None, help="Requests in flight per host (default: --concurrency)")
+    parser.add_argument("--timeout", type=float, default=10)
+    parser.add_argument("--rate", type=float, default=None,
+                        help="Starting per-host rate for the adaptive limiter (default: the scrapers' 1 req/s)")
+    parser.add_argument("--max-rate", type=float, default=None, help="Limiter ceiling (default: the scrapers' 8 req/s)")
+    add_fault_arguments(parser)
+    args = parser.parse_args(argv)
+
+    site = site_from_args(args)
+    server = serve(site)
+    host, port = server.server_address[:2]
+    base = f"http://{host}:{port}"
+
+    limiter_args = {}
+    if args.rate is not None:
+        limiter_args["initial_rate"] = args.rate
+    if args.max_rate is not None:
+        limiter_args["max_rate"] = args.max_rate
+    limiter = AdaptiveRateLimiter(**limiter_args)
+
+    urls = [rebase(url, base) for url in scraper_urls(args.listing_pages)] * args.rounds
+    start = time.monotonic()
+    try:
+        results = fetch_all(
+            urls, session_factory(args.session),
+            per_host_limit=args.per_host or args.concurrency, max_concurrency=args.concurrency,
+            timeout=args.timeout, limiter=limiter,
+        )
+    finally:
+        server.shutdown()
+    stats = report(results, time.monotonic() - start, site.stats)
+
+    print(f"{stats['urls']} URLs via {args.session}.create_session, concurrency {args.concurrency}, "
+          f"limiter {limiter.rate(base):.2f} req/s at the end")
+    print(f"   throughput {stats['throughput_rps']:.1f} URL/s, goodput {stats['goodput_rps']:.1f} ok/s "
+          f"in {stats['elapsed_s']:.1f}s")
+    print(f"   latency p50 {stats['latency_p50_s'] * 1000:.0f} ms, p90 {stats['latency_p90_s'] * 1000:.0f} ms, "
+          f"p99 {stats['latency_p99_s'] * 1000:.0f} ms, max {stats['latency_max_s'] * 1000:.0f} ms")
+    print(f"   outcomes {stats['outcomes']}")
+    print(f"   server {stats['server']} ({stats['requests_per_url']:.2f} requests per URL)")
+    return stats
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""
+Local stand-in for 99acres, for load-testing the fetch layer offline.
+
+Serves the URL shapes the scrapers request:
+
+    /property-rates-and-price-trends-in-{slug}-prffid      locality rate/trend pages
+                                                            (get_url, TREND_URLS)
+    /property-rates-and-price-trends-in-mumbai-ffid        rate card listing (POSSIBLE_URLS)
+    /property-in-{locality}-ffid?page=N                    listing pages; pages past
+                                                            --listing-pages come back empty
+
+Bodies come from the benchmark fixtures (``benchmarks/fixtures``) or, with
+``--synthetic`` or when a kind has no fixtures, from the seeded generators.
+Every request can be delayed and faulted:
+
+    --latency lognormal:0.08,0.6   response delay (const:S, uniform:A,B, exp:MEAN, lognormal:MEDIAN,SIGMA)
+    --throttle-rate 0.05           429/503 with Retry-After
+    --error-rate 0.02              500/502/504 (retried by create_session's urllib3 Retry)
+    --drip-rate 0.05               body sent in small chunks with pauses
+    --reset-rate 0.01              TCP reset instead of a response
+
+    python -m benchmarks.mock_site --port 8099 --latency uniform:0.02,0.2 --throttle-rate 0.05
+"""
+
+import argparse
+import gzip
+import math
+import os
+import random
+import re
+import socket
+import struct
+import threading
+import time
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from benchmarks.pages import faq_page, listing_page, rates_page
+from benchmarks.suite import FIXTURE_DIR
+
+RATES_LISTING_RE = re.compile(r"^/property-rates-and-price-trends-in-mumbai-ffid$")
+LOCALITY_RE = re.compile(r"^/property-rates-and-price-trends-in-(?P<slug>[a-z0-9-]+)-prffid$")
+LISTING_RE = re.compile(r"^/property-in-(?P<slug>[a-z0-9-]+)-ffid$")
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """``kind:params`` -> sampler of seconds, e.g. ``uniform:0.01,0.2`` or ``lognormal:0.08,0.6``"""
+    kind, _, params = spec.partition(":")
+    args = [float(p) for p in params.split(",") if p]
+    if kind == "const":
+        return lambda rng: args[0] if args else 0.0
+    if kind == "uniform":
+        return lambda rng: rng.uniform(args[0], args[1])
+    if kind == "exp":
+        return lambda rng: rng.expovariate(1 / args[0])
+    if kind == "lognormal":
+        # median and sigma of the log, so the median is in seconds
+        return lambda rng: rng.lognormvariate(math.log(args[0]), args[1])
+    raise ValueError(f"unknown latency distribution {spec!r}")
+
+
+@dataclass
+class Faults:
+    latency: str = "const:0"
+    throttle_rate: float = 0.0
+    throttle_statuses: tuple = (429, 503)
+    retry_after: int = 1
+    error_rate: float = 0.0
+    drip_rate: float = 0.0
+    drip_chunk: int = 4096
+    drip_interval: float = 0.05
+    reset_rate: float = 0.0
+    seed: Optional[int] = None
+
+
+class MockSite:
+    """Page bodies by URL plus the fault plan; shared by all handler threads"""
+
+    def __init__(self, faults: Faults, fixtures: Optional[str] = FIXTURE_DIR, listing_pages: int = 5):
+        self.faults = faults
+        self.listing_pages = listing_pages
+        self.sample_latency = parse_latency(faults.latency)
+        self.stats = Counter()
+        self._rng = random.Random(faults.seed)
+        self._lock = threading.Lock()
+        self._bodies: Dict[str, bytes] = {}
+        self._fixtures: Dict[str, List[bytes]] = {}
+        for kind in ("locality", "rates", "listing"):
+            directory = os.path.join(fixtures, kind) if fixtures else None
+            if directory and os.path.isdir(directory):
+                self._fixtures[kind] = []
+                for name in sorted(os.listdir(directory)):
+                    # adversarial pages are for parser benchmarks, not page-shaped traffic
+                    if "adversarial" not in name:
+                        with gzip.open(os.path.join(directory, name), "rb") as f:
+                            self._fixtures[kind].append(f.read())
+
+    def roll(self) -> Dict:
+        """Draw this request's delay and faults under one lock, so a seed replays the same plan"""
+        f = self.faults
+        with self._lock:
+            r = self._rng
+            return {
+                "delay": max(0.0, self.sample_latency(r)),
+                "reset": r.random() < f.reset_rate,
+                "throttle": r.choice(f.throttle_statuses) if r.random() < f.throttle_rate else None,
+                "error": r.choice((500, 502, 504)) if r.random() < f.error_rate else None,
+                "drip": r.random() < f.drip_rate,
+            }
+
+    def count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _pick(self, kind: str, key: str, generate: Callable[[int], str]) -> bytes:
+        seed = zlib.crc32(key.encode())
+        pool = self._fixtures.get(kind)
+        if pool:
+            return pool[seed % len(pool)]
+        return generate(seed).encode("utf-8")
+
+    def body(self, path: str, query: str) -> Optional[bytes]:
+        key = f"{path}?{query}"
+        if key in self._bodies:
+            return self._bodies[key]
+        if RATES_LISTING_RE.match(path):
+            body = self._pick("rates", key, lambda seed: rates_page(seed=seed))
+        elif LOCALITY_RE.match(path):
+            body = self._pick("locality", key, lambda seed: faq_page(seed=seed, noise_kb=256))
+        elif LISTING_RE.match(path):
+            page = int((parse_qs(query).get("page") or ["1"])[0])
+            if page > self.listing_pages:
+                body = listing_page(n_cards=0, seed=page, noise_kb=32).encode("utf-8")
+            else:
+                # generated per page so consecutive pages differ, as pagination expects
+                body = listing_page(seed=zlib.crc32(key.encode())).encode("utf-8")
+        else:
+            return None
+        with self._lock:
+            self._bodies[key] = body
+        return body
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    site: MockSite = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reset(self):
+        # SO_LINGER 0 makes close() send RST instead of FIN
+        self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+        self.connection.close()
+        self.close_connection = True
+
+    def _send(self, status: int, body: bytes, headers: Optional[Dict[str, str]] = None, drip: bool = False):
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if not drip:
+            self.wfile.write(body)
+            return
+        f = self.site.faults
+        for i in range(0, len(body), f.drip_chunk):
+            self.wfile.write(body[i:i + f.drip_chunk])
+            self.wfile.flush()
+            time.sleep(f.drip_interval)
+
+    def do_GET(self):
+        site = self.site
+        plan = site.roll()
+        url = urlsplit(self.path)
+        time.sleep(plan["delay"])
+        try:
+            if plan["reset"]:
+                site.count("reset")
+                return self._reset()
+            if plan["throttle"]:
+                site.count(str(plan["throttle"]))
+                return self._send(plan["throttle"], b"Too many requests",
+                                  {"Retry-After": str(site.faults.retry_after)})
+            if plan["error"]:
+                site.count(str(plan["error"]))
+                return self._send(plan["error"], b"Server error")
+            body = site.body(url.path, url.query)
+            if body is None:
+                site.count("404")
+                return self._send(404, b"Not found")
+            site.count("200")
+            if plan["drip"]:
+                site.count("drip")
+            self._send(200, body, drip=plan["drip"])
+        except (BrokenPipeError, ConnectionResetError):
+            site.count("client_gone")
+            self.close_connection = True
+        finally:
+            site.count("requests")
+
+
+def serve(site: MockSite, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Start the server on a daemon thread; ``server.server_address`` has the bound port"""
+    handler = type("Handler", (MockHandler,), {"site": site})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="mock-99acres").start()
+    return server
+
+
+def add_fault_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--latency", default="const:0",
+                        help="Response delay: const:S, uniform:A,B, exp:MEAN or lognormal:MEDIAN,SIGMA (seconds)")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Share of requests answered 429/503")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After on throttled responses, in whole seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered 500/502/504")
+    parser.add_argument("--drip-rate", type=float, default=0.0, help="Share of bodies sent slowly in chunks")
+    parser.add_argument("--drip-chunk", type=int, default=4096, help="Bytes per slow-drip chunk")
+    parser.add_argument("--drip-interval", type=float, default=0.05, help="Seconds between slow-drip chunks")
+    parser.add_argument("--reset-rate", type=float, default=0.0, help="Share of connections reset without a response")
+    parser.add_argument("--listing-pages", type=int, default=5, help="Listing pages per locality before empty pages")
+    parser.add_argument("--synthetic", action="store_true", help="Generate every page instead of serving fixtures")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for latency and fault draws")
+
+
+def site_from_args(args: argparse.Namespace) -> MockSite:
+    faults = Faults(
+        latency=args.latency, throttle_rate=args.throttle_rate, retry_after=args.retry_after,
+        error_rate=args.error_rate, drip_rate=args.drip_rate, drip_chunk=args.drip_chunk,
+        drip_interval=args.drip_interval, reset_rate=args.reset_rate, seed=args.seed,
+    )
+    return MockSite(faults, fixtures=None if args.synthetic else FIXTURE_DIR, listing_pages=args.listing_pages)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local 99acres stand-in with latency and fault injection")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    add_fault_arguments(parser)
+    args = parser.parse_args(argv)
+
+    site = site_from_args(args)
+    server = serve(site, args.host, args.port)
+    host, port = server.server_address[:2]
+    print(f"Serving mock 99acres on http://{host}:{port} (Ctrl-C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print(f"Served: {dict(site.stats)}")
+
+
+if __name__ == "__main__":
+    main()
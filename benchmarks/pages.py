@@ -0,0 +1,170 @@
+"""
+Seeded generators for 99acres-shaped pages.
+
+The markup mirrors the selectors the scrapers look for (rate cards,
+tupleNew/srpTuple listing cards, FAQ sentences) wrapped in the kind of
+navigation, script and footer bulk a real page carries.
+"""
+
+import json
+import random
+
+LOCALITY_NAMES = [
+    "Mira Road East", "Mira Road West", "Bhayandar West", "Bhayandar East", "Kashimira",
+    "Shanti Park", "Beverly Park", "Poonam Sagar Complex", "Dahisar East", "Borivali West",
+    "Kandivali East", "Malad West", "Goregaon East", "Andheri West", "Vasai West", "Naigaon East",
+]
+PROJECTS = [
+    "Lodha Aqua", "Rustomjee Urbania", "Kanakia Paris", "Runwal Gardens", "Godrej Emerald",
+    "Sheth Vasant Oasis", "Ajmera Heights", "Shree Krishna Towers", "Gundecha Valley", "Haware Citi",
+]
+
+
+def _noise(rng: random.Random, kb: int) -> str:
+    """Navigation, tracking script and footer markup of roughly ``kb`` kilobytes"""
+    parts = []
+    size = 0
+    while size < kb * 1024:
+        links = "".join(f'<li class="nav__item"><a href="/l/{rng.randint(1, 99999)}">Link {i}</a></li>' for i in range(20))
+        blob = json.dumps({"k": [rng.random() for _ in range(40)], "t": "x" * 200})
+        chunk = (f'<nav class="menu"><ul>{links}</ul></nav>'
+                 f'<script>window.__track = {blob};</script>'
+                 f'<div class="footer"><p>Disclaimer text {rng.random()}</p><span>Terms</span></div>')
+        parts.append(chunk)
+        size += len(chunk)
+    return "".join(parts)
+
+
+def rates_page(n_cards: int = 40, seed: int = 0, noise_kb: int = 200) -> str:
+    """Locality rates listing as parsed by scraper_mira_road.parse_rate_cards"""
+    rng = random.Random(seed)
+    cards = []
+    for i in range(n_cards):
+        name = f"{rng.choice(LOCALITY_NAMES)} {i}"
+        rate = rng.randint(6000, 40000)
+        appr = round(rng.uniform(-5, 60), 1)
+        yld = round(rng.uniform(2, 5), 1)
+        cards.append(
+            f'<div class="localityCard__wrap"><h3 class="localityCard__title">{name}</h3>'
+            f'<div class="localityCard__body"><span>Rate on 99acres</span> <span>₹ {rate:,}/ sq.ft</span>'
+            f'<span class="appr">{appr}% in 5Y</span><div>Rental Yield</div><div>{yld}%</div></div></div>'
+        )
+    return f"<html><head><title>Rates</title></head><body>{_noise(rng, noise_kb // 2)}<main>{''.join(cards)}</main>{_noise(rng, noise_kb // 2)}</body></html>"
+
+
+def listing_page(n_cards: int = 30, seed: int = 0, noise_kb: int = 300) -> str:
+    """Search results page as parsed by scrape_properties_enhanced.parse_listing_page"""
+    rng = random.Random(seed)
+    cards = []
+    for i in range(n_cards):
+        bhk = rng.randint(1, 4)
+        sqft = rng.randint(350, 2200)
+        price = round(rng.uniform(30, 450), 1)
+        price_text = f"₹{price / 100:.2f} Cr" if price >= 100 else f"₹{price} Lac"
+        project = rng.choice(PROJECTS)
+        cards.append(
+            f'<div class="tupleNew srpTuple"><h2>{bhk} BHK Flat in {project}</h2>'
+            f'<span class="srpTuple__price">{price_text}</span>'
+            f'<span class="srpTuple__area">{sqft:,} sq.ft.</span>'
+            f'<span class="srpTuple__bed">{bhk} BHK</span>'
+            f'<span class="srpTuple__propertyType">Apartment</span>'
+            f'<div class="srpTuple__description">Spacious {bhk} BHK near station, listing {i}</div>'
+            f'<img src="https://img.example/{seed}/{i}.jpg"></div>'
+        )
+    return f"<html><head><title>Listings</title></head><body>{_noise(rng, noise_kb // 2)}<section>{''.join(cards)}</section>{_noise(rng, noise_kb // 2)}</body></html>"
+
+
+def faq_page(seed: int = 0, noise_kb: int = 1024, trend: bool = True) -> str:
+    """Locality rates/trends page with the FAQ answers near the end of ~``noise_kb`` of markup"""
+    rng = random.Random(seed)
+    name = rng.choice(LOCALITY_NAMES)
+    rate = rng.randint(6000, 40000)
+    yld = round(rng.uniform(2, 5), 1)
+    p1, p3, p5 = (round(rng.uniform(-5, 60), 1) for _ in range(3))
+    faq = [
+        f'<div class="faq"><h3>What is the price of flats in {name}?</h3>'
+        f'<p>The average flat rates in {name} is ₹ {rate:,} per sq ft.</p></div>',
+        f'<div class="faq"><h3>What is the rental yield?</h3>'
+        f'<p>The average rental yield in {name} is {yld} %.</p></div>',
+    ]
+    if trend:
+        faq.append(
+            f'<div class="faq"><h3>How have prices changed?</h3><p>Property prices in {name} have '
+            f'moved: {p1} % since 1 year {p3} % since 3 year {p5} % since 5 year</p></div>'
+        )
+    return f"<html><body>{_noise(rng, noise_kb)}<section class=\"faqs\">{''.join(faq)}</section>{_noise(rng, 16)}</body></html>"
+
+
+def adversarial_faq_page(seed: int = 0, repeats: int = 3000) -> str:
+    """
+    Long single-line page full of FAQ lead-ins that never complete, the worst
+    case for an unanchored ``.*?`` search (each lead-in rescans to the end).
+    """
+    rng = random.Random(seed)
+    filler = "".join(
+        f"<span>average flat rates in block {i} are rising and average rental yield in block {i} moved: {rng.random():.2f} </span>"
+        for i in range(repeats)
+    )
+    return f"<html><body>{filler}</body></html>"
+
+
+def adversarial_listing_page(n_cards: int = 200, seed: int = 0) -> str:
+    """
+    Listing cards the fallback paths have to work hard on: missing price or
+    area spans, "Price on Request", odd units and deeply nested wrappers.
+    """
+    rng = random.Random(seed)
+    prices = ["Price on Request", "₹ 1,2,3 Cr", "₹85.5Lac", "₹ 9,999 k", "Call for price", "₹ - Lac", ""]
+    areas = ["sq.ft.", "1,250-1,400 sq.ft.", "N/A", "850 sq.m.", ""]
+    cards = []
+    for i in range(n_cards):
+        nest = rng.randint(1, 30)
+        body = (
+            f'<h2>{rng.choice(["", "Flat", "Studio in " + rng.choice(PROJECTS)])} {"x" * rng.randint(0, 400)}</h2>'
+            + (f'<span class="srpTuple__price">{rng.choice(prices)}</span>' if rng.random() < 0.8 else "")
+            + (f'<span class="srpTuple__area">{rng.choice(areas)}</span>' if rng.random() < 0.8 else "")
+            + f'<span class="srpTuple__bed">{rng.choice(["", "BHK", "10+ BHK", "1 RK"])}</span>'
+        )
+        cards.append(f'<div class="tupleNew srpTuple">{"<div>" * nest}{body}{"</div>" * nest}</div>')
+    return f"<html><body>{_noise(rng, 64)}<section>{''.join(cards)}</section></body></html>"
+
+
+def price_texts(n: int = 2000, seed: int = 0) -> list:
+    """Listing price strings, mostly well-formed with a tail of malformed ones"""
+    rng = random.Random(seed)
+    odd = ["Price on Request", "₹ - Lac", "1.2.3 Cr", "₹" + "9" * 40, "₹ 45 K", ""]
+    texts = []
+    for _ in range(n):
+        value = round(rng.uniform(20, 600), 2)
+        roll = rng.random()
+        if roll < 0.1:
+            texts.append(rng.choice(odd))
+        elif value >= 100:
+            texts.append(f"₹{value / 100:.2f} {rng.choice(['Cr', 'Crore'])}")
+        else:
+            texts.append(f"₹{value} {rng.choice(['Lac', 'Lakh'])}")
+    return texts
+
+
+def area_texts(n: int = 2000, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    odd = ["sq.ft.", "N/A", "1,250-1,400 sq.ft.", "9" * 60 + " sq.ft.", ""]
+    return [rng.choice(odd) if rng.random() < 0.1 else f"{rng.randint(250, 4000):,} sq.ft." for _ in range(n)]
+
+
+def locality_texts(n: int = 2000, seed: int = 0) -> list:
+    """Raw locality strings: gazetteer names, slugs, listing phrases and unknown places"""
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(n):
+        name = rng.choice(LOCALITY_NAMES)
+        roll = rng.random()
+        if roll < 0.3:
+            texts.append(name)
+        elif roll < 0.5:
+            texts.append(name.lower().replace(" ", "-") + "-mumbai")
+        elif roll < 0.8:
+            texts.append(f"{rng.randint(1, 4)} BHK Flat in {rng.choice(PROJECTS)}, {name} near station")
+        else:
+            texts.append(f"Unknown Nagar {rng.randint(1, 10_000)}")
+    return texts
@@ -0,0 +1,255 @@
+"""
+Regression benchmark for the parse hot paths, run over recorded fixtures.
+
+The corpus lives in ``benchmarks/fixtures``: gzipped pages per kind
+(``locality`` rate/trend pages, ``rates`` card listings, ``listing`` search
+results, including large and adversarial ones) plus ``strings.json`` with
+price, area and locality strings. Nothing touches the network.
+
+    python -m benchmarks.suite record [--from-cache 'property-in-']   # (re)write the corpus
+    python -m benchmarks.suite run --save-baseline                     # on the reference commit
+    python -m benchmarks.suite run [--threshold 0.25]                  # after a change
+
+``run`` reports per-page latency and records/sec for every parser and exits
+non-zero when a case's throughput drops more than ``--threshold`` below the
+saved baseline, or when it now returns a different number of records.
+Baselines are machine-specific and are not committed.
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+from benchmarks.pages import (
+    adversarial_faq_page, adversarial_listing_page, area_texts, faq_page, listing_page,
+    locality_texts, price_texts, rates_page,
+)
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+STRINGS_FILE = "strings.json"
+LISTING_LOCALITY = "mira-road-east-mumbai"
+STRING_BATCH = 200   # strings timed together, so each timing is well above clock noise
+
+# URL fragments that identify each fixture kind when recording from the response cache
+CACHE_KINDS = {
+    "locality": "property-rates-and-price-trends-in-.*prffid",
+    "rates": "property-rates-and-price-trends-in-mumbai-ffid",
+    "listing": "property-in-.*-ffid",
+}
+
+
+def generated_corpus() -> Dict[str, List[Tuple[str, str]]]:
+    """Seeded stand-ins for recorded pages: typical, large and adversarial per kind"""
+    return {
+        "locality": [(f"faq_{i}", faq_page(seed=i, noise_kb=512)) for i in range(3)] + [
+            ("faq_no_trend", faq_page(seed=3, noise_kb=512, trend=False)),
+            ("faq_large", faq_page(seed=4, noise_kb=2048)),
+            ("faq_adversarial", adversarial_faq_page(seed=5)),
+        ],
+        "rates": [(f"rates_{i}", rates_page(seed=i)) for i in range(3)] + [
+            ("rates_large", rates_page(n_cards=1500, seed=3, noise_kb=400)),
+        ],
+        "listing": [(f"listing_{i}", listing_page(seed=i)) for i in range(3)] + [
+            ("listing_large", listing_page(n_cards=300, seed=3, noise_kb=600)),
+            ("listing_adversarial", adversarial_listing_page(seed=4)),
+        ],
+    }
+
+
+def _write_page(kind: str, name: str, content: bytes, root: str):
+    os.makedirs(os.path.join(root, kind), exist_ok=True)
+    # mtime=0 keeps re-recorded fixtures byte-identical
+    with gzip.GzipFile(os.path.join(root, kind, f"{name}.html.gz"), "wb", mtime=0) as f:
+        f.write(content)
+
+
+def record(root: str = FIXTURE_DIR, cache_pattern: str = None, cache_dir: str = None) -> int:
+    """Write the generated corpus, plus cached real pages matching ``cache_pattern``"""
+    count = 0
+    for kind, pages in generated_corpus().items():
+        for name, html in pages:
+            _write_page(kind, name, html.encode("utf-8"), root)
+            count += 1
+    with open(os.path.join(root, STRINGS_FILE), "w", encoding="utf-8") as f:
+        json.dump({"price": price_texts(), "area": area_texts(), "locality": locality_texts()}, f,
+                  ensure_ascii=False, indent=0)
+
+    if cache_pattern is not None:
+        import re
+        from scraping.cache import DEFAULT_CACHE_DIR, ResponseCache
+        cache = ResponseCache(cache_dir or DEFAULT_CACHE_DIR, offline=True)
+        for url in cache.urls(cache_pattern):
+            kind = next((k for k, p in CACHE_KINDS.items() if re.search(p, url)), None)
+            response = cache.get(None, url)
+            if kind is None or response.status_code != 200:
+                continue
+            name = "cached_" + re.sub(r"[^a-z0-9]+", "_", url.split("99acres.com/")[-1].lower()).strip("_")
+            _write_page(kind, name, response.content, root)
+            count += 1
+    return count
+
+
+def load_corpus(root: str = FIXTURE_DIR) -> Tuple[Dict[str, List[Tuple[str, bytes]]], Dict[str, List[str]]]:
+    pages = {}
+    for kind in CACHE_KINDS:
+        directory = os.path.join(root, kind)
+        if not os.path.isdir(directory):
+            continue
+        pages[kind] = []
+        for file in sorted(os.listdir(directory)):
+            with gzip.open(os.path.join(directory, file), "rb") as f:
+                pages[kind].append((file.split(".")[0], f.read()))
+    with open(os.path.join(root, STRINGS_FILE), encoding="utf-8") as f:
+        strings = json.load(f)
+    return pages, strings
+
+
+def cases(pages: Dict[str, List[Tuple[str, bytes]]], strings: Dict[str, List[str]]) -> Dict[str, Tuple[List, Callable]]:
+    """Case name -> (inputs, fn returning a record count for one input)"""
+    from scrape_all_localities import parse_page
+    from scrape_properties_enhanced import (
+        extract_properties, find_property_cards, parse_area, parse_listing_page, parse_price,
+    )
+    from scraper_mira_road import determine_zone, parse_faq_trends, parse_rate_cards, rate_cards_from_state
+    from scraping.embedded_state import extract_embedded_state
+    from scraping.localities import default_resolver
+
+    def rate_card_loop(content):
+        # scrape_99acres' per-page work: embedded JSON first, card DOM fallback
+        data = rate_cards_from_state(extract_embedded_state(content)) or parse_rate_cards(content)
+        return len(data or [])
+
+    def zones(texts):
+        # Uncached resolution cost; the LRU would otherwise answer every repeat
+        default_resolver().cache_clear()
+        return len([determine_zone(t) for t in texts])
+
+    def text(content):
+        return content.decode("utf-8", errors="replace")
+
+    locality = [(n, text(c)) for n, c in pages.get("locality", [])]
+    listing = pages.get("listing", [])
+    cards = [(n, find_property_cards(c)) for n, c in listing]
+
+    def batches(key):
+        texts = strings[key]
+        return [(f"{key}[{i}:]", texts[i:i + STRING_BATCH]) for i in range(0, len(texts), STRING_BATCH)]
+
+    return {
+        "parse_page": (locality, lambda html: len(parse_page(html, "Mira Road East"))),
+        "parse_faq_trends": (locality, lambda html: len(parse_faq_trends(html, "Mira Road East"))),
+        "rate_card_loop": (pages.get("rates", []), rate_card_loop),
+        "parse_listing_page": (listing, lambda c: len(parse_listing_page(c, LISTING_LOCALITY))),
+        "extract_property_data": (cards, lambda page_cards: len(extract_properties(page_cards, LISTING_LOCALITY))),
+        "parse_price": (batches("price"), lambda texts: sum(1 for t in texts if parse_price(t))),
+        "parse_area": (batches("area"), lambda texts: sum(1 for t in texts if parse_area(t))),
+        "determine_zone": (batches("locality"), zones),
+    }
+
+
+def measure(inputs: List, fn: Callable, repeat: int) -> Dict:
+    """Best-of-``repeat`` time per input; throughput in inputs and records per second"""
+    best = [float("inf")] * len(inputs)
+    records = 0
+    for _ in range(repeat):
+        records = 0
+        for i, (_, item) in enumerate(inputs):
+            start = time.perf_counter()
+            records += fn(item)
+            best[i] = min(best[i], time.perf_counter() - start)
+    total = sum(best)
+    return {
+        "inputs": len(inputs),
+        "records": records,
+        "ms_per_input_p50": statistics.median(best) * 1000,
+        "ms_per_input_max": max(best) * 1000,
+        "inputs_per_sec": len(inputs) / total,
+        "records_per_sec": records / total,
+        "slowest": inputs[best.index(max(best))][0],
+    }
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[str]:
+    failures = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result["records"] != base["records"]:
+            failures.append(f"{name}: {result['records']} records, baseline had {base['records']}")
+        floor = base["inputs_per_sec"] * (1 - threshold)
+        if result["inputs_per_sec"] < floor:
+            failures.append(f"{name}: {result['inputs_per_sec']:.1f}/s is below {floor:.1f}/s "
+                            f"(baseline {base['inputs_per_sec']:.1f}/s - {threshold:.0%})")
+    return failures
+
+
+def run(root: str = FIXTURE_DIR, repeat: int = 5, only: List[str] = None) -> Dict[str, Dict]:
+    pages, strings = load_corpus(root)
+    results = {}
+    # The scrapers log a warning per page without a rate; that is noise here
+    logging.disable(logging.WARNING)
+    print(f"{'case':22s} {'inputs':>6s} {'p50 ms':>9s} {'max ms':>9s} {'records/s':>11s}  slowest")
+    for name, (inputs, fn) in cases(pages, strings).items():
+        if only and name not in only or not inputs:
+            continue
+        result = results[name] = measure(inputs, fn, repeat)
+        print(f"{name:22s} {result['inputs']:6d} {result['ms_per_input_p50']:9.2f} "
+              f"{result['ms_per_input_max']:9.2f} {result['records_per_sec']:11,.0f}  {result['slowest']}")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline parser benchmark suite with regression thresholds")
+    parser.add_argument("--fixtures", default=FIXTURE_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rec = sub.add_parser("record", help="Write the fixture corpus")
+    rec.add_argument("--from-cache", metavar="REGEX", help="Also copy cached 99acres pages whose URL matches")
+    rec.add_argument("--cache-dir", help="Response cache to copy from (default: data/http_cache)")
+
+    bench = sub.add_parser("run", help="Benchmark every parser over the corpus")
+    bench.add_argument("--repeat", type=int, default=7, help="Runs per input; the fastest counts")
+    bench.add_argument("--only", nargs="+", help="Case names to run")
+    bench.add_argument("--baseline", default=DEFAULT_BASELINE)
+    bench.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    bench.add_argument("--threshold", type=float, default=0.25,
+                       help="Allowed throughput drop against the baseline (0.25 = 25%%)")
+    bench.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        count = record(args.fixtures, args.from_cache, args.cache_dir)
+        print(f"Wrote {count} fixture pages to {args.fixtures}")
+        return 0
+
+    results = run(args.fixtures, args.repeat, args.only)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline first")
+        return 0
+    with open(args.baseline) as f:
+        failures = compare(results, json.load(f), args.threshold)
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    if not failures:
+        print(f"No regressions against {args.baseline} (threshold {args.threshold:.0%})")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,5 @@
 
+import argparse
 import requests
 import random
 import re
@@ -7,6 +8,8 @@ import logging
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+from scraping.cache import add_cache_arguments, cached_get, configure_cache_from_args
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("Inspector")
@@ -18,7 +21,8 @@ USER_AGENTS = [
 
 def create_session():
     session = requests.Session()
-    retry = Retry(total=3, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504])
+    # 429/503 are left to throttled_get so the rate limiter sees them
+    retry = Retry(total=3, backoff_factor=1, status_forcelist=[500, 502, 504], respect_retry_after_header=False)
     adapter = HTTPAdapter(max_retries=retry)
     session.mount("http://", adapter)
     session.mount("https://", adapter)
@@ -36,7 +40,7 @@ def inspect_url(url):
     session = create_session()
     logger.info(f"Fetching {url}...")
     try:
-        response = session.get(url, timeout=15)
+        response = cached_get(session, url, timeout=15)
         response.raise_for_status()
         
         # Save raw HTML
@@ -86,4 +90,9 @@ def inspect_json_keys(data):
 
 if __name__ == "__main__":
     TARGET_URL = "https://www.99acres.com/property-rates-and-price-trends-in-mira-bhayandar-prffid?" 
-    inspect_url(TARGET_URL)
+    parser = argparse.ArgumentParser(description="Dump and inspect the raw HTML/JSON of a 99acres page")
+    parser.add_argument("url", nargs="?", default=TARGET_URL)
+    add_cache_arguments(parser)
+    args = parser.parse_args()
+    configure_cache_from_args(args)
+    inspect_url(args.url)
@@ -1,14 +1,28 @@
 
+import argparse
 import requests
-import re
 import csv
-import time
 import random
 import logging
 from typing import List, Dict
+import numpy as np
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+from scraping.fetch import fetch_all
+from scraping.cache import add_cache_arguments, cached_get, configure_cache_from_args
+from scraping.columnar import LOCALITY_TRENDS, add_columnar_arguments, write_dataset
+from scraping.embedded_state import extract_embedded_state, locality_rates_from_state
+from scraping.faq import scan_faq
+from scraping.history import DEFAULT_HISTORY_PATH, HistoryStore
+from scraping.loader import add_loader_arguments, load_from_args
+from scraping.localities import default_resolver
+from scraping.metrics import add_metrics_arguments, configure_metrics, default_metrics, report_from_args
+from scraping.profiling import add_profiling_arguments, finish_profiling, profiling_from_args, stage
+from scraping.rate_limit import shared_limiter
+from scraping.streaming import LocalityRatesScanner, add_streaming_arguments, byte_budget_from_args, stream_scan
+from scraping.timeseries import anchor_prices, anchor_years, monthly_points, rates_arrays
+
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
 logger = logging.getLogger("Scraper")
 
@@ -42,7 +56,9 @@ USER_AGENTS = [
 
 def create_session():
     session = requests.Session()
-    retry = Retry(total=3, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504])
+    # 429/503 are left to throttled_get so the rate limiter sees them; urllib3
+    # would otherwise retry them itself whenever they carry a Retry-After
+    retry = Retry(total=3, backoff_factor=1, status_forcelist=[500, 502, 504], respect_retry_after_header=False)
     adapter = HTTPAdapter(max_retries=retry)
     session.mount("http://", adapter)
     session.mount("https://", adapter)
@@ -56,97 +72,165 @@ def create_session():
     return session
 
 def get_url(locality):
-    slug = locality.lower().replace(" ", "-")
+    slug = default_resolver().slug(locality)
     return f"https://www.99acres.com/property-rates-and-price-trends-in-{slug}-mira-bhayandar-prffid"
 
-def parse_page(html, locality):
-    data_rows = []
-    
-    # 1. Current Rate & Rental Yield (from text/FAQ)
-    # Rate
-    current_rate = 0
-    rate_match = re.search(r"average flat rates in .*? is ₹ ([\d,]+) per sq ft", html, re.IGNORECASE)
-    if rate_match:
-        current_rate = int(rate_match.group(1).replace(",", ""))
-    
-    # Yield
-    rental_yield = "NA"
-    yield_match = re.search(r"average rental yield in .*? is ([\d\.]+)\s*%", html, re.IGNORECASE)
-    if yield_match:
-        rental_yield = f"{yield_match.group(1)}%"
-
-    # 2. Historical Trends (from FAQ "moved: X% since...")
-    # Pattern: "prices ... moved: 5.3 % since 1 year 15.2 % since 3 year 25.1 % since 5 year"
-    trend_match = re.search(r"moved:\s*([\d\.\-]+)\s*%\s*since\s*1\s*year\s*([\d\.\-]+)\s*%\s*since\s*3\s*year\s*([\d\.\-]+)\s*%\s*since\s*5\s*year", html, re.IGNORECASE)
+def extract_rates(html):
+    """Embedded page JSON first; single-pass FAQ scan only when the blob is missing"""
+    rates = locality_rates_from_state(extract_embedded_state(html))
+    if rates is not None:
+        return rates
+    return scan_faq(html)
+
+def build_rows(localities, rates, scrape_date=None):
+    """
+    Rows for a batch of localities: the current rate plus back-calculated
+    prices for each trend horizon, all computed in one vectorized pass.
+    Years count back from the scrape date.
+    """
+    current, changes = rates_arrays(rates)
+    anchors = anchor_prices(current, changes)
+    years = anchor_years(scrape_date)
     
-    # Base row for current year (2025)
-    if current_rate > 0:
-        data_rows.append({
-            "town": TOWN_NAME,
-            "locality": locality,
-            "year": 2025,
-            "price_per_sqft": current_rate,
-            "appreciation": "0%", # Baseline
-            "rental_yield": rental_yield,
-            "current_rate": current_rate
-        })
+    data_rows = []
+    for i, locality in enumerate(localities):
+        if np.isnan(current[i]) or current[i] <= 0:
+            logger.warning(f"Could not find current rate for {locality}")
+            continue
+        current_rate = int(current[i])
+        rental_yield = f"{rates[i].rental_yield}%" if rates[i].rental_yield is not None else "NA"
         
-        if trend_match:
-            try:
-                p1 = float(trend_match.group(1).replace("-", "-0")) # Handle negative if extracted
-                p3 = float(trend_match.group(2).replace("-", "-0"))
-                p5 = float(trend_match.group(3).replace("-", "-0"))
-                
-                # Formula: PastPrice = Current / (1 + p/100)
-                price_2024 = int(current_rate / (1 + p1/100))
-                price_2022 = int(current_rate / (1 + p3/100))
-                price_2020 = int(current_rate / (1 + p5/100))
-                
-                data_rows.append({"town": TOWN_NAME, "locality": locality, "year": 2024, "price_per_sqft": price_2024, "appreciation": f"{p1}%", "rental_yield": rental_yield, "current_rate": current_rate})
-                data_rows.append({"town": TOWN_NAME, "locality": locality, "year": 2022, "price_per_sqft": price_2022, "appreciation": f"{p3}%", "rental_yield": rental_yield, "current_rate": current_rate})
-                data_rows.append({"town": TOWN_NAME, "locality": locality, "year": 2020, "price_per_sqft": price_2020, "appreciation": f"{p5}%", "rental_yield": rental_yield, "current_rate": current_rate})
-            except Exception as e:
-                logger.error(f"Error parsing percentages for {locality}: {e}")
-                
-    else:
-        logger.warning(f"Could not find current rate for {locality}")
-
+        # Base row for the scrape year
+        data_rows.append({"town": TOWN_NAME, "locality": locality, "year": years[0], "price_per_sqft": current_rate, "appreciation": "0%", "rental_yield": rental_yield, "current_rate": current_rate})
+        
+        if not np.isnan(anchors[i, 1:]).any():
+            for year, price, change in zip(years[1:], anchors[i, 1:], changes[i]):
+                data_rows.append({"town": TOWN_NAME, "locality": locality, "year": year, "price_per_sqft": int(price), "appreciation": f"{change}%", "rental_yield": rental_yield, "current_rate": current_rate})
+    
     return data_rows
 
-def main():
+def parse_page(html, locality, scrape_date=None):
+    return build_rows([locality], [extract_rates(html)], scrape_date)
+
+def collect_rates(locality, status_code, html, error=None, rates=None):
+    """Log one page's outcome and return its rates; ``rates`` already scanned from a stream skips the parse"""
+    if error:
+        logger.error(f"  -> {locality}: Error: {error}")
+        return None
+    if status_code != 200:
+        logger.warning(f"  -> {locality}: Failed (Status {status_code})")
+        return None
+    if rates is None:
+        with default_metrics().timer("parse_seconds", kind="locality"), stage("parse"):
+            rates = extract_rates(html)
+    default_metrics().inc("pages_parsed_total", kind="locality")
+    if rates.current_rate:
+        logger.info(f"  -> {locality}: Extracted rate{' and trend' if rates.has_trend else ''}")
+    else:
+        logger.warning(f"  -> {locality}: No data found")
+    return rates
+
+def scrape_sequential(localities, byte_budget=None):
     session = create_session()
-    all_data = []
-    
-    for locality in LOCALITIES:
+    limiter = shared_limiter()
+    all_rates = []
+
+    for locality in localities:
         url = get_url(locality)
         logger.info(f"Scraping {locality} ({url})...")
         try:
-            r = session.get(url, timeout=10)
-            if r.status_code == 200:
-                rows = parse_page(r.text, locality)
-                if rows:
-                    all_data.extend(rows)
-                    logger.info(f"  -> Extracted {len(rows)} rows")
-                else:
-                    logger.warning("  -> No data found")
-            else:
-                logger.warning(f"  -> Failed (Status {r.status_code})")
+            if byte_budget:
+                r = stream_scan(session, url, LocalityRatesScanner(), limiter, max_bytes=byte_budget, timeout=10)
+                all_rates.append(collect_rates(locality, r.status_code, None, rates=r.value))
+                continue
+            r = cached_get(session, url, limiter, timeout=10)
+            all_rates.append(collect_rates(locality, r.status_code, r.text))
         except Exception as e:
-            logger.error(f"  -> Error: {e}")
-        
-        time.sleep(1) # Polite delay
-        
-    # Save to CSV
-    if all_data:
-        columns = ["town", "locality", "year", "price_per_sqft", "appreciation", "rental_yield", "current_rate"]
-        outfile = "data/mira_bhayandar_comprehensive.csv"
-        with open(outfile, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=columns)
-            writer.writeheader()
-            writer.writerows(all_data)
-        logger.info(f"Saved {len(all_data)} rows to {outfile}")
+            all_rates.append(collect_rates(locality, None, None, error=e))
+
+    return all_rates
+
+def scrape_concurrent(localities, per_host_limit=4, max_concurrency=16, requests_per_second=2.0, byte_budget=None):
+    urls = [get_url(locality) for locality in localities]
+    logger.info(f"Fetching {len(urls)} localities (per-host limit {per_host_limit}, budget {requests_per_second} req/s)...")
+    streaming = {"scanner_factory": LocalityRatesScanner, "max_bytes": byte_budget} if byte_budget else {}
+    results = fetch_all(
+        urls,
+        create_session,
+        per_host_limit=per_host_limit,
+        max_concurrency=max_concurrency,
+        requests_per_second=requests_per_second,
+        timeout=10,
+        **streaming,
+    )
+
+    return [collect_rates(locality, result.status, result.text, error=result.error, rates=result.value)
+            for locality, result in zip(localities, results)]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scrape 99acres rates and trends for Mira Bhayandar localities")
+    parser.add_argument("--sequential", action="store_true", help="Fetch one locality at a time (legacy mode)")
+    parser.add_argument("--per-host-limit", type=int, default=4, help="Max requests in flight per host")
+    parser.add_argument("--max-concurrency", type=int, default=16, help="Max requests in flight overall")
+    parser.add_argument("--rps", type=float, default=2.0, help="Politeness budget in requests/second across all hosts (0 disables)")
+    parser.add_argument("--history-db", default=DEFAULT_HISTORY_PATH,
+                        help="Historical price store the scraped rows are upserted into")
+    add_cache_arguments(parser)
+    add_columnar_arguments(parser)
+    add_metrics_arguments(parser)
+    add_profiling_arguments(parser)
+    add_streaming_arguments(parser)
+    add_loader_arguments(parser)
+    args = parser.parse_args(argv)
+    configure_cache_from_args(args)
+    metrics = configure_metrics("all_localities")
+    profiling_from_args(args, "all_localities")
+
+    if args.sequential:
+        all_rates = scrape_sequential(LOCALITIES, byte_budget_from_args(args))
     else:
-        logger.error("No data collected.")
+        all_rates = scrape_concurrent(
+            LOCALITIES,
+            per_host_limit=args.per_host_limit,
+            max_concurrency=args.max_concurrency,
+            requests_per_second=args.rps or None,
+            byte_budget=byte_budget_from_args(args),
+        )
+    found = [(locality, rates) for locality, rates in zip(LOCALITIES, all_rates) if rates and rates.current_rate]
+    localities = [locality for locality, _ in found]
+    rates = [r for _, r in found]
+    with stage("extract"):
+        all_data = build_rows(localities, rates)
+        monthly = monthly_points(localities, rates) if all_data else []
+    metrics.inc("records_total", len(all_data), dataset="locality_trends")
+
+    with stage("export"):
+        if all_data:
+            store = HistoryStore(args.history_db)
+            try:
+                n = store.upsert(all_data, default_source="99acres")
+                n += store.upsert(monthly)
+            finally:
+                store.close()
+            logger.info(f"Upserted {n} points into {args.history_db}")
+            load_from_args(args, all_data + monthly, "historical_prices")
+        
+        # Save as a typed columnar dataset, or the legacy CSV
+        if all_data and args.format != "csv":
+            paths = write_dataset(all_data, LOCALITY_TRENDS, args.columnar_dir, default_source="99acres", fmt=args.format)
+            logger.info(f"Saved {len(all_data)} rows to {', '.join(paths)}")
+        elif all_data:
+            columns = ["town", "locality", "year", "price_per_sqft", "appreciation", "rental_yield", "current_rate"]
+            outfile = "data/mira_bhayandar_comprehensive.csv"
+            with open(outfile, "w", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=columns)
+                writer.writeheader()
+                writer.writerows(all_data)
+            logger.info(f"Saved {len(all_data)} rows to {outfile}")
+        else:
+            logger.error("No data collected.")
+    report_from_args(args)
+    finish_profiling()
 
 if __name__ == "__main__":
     main()
@@ -7,13 +7,35 @@ Scrapes comprehensive property data including:
 - Historical trends
 """
 
+import argparse
 import requests
-from bs4 import BeautifulSoup
 import json
-import time
-import random
+import re
+import threading
+from dataclasses import asdict, dataclass
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from scraping.builders import INDEPENDENT_BUILDER, default_builder_index
+from scraping.cache import add_cache_arguments, cached_get, configure_cache_from_args
+from scraping.checkpoint import CrawlCheckpoint, latest_checkpoint
+from scraping.dedup import ListingDeduper, add_dedup_arguments, deduper_from_args
+from scraping.embedded_state import extract_embedded_state, find_record_list, first_value
+from scraping.incremental import DEFAULT_STATE_PATH, PROPERTIES, IncrementalStore
+from scraping.loader import add_loader_arguments, iter_records, listing_target, load_from_args
+from scraping.localities import default_resolver
+from scraping.metrics import add_metrics_arguments, configure_metrics, report_from_args
+from scraping.pagination import PageSignals, PaginationController, read_page_signals
+from scraping.parsing import LISTING_CARD_STRAINER, make_soup
+from scraping.pipeline import run_pipeline
+from scraping.profiles import BuilderProfileStore, add_profile_arguments, profile_sources
+from scraping.profiling import add_profiling_arguments, finish_profiling, profiling_from_args, stage, staged
+from scraping.rate_limit import shared_limiter
+from scraping.selector_cache import (Selector, add_selector_arguments, configure_selector_cache,
+                                     configure_selector_cache_from_args, default_selector_cache, url_template)
+from scraping.writers import NdjsonWriter
 
 # User agent to avoid blocking
 HEADERS = {
@@ -37,64 +59,243 @@ LOCALITIES = [
     'goregaon-east-mumbai'
 ]
 
-def scrape_locality_properties(locality: str, max_pages: int = 3) -> List[Dict]:
-    """Scrape properties from a specific locality"""
+# Key aliases for listing objects in the embedded page JSON
+LISTING_PRICE_KEYS = ('price', 'priceValue', 'minPrice', 'formattedPrice', 'priceText')
+LISTING_AREA_KEYS = ('superArea', 'builtupArea', 'carpetArea', 'area', 'sqft', 'areaText')
+
+def create_session() -> requests.Session:
+    """Session with connection reuse and retries on server errors"""
+    session = requests.Session()
+    # 429/503 are left to throttled_get so the rate limiter sees them; urllib3
+    # would otherwise retry them itself whenever they carry a Retry-After
+    retry = Retry(total=3, backoff_factor=1, status_forcelist=[500, 502, 504], respect_retry_after_header=False)
+    adapter = HTTPAdapter(max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update(HEADERS)
+    return session
+
+def listing_url(locality: str, page: int) -> str:
+    return f"https://www.99acres.com/property-in-{locality}-ffid?page={page}"
+
+LISTING_TEMPLATE = url_template(listing_url("*", 1))
+
+# Broad card and field searches, in the order they are tried; the selector
+# cache learns which one wins on a URL template and tries it first
+CARD_SELECTORS = [
+    Selector.of('div', ('tupleNew', 'srpTuple')),
+    Selector.of('article'),
+    Selector.of('div', 'srpWrap'),
+]
+FIELD_SELECTORS = {
+    'title': [Selector.of('h2'), Selector.of('div', 'srpTuple__propertyHeading')],
+    'price': [Selector.of('span', 'srpTuple__price'), Selector.of('div', 'price')],
+    'area': [Selector.of('span', 'srpTuple__area'), Selector.of('div', 'area')],
+    'builder': [Selector.of('div', 'srpTuple__builderName'), Selector.of('span', 'developer')],
+    'description': [Selector.of('div', 'srpTuple__description'), Selector.of('p')],
+}
+
+_thread_state = threading.local()
+
+def fetch_page(session: requests.Session, locality: str, page: int) -> Optional[bytes]:
+    """Fetch one result page; None when it could not be fetched"""
+    url = listing_url(locality, page)
+    
+    print(f"Scraping {locality} - Page {page}...")
+    try:
+        # Served from the response cache when fresh, else paced by the rate limiter
+        response = cached_get(session, url, shared_limiter(), timeout=15)
+    except Exception as e:
+        print(f"Error scraping {locality} page {page}: {e}")
+        return None
+    
+    if response.status_code != 200:
+        print(f"Failed to fetch {url}: Status {response.status_code}")
+        return None
+    return response.content
+
+def fetch_listing_page(job) -> Optional[bytes]:
+    """Pipeline fetch stage: (locality, page) -> page body, or None on failure"""
+    session = getattr(_thread_state, 'session', None)
+    if session is None:
+        session = _thread_state.session = create_session()
+    locality, page = job
+    return fetch_page(session, locality, page)
+
+def parse_listing_job(job, content: bytes) -> Tuple[List[Dict], PageSignals, Dict]:
+    """
+    Pipeline parse stage (runs in a worker process): records, pagination
+    signals and the selector cache counts to merge in the main process
+    """
+    locality, page = job
+    with stage("parse"):
+        state = extract_embedded_state(content)
+    template = url_template(listing_url(locality, page))
+    properties = parse_listing_page(content, locality, state=state, template=template)
+    with stage("parse"):
+        signals = read_page_signals(content, page, properties, state)
+    return properties, signals, default_selector_cache().drain()
+
+def scrape_locality_properties(locality: str, max_pages: int = 3, session: Optional[requests.Session] = None,
+                               deduper: Optional[ListingDeduper] = None) -> List[Dict]:
+    """
+    Scrape properties from a specific locality, following result pages until
+    they run out, repeat, or ``max_pages`` is reached. A ``deduper`` drops
+    listings already returned for an earlier page.
+    """
     properties = []
+    session = session or create_session()
+    controller = PaginationController(max_pages=max_pages, lookahead=0)
+    jobs = controller.start([locality])
     
-    for page in range(1, max_pages + 1):
-        url = f"https://www.99acres.com/property-in-{locality}-ffid?page={page}"
+    while jobs:
+        job = jobs.pop(0)
+        if not controller.should_fetch(job):
+            continue
+        content = fetch_page(session, *job)
+        jobs.extend(controller.after_fetch(job, content is not None))
+        if content is None:
+            continue
         
         try:
-            print(f"Scraping {locality} - Page {page}...")
-            response = requests.get(url, headers=HEADERS, timeout=15)
-            
-            if response.status_code != 200:
-                print(f"Failed to fetch {url}: Status {response.status_code}")
-                continue
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Find property cards (structure may vary, adjust selectors as needed)
-            property_cards = soup.find_all('div', class_=['tupleNew', 'srpTuple'])
-            
-            if not property_cards:
-                # Try alternative selectors
-                property_cards = soup.find_all('article') or soup.find_all('div', class_='srpWrap')
-            
-            print(f"Found {len(property_cards)} property cards")
-            
-            for card in property_cards:
-                try:
-                    property_data = extract_property_data(card, locality)
-                    if property_data:
-                        properties.append(property_data)
-                except Exception as e:
-                    print(f"Error extracting property: {e}")
-                    continue
-            
-            # Be respectful - random delay between requests
-            time.sleep(random.uniform(2, 4))
-            
+            page_properties, signals, selectors = parse_listing_job(job, content)
+            default_selector_cache().merge(selectors)
         except Exception as e:
-            print(f"Error scraping {locality} page {page}: {e}")
-            continue
+            print(f"Error scraping {locality} page {job[1]}: {e}")
+            page_properties, signals = [], None
+        
+        keep, follow_ups = controller.after_parse(job, signals)
+        jobs.extend(follow_ups)
+        if keep:
+            if deduper is not None:
+                page_properties = [prop for prop in page_properties if not deduper.seen(prop)]
+            print(f"Found {len(page_properties)} properties")
+            properties.extend(page_properties)
     
+    print(f"Stopped {locality}: {controller.progress[locality].reason}")
+    return properties
+
+def find_property_cards(content, backend: Optional[str] = None, parse_only=LISTING_CARD_STRAINER,
+                        template: str = LISTING_TEMPLATE) -> list:
+    """Parse a listing page and return its property card elements"""
+    # Build only the candidate card subtrees with the fast backend
+    soup = make_soup(content, parse_only=parse_only, backend=backend)
+    
+    # Find property cards (structure may vary): the selector that matched on
+    # earlier pages of this template first, then the alternatives in order
+    return default_selector_cache().find_all(template, 'card', soup, CARD_SELECTORS)
+
+def extract_properties(property_cards, locality: str, template: str = LISTING_TEMPLATE) -> List[Dict]:
+    """Run extract_property_data over a page's cards, skipping ones that fail"""
+    properties = []
+    for card in property_cards:
+        try:
+            property_data = extract_property_data(card, locality, template)
+            if property_data:
+                properties.append(property_data)
+        except Exception as e:
+            print(f"Error extracting property: {e}")
+            continue
     return properties
 
-def extract_property_data(card, locality: str) -> Optional[Dict]:
+def parse_listing_page(content, locality: str, backend: Optional[str] = None, parse_only=LISTING_CARD_STRAINER,
+                       state: Optional[Dict] = None, template: str = LISTING_TEMPLATE) -> List[Dict]:
+    """Listing page bytes -> property records (embedded page JSON first, card DOM as fallback)"""
+    if state is None:
+        with stage("parse"):
+            state = extract_embedded_state(content)
+    with stage("extract"):
+        listings = listings_from_state(state, locality)
+    if listings:
+        return listings
+    with stage("parse"):
+        cards = find_property_cards(content, backend, parse_only, template)
+    with stage("extract"):
+        return extract_properties(cards, locality, template)
+
+def listings_from_state(state: Optional[Dict], locality: str) -> Optional[List[Dict]]:
+    """Property records from the listing array in the page's embedded JSON, or None"""
+    if not state:
+        return None
+    items = find_record_list(state, [LISTING_PRICE_KEYS, LISTING_AREA_KEYS])
+    if items is None:
+        return None
+    properties = []
+    for item in items:
+        property_data = property_from_state(item, locality)
+        if property_data:
+            properties.append(property_data)
+    return properties
+
+def property_from_state(item: Dict, locality: str) -> Optional[Dict]:
+    """Map one embedded listing object to the same record extract_property_data builds"""
+    try:
+        title = first_value(item, ('title', 'propertyTitle', 'heading', 'name')) or "Property"
+        
+        price_value = first_value(item, LISTING_PRICE_KEYS)
+        price = int(price_value) if isinstance(price_value, (int, float)) else parse_price(str(price_value or '0'))
+        
+        area_value = first_value(item, LISTING_AREA_KEYS)
+        sqft = int(area_value) if isinstance(area_value, (int, float)) else parse_area(str(area_value or '0'))
+        
+        bed_value = first_value(item, ('bedrooms', 'bedroomCount', 'bhk'))
+        if isinstance(bed_value, (int, float)):
+            bedrooms = int(bed_value)
+        else:
+            numbers = re.findall(r'\d+', str(bed_value or ''))
+            bedrooms = int(numbers[0]) if numbers else 2
+        
+        bath_value = first_value(item, ('bathrooms', 'bathroomCount'))
+        if isinstance(bath_value, (int, float)):
+            bathrooms = int(bath_value)
+        else:
+            bathrooms = max(1, bedrooms - 1) if bedrooms > 1 else 1
+        
+        builder = first_value(item, ('builderName', 'developerName', 'builder')) or extract_builder_from_title(title)
+        property_type = first_value(item, ('propertyType',)) or "Apartment"
+        description = first_value(item, ('description',))
+        description = str(description)[:500] if description else f"{bedrooms} BHK {property_type} in {locality}"
+        image_url = first_value(item, ('imageUrl', 'image', 'photoUrl', 'thumbnailUrl')) or "https://via.placeholder.com/800x600?text=Property"
+        
+        # Skip if essential data is missing
+        if price == 0 or sqft == 0:
+            return None
+        
+        return {
+            'title': title,
+            'description': description,
+            'price': price,
+            'location': format_locality_name(locality),
+            'sqft': sqft,
+            'type': property_type,
+            'bedrooms': bedrooms,
+            'bathrooms': bathrooms,
+            'builder': builder,
+            'image_url': image_url,
+            'status': 'available',
+            'scraped_at': datetime.now().isoformat(),
+            'price_per_sqft': round(price / sqft) if sqft > 0 else 0
+        }
+        
+    except Exception as e:
+        print(f"Error in property_from_state: {e}")
+        return None
+
+def extract_property_data(card, locality: str, template: str = LISTING_TEMPLATE) -> Optional[Dict]:
     """Extract property details from a card element"""
+    selectors = default_selector_cache()
     try:
         # Title
-        title_elem = card.find('h2') or card.find('div', class_='srpTuple__propertyHeading')
+        title_elem = selectors.find(template, 'title', card, FIELD_SELECTORS['title'])
         title = title_elem.get_text(strip=True) if title_elem else "Property"
         
         # Price
-        price_elem = card.find('span', class_='srpTuple__price') or card.find('div', class_='price')
+        price_elem = selectors.find(template, 'price', card, FIELD_SELECTORS['price'])
         price_text = price_elem.get_text(strip=True) if price_elem else "0"
         price = parse_price(price_text)
         
         # Area (sqft)
-        area_elem = card.find('span', class_='srpTuple__area') or card.find('div', class_='area')
+        area_elem = selectors.find(template, 'area', card, FIELD_SELECTORS['area'])
         area_text = area_elem.get_text(strip=True) if area_elem else "0"
         sqft = parse_area(area_text)
         
@@ -106,7 +307,7 @@ def extract_property_data(card, locality: str) -> Optional[Dict]:
         bathrooms = max(1, bedrooms - 1) if bedrooms > 1 else 1
         
         # Builder/Developer
-        builder_elem = card.find('div', class_='srpTuple__builderName') or card.find('span', class_='developer')
+        builder_elem = selectors.find(template, 'builder', card, FIELD_SELECTORS['builder'])
         builder = builder_elem.get_text(strip=True) if builder_elem else extract_builder_from_title(title)
         
         # Property type
@@ -114,7 +315,7 @@ def extract_property_data(card, locality: str) -> Optional[Dict]:
         property_type = type_elem.get_text(strip=True) if type_elem else "Apartment"
         
         # Description
-        desc_elem = card.find('div', class_='srpTuple__description') or card.find('p')
+        desc_elem = selectors.find(template, 'description', card, FIELD_SELECTORS['description'])
         description = desc_elem.get_text(strip=True)[:500] if desc_elem else f"{bedrooms} BHK {property_type} in {locality}"
         
         # Image
@@ -206,119 +407,244 @@ def extract_bedrooms(elem) -> int:
     return 2  # Default
 
 def extract_builder_from_title(title: str) -> str:
-    """Extract builder name from title if present"""
-    common_builders = [
-        'Lodha', 'Godrej', 'Tata', 'Oberoi', 'Hiranandani', 'Runwal', 
-        'Kalpataru', 'Shapoorji', 'Mahindra', 'Piramal', 'Rustomjee',
-        'Sheth', 'Wadhwa', 'Radius', 'Kanakia', 'Ajmera'
-    ]
-    
-    for builder in common_builders:
-        if builder.lower() in title.lower():
-            return builder
-    
-    # Try to extract from title pattern "Builder Name Project"
-    words = title.split()
-    if len(words) > 0:
-        return words[0]
-    
-    return "Independent Builder"
+    """Known builder named in the title, or the independent-builder placeholder"""
+    return default_builder_index().find_in_title(title) or INDEPENDENT_BUILDER
 
 def format_locality_name(locality: str) -> str:
     """Convert URL-friendly locality to display name"""
-    name = locality.replace('-mumbai', '').replace('-', ' ').title()
-    return name
+    return default_resolver().display_name(locality)
 
-def scrape_builder_info(builder_name: str) -> Dict:
-    """Scrape or generate builder profile information"""
-    # For now, generate realistic data based on builder reputation
-    # In production, this would scrape from builder pages or RERA database
-    
-    premium_builders = ['Lodha', 'Godrej', 'Tata', 'Oberoi', 'Hiranandani']
-    mid_tier_builders = ['Runwal', 'Kalpataru', 'Shapoorji', 'Mahindra', 'Piramal']
-    
-    if any(b in builder_name for b in premium_builders):
-        return {
-            'name': builder_name,
-            'rera_registered': True,
-            'on_time_delivery_rate': random.randint(85, 95),
-            'total_projects': random.randint(40, 80),
-            'completed_projects': random.randint(35, 70),
-            'avg_customer_rating': round(random.uniform(4.0, 4.7), 1),
-            'resale_velocity_index': random.randint(75, 90),
-            'legal_issues_count': random.randint(0, 2)
-        }
-    elif any(b in builder_name for b in mid_tier_builders):
-        return {
-            'name': builder_name,
-            'rera_registered': True,
-            'on_time_delivery_rate': random.randint(70, 85),
-            'total_projects': random.randint(20, 40),
-            'completed_projects': random.randint(15, 35),
-            'avg_customer_rating': round(random.uniform(3.5, 4.2), 1),
-            'resale_velocity_index': random.randint(60, 75),
-            'legal_issues_count': random.randint(1, 4)
-        }
-    else:
-        return {
-            'name': builder_name,
-            'rera_registered': random.choice([True, False]),
-            'on_time_delivery_rate': random.randint(55, 75),
-            'total_projects': random.randint(5, 20),
-            'completed_projects': random.randint(3, 15),
-            'avg_customer_rating': round(random.uniform(3.0, 3.8), 1),
-            'resale_velocity_index': random.randint(40, 65),
-            'legal_issues_count': random.randint(2, 8)
-        }
+@dataclass
+class RunSummary:
+    """Running totals for the end-of-run statistics, so records need not be kept in memory"""
+    count: int = 0
+    total_price: int = 0
+    total_sqft: int = 0
+    total_price_per_sqft: int = 0
+
+    def add(self, prop: Dict):
+        self.count += 1
+        self.total_price += prop['price']
+        self.total_sqft += prop['sqft']
+        self.total_price_per_sqft += prop['price_per_sqft']
 
-def main():
-    """Main scraping function"""
-    all_properties = []
-    all_builders = {}
+    def merge(self, other: "RunSummary"):
+        self.count += other.count
+        self.total_price += other.total_price
+        self.total_sqft += other.total_sqft
+        self.total_price_per_sqft += other.total_price_per_sqft
+
+    def print_statistics(self):
+        if not self.count:
+            return
+        print(f"\n📈 Statistics:")
+        print(f"   Average Price: ₹{self.total_price / self.count / 100000:.2f} L")
+        print(f"   Average Area: {self.total_sqft / self.count:.0f} sqft")
+        print(f"   Average Price/sqft: ₹{self.total_price_per_sqft / self.count:.0f}")
+
+def main(argv=None):
+    """Main scraping function: fetch, parse and write stages run as a pipeline"""
+    parser = argparse.ArgumentParser(description="Scrape 99acres property listings and builder profiles")
+    parser.add_argument("--max-pages", type=int, default=20,
+                        help="Safety cap on result pages per locality (pagination stops earlier on empty/repeated/last pages)")
+    parser.add_argument("--fetch-workers", type=int, default=4, help="I/O threads fetching pages")
+    parser.add_argument("--parse-workers", type=int, default=None,
+                        help="Parser processes (default: one per core, 0 parses in-process)")
+    parser.add_argument("--queue-size", type=int, default=8, help="Pages buffered between stages")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Write only new/changed/removed listings to a delta file instead of a full snapshot")
+    parser.add_argument("--state", default=DEFAULT_STATE_PATH, help="Listing state store used by --incremental")
+    parser.add_argument("--output", help="NDJSON output path (default: timestamped file under data/)")
+    parser.add_argument("--gzip", action="store_true", help="Gzip the default output file")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue the crawl recorded in the output's checkpoint (default: the latest one)")
+    add_cache_arguments(parser)
+    add_profile_arguments(parser)
+    add_metrics_arguments(parser)
+    add_profiling_arguments(parser)
+    add_selector_arguments(parser)
+    add_loader_arguments(parser)
+    add_dedup_arguments(parser)
+    args = parser.parse_args(argv)
+    configure_cache_from_args(args)
+    selector_cache = configure_selector_cache_from_args(args)
+    metrics = configure_metrics("properties")
+    if profiling_from_args(args, "properties") and args.parse_workers != 0:
+        # Parser processes are out of the profiler's reach
+        print("Profiling: parsing in-process (--parse-workers 0)")
+        args.parse_workers = 0
+
+    builder_names = set()
+    builders = default_builder_index()
+    summary = RunSummary()
+    locality_counts = {locality: 0 for locality in LOCALITIES}
+    kind = 'delta' if args.incremental else 'scraped'
     
     print("Starting 99acres property scraper...")
     print(f"Target localities: {len(LOCALITIES)}")
     
-    for locality in LOCALITIES:
-        properties = scrape_locality_properties(locality, max_pages=2)
-        all_properties.extend(properties)
-        
-        # Extract unique builders
-        for prop in properties:
-            builder_name = prop.get('builder', 'Unknown')
-            if builder_name not in all_builders and builder_name != 'Unknown':
-                all_builders[builder_name] = scrape_builder_info(builder_name)
-        
-        print(f"Scraped {len(properties)} properties from {locality}")
-        print(f"Total properties so far: {len(all_properties)}")
-    
-    # Save to JSON files
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    properties_file = args.output
+    if args.resume and properties_file is None:
+        properties_file = latest_checkpoint(f'data/properties_{kind}_*.ndjson*')
+        if properties_file is None:
+            parser.error("--resume: no checkpoint found under data/")
+    if properties_file is None:
+        properties_file = f'data/properties_{kind}_{timestamp}.ndjson' + ('.gz' if args.gzip else '')
+    
+    checkpoint = CrawlCheckpoint(properties_file)
+    if args.resume:
+        checkpoint.load()
+        if not checkpoint.header:
+            parser.error(f"--resume: no checkpoint for {properties_file}")
+        if checkpoint.header.get('incremental', False) != args.incremental:
+            parser.error("--resume: checkpoint was written with a different --incremental setting")
+    checkpoint.open(incremental=args.incremental)
     
-    properties_file = f'data/properties_scraped_{timestamp}.json'
-    with open(properties_file, 'w', encoding='utf-8') as f:
-        json.dump(all_properties, f, indent=2, ensure_ascii=False)
+    store = IncrementalStore(PROPERTIES, args.state, started=checkpoint.started) if args.incremental else None
+    if args.resume:
+        if store is not None and checkpoint.restore(store.saved_checkpoint(checkpoint.path, checkpoint.started)):
+            print("Recovered the last checkpoint entry from the incremental state")
+        # Totals and builders of pages written before the restart
+        for entry in checkpoint.pages:
+            summary.merge(RunSummary(**entry['summary']))
+            locality_counts[entry['locality']] = locality_counts.get(entry['locality'], 0) + entry['summary']['count']
+            builder_names.update(builders.resolve(name, learn=True) for name in entry.get('builders', []))
+        print(f"Resuming {properties_file}: {len(checkpoint.pages)} pages, {summary.count} properties already saved")
+    writer = NdjsonWriter(properties_file, truncate_at=checkpoint.offset if args.resume else None)
+    deduper = deduper_from_args(args)
+    if deduper is not None and args.resume:
+        # Listings written before the restart count as seen
+        for record in iter_records(properties_file):
+            deduper.seen(record)
+        deduper.kept = deduper.dropped = 0
     
-    builders_file = f'data/builders_scraped_{timestamp}.json'
-    with open(builders_file, 'w', encoding='utf-8') as f:
-        json.dump(all_builders, f, indent=2, ensure_ascii=False)
+    controller = PaginationController(max_pages=args.max_pages)
+    jobs = controller.start(LOCALITIES, checkpoint.restore_progress() if args.resume else None)
+    
+    with writer:
+        def write_page(job, result):
+            locality, page = job
+            properties, signals, selectors = result if result else ([], None, None)
+            default_selector_cache().merge(selectors)
+            keep, follow_ups = controller.after_parse(job, signals)
+            progress = controller.progress[locality]
+            if not keep:
+                if progress.finished and progress.failed_page is None:
+                    checkpoint.locality_done(locality, progress.reason)
+                return follow_ups
+            
+            if deduper is not None:
+                # Repeats from earlier pages of the locality are neither written nor counted
+                properties = [prop for prop in properties if not deduper.seen(prop)]
+            page_summary = RunSummary()
+            new_builders = []
+            for prop in properties:
+                # One canonical name per builder ("LODHA", "Lodha Group" -> "Lodha")
+                if prop.get('builder'):
+                    prop['builder'] = builders.resolve(prop['builder'], learn=True) or prop['builder']
+                if store is None:
+                    writer.write(prop)
+                else:
+                    change = store.observe(prop)
+                    if change:
+                        writer.write(change)
+                page_summary.add(prop)
+                
+                # Extract unique builders
+                builder_name = prop.get('builder', 'Unknown')
+                if builder_name not in builder_names and builder_name != 'Unknown':
+                    builder_names.add(builder_name)
+                    new_builders.append(builder_name)
+            metrics.inc("records_total", page_summary.count, dataset="properties")
+
+            # Records first, then the state together with the checkpoint
+            # entry in one transaction, then the checkpoint line. A crash
+            # before the commit repeats this page on resume; one after it
+            # gets the entry back from the store, keeping the page's deltas
+            entry = checkpoint.page_entry(
+                locality, page, writer.flush(),
+                records=signals.records, fingerprint=signals.fingerprint, last_page=progress.last_page,
+                summary=asdict(page_summary), builders=new_builders,
+            )
+            if store is not None:
+                store.save_checkpoint(checkpoint.path, checkpoint.started, entry)
+                store.commit()
+            checkpoint.add(entry)
+            if progress.finished and progress.failed_page is None:
+                checkpoint.locality_done(locality, progress.reason)
+            
+            summary.merge(page_summary)
+            locality_counts[locality] += len(properties)
+            print(f"Scraped {len(properties)} properties from {locality} page {page}")
+            print(f"Total properties so far: {summary.count}")
+            return follow_ups
+        
+        stats = run_pipeline(
+            jobs,
+            fetch=fetch_listing_page,
+            parse=parse_listing_job,
+            sink=staged("export", write_page),
+            fetch_workers=args.fetch_workers,
+            parse_workers=args.parse_workers,
+            queue_size=args.queue_size,
+            should_fetch=controller.should_fetch,
+            on_fetched=controller.after_fetch,
+            kind="listing",
+            # Parser processes start fresh and load the learned selectors themselves
+            initializer=configure_selector_cache,
+            initargs=(args.selectors_db, not args.no_learned_selectors, args.selector_verify_every),
+        )
+        
+        if store is not None:
+            # Only localities crawled to their natural end can report removals
+            complete = [
+                format_locality_name(locality) for locality in LOCALITIES
+                if controller.progress[locality].failed_page is None and locality_counts[locality]
+            ]
+            for change in store.sweep(complete):
+                writer.write(change)
+            entry = checkpoint.sweep_entry(writer.flush())
+            store.save_checkpoint(checkpoint.path, checkpoint.started, entry)
+            store.commit()
+            checkpoint.add(entry)
+            store.close()
+    checkpoint.close()
+    if args.load_db:
+        # Streamed back from the output file, so the run never holds every listing
+        loaded = load_from_args(args, iter_records(properties_file), listing_target(args.load_db))
+        print(f"🗄️  Loaded {loaded.rows} rows into {args.load_db} in {loaded.batches} batches ({loaded.seconds:.1f}s)")
+    
+    with stage("export"):
+        # Stored profiles are reused; only missing or expired fields are looked up
+        profiles = BuilderProfileStore(args.profiles_db, profile_sources(args.rera_dump))
+        all_builders = profiles.lookup(sorted(builder_names))
+        profiles.close()
+        
+        builders_file = f'data/builders_scraped_{timestamp}.json'
+        with open(builders_file, 'w', encoding='utf-8') as f:
+            json.dump(all_builders, f, indent=2, ensure_ascii=False)
     
     print(f"\n✅ Scraping complete!")
-    print(f"📊 Total properties: {len(all_properties)}")
-    print(f"🏗️  Total builders: {len(all_builders)}")
+    print(f"📄 Pages: {stats.fetched} fetched, {stats.skipped} skipped in {stats.elapsed:.1f}s")
+    for locality in LOCALITIES:
+        progress = controller.progress[locality]
+        print(f"   {locality}: {locality_counts[locality]} properties, {progress.parsed} pages seen, stopped: {progress.reason}")
+    print(f"📊 Total properties: {summary.count}")
+    print(f"🏗️  Total builders: {len(all_builders)} ({profiles.counts['cached']} profiles reused, "
+          f"{profiles.counts['refreshed']} refreshed)")
+    if store is not None:
+        print(f"🔁 Delta: {store.summary()}")
+    if deduper is not None:
+        print(f"🧹 Dedup: {deduper.summary()}")
     print(f"💾 Saved to: {properties_file}")
     print(f"💾 Saved to: {builders_file}")
     
     # Print summary statistics
-    if all_properties:
-        avg_price = sum(p['price'] for p in all_properties) / len(all_properties)
-        avg_sqft = sum(p['sqft'] for p in all_properties) / len(all_properties)
-        avg_price_per_sqft = sum(p['price_per_sqft'] for p in all_properties) / len(all_properties)
-        
-        print(f"\n📈 Statistics:")
-        print(f"   Average Price: ₹{avg_price/100000:.2f} L")
-        print(f"   Average Area: {avg_sqft:.0f} sqft")
-        print(f"   Average Price/sqft: ₹{avg_price_per_sqft:.0f}")
+    summary.print_statistics()
+    selector_cache.flush()
+    report_from_args(args, extra={"pipeline": asdict(stats)})
+    finish_profiling()
 
 if __name__ == "__main__":
     main()
@@ -4,21 +4,47 @@
 Uses HTTP requests + BeautifulSoup (no GUI browser required)
 """
 
+import argparse
 import os
 import re
 import time
 import json
 import random
 import logging
-from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from datetime import date, datetime
+from typing import List, Dict, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 import requests
-from bs4 import BeautifulSoup
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+from scraping.cache import add_cache_arguments, cached_get, configure_cache_from_args
+from scraping.columnar import add_columnar_arguments, write_dataset
+from scraping.columnar import HISTORICAL_RATES as HISTORICAL_COLUMNS, LOCALITY_RATES as RATE_COLUMNS
+from scraping.embedded_state import (
+    CHANGE_KEYS, RATE_KEYS, RATE_LIST_PATHS, YIELD_KEYS, dig_first, extract_embedded_state, first_value,
+    locality_rates_from_state,
+)
+from scraping.faq import scan_faq
+from scraping.history import DEFAULT_HISTORY_PATH, HistoryStore
+from scraping.incremental import (
+    DEFAULT_STATE_PATH, HISTORICAL_RATES, LOCALITY_RATES, Dataset, IncrementalStore, write_delta,
+)
+from scraping.localities import default_resolver
+from scraping.metrics import add_metrics_arguments, configure_metrics, default_metrics, report_from_args
+from scraping.parsing import RATE_CARD_CLASS_RE, RATE_CARD_STRAINER, make_soup
+from scraping.profiling import add_profiling_arguments, finish_profiling, profiling_from_args, stage
+from scraping.rate_limit import shared_limiter
+from scraping.selector_cache import (Selector, add_selector_arguments, configure_selector_cache_from_args,
+                                     default_selector_cache, url_template)
+from scraping.streaming import (EmbeddedStateScanner, LocalityRatesScanner, add_streaming_arguments,
+                                byte_budget_from_args, stream_scan)
+from scraping.rates import LocalityRates
+from scraping.synthetic import ZONES as SYNTHETIC_ZONES, generate as generate_market
+from scraping.timeseries import anchor_prices, anchor_years, monthly_points, rates_arrays
+
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger("MiraRoadScraper")
 
@@ -49,11 +75,12 @@ def create_session() -> requests.Session:
     """Create a requests session with retry logic and browser-like headers"""
     session = requests.Session()
     
-    # Shorter retry strategy
+    # Shorter retry strategy (429/503 are paced by throttled_get's rate limiter)
     retry_strategy = Retry(
         total=1,
         backoff_factor=0.5,
-        status_forcelist=[429, 500, 502, 503, 504],
+        status_forcelist=[500, 502, 504],
+        respect_retry_after_header=False,   # otherwise urllib3 retries 429/503 itself
     )
     adapter = HTTPAdapter(max_retries=retry_strategy)
     session.mount("http://", adapter)
@@ -122,170 +149,195 @@ def parse_rental_yield(text: str) -> Optional[float]:
 
 
 def determine_zone(name: str) -> str:
-    """Determine zone/area from locality name"""
-    mapping = {
-        'mira road': 'Mira Road',
-        'bhayandar': 'Mira Bhayandar',
-        'dahisar': 'Mumbai North',
-        'borivali': 'Mumbai North',
-        'kandivali': 'Mumbai North',
-        'malad': 'Mumbai North',
-        'goregaon': 'Mumbai North',
-        'andheri': 'Mumbai West',
-        'bandra': 'Mumbai West',
-        'vasai': 'Vasai Virar',
-        'virar': 'Vasai Virar',
-        'naigaon': 'Vasai Virar'
-    }
-    
-    name_lower = (name or "").lower()
-    for key, zone in mapping.items():
-        if key in name_lower:
-            return zone
-    
-    return "Mira Road & Beyond"
+    """Determine zone/area from locality name via the locality gazetteer"""
+    return default_resolver().zone(name)
 
 
 # ==============================
 # SECTION E: Synthetic Data Generation
 # ==============================
-def generate_synthetic_data(num_records: int = 50) -> tuple:
+def generate_synthetic_data(num_records: int = 50, seed: Optional[int] = None, history_records: int = 10) -> tuple:
     """
     Generate synthetic property data for Mira Road
     This is used as fallback if scraping fails
     """
     logger.info("Generating synthetic data for Mira Road...")
     
-    societies = [
-        "Rustomjee Urbania", "Kanakia Paris", "Runwal Gardens", "Lodha Splendora",
-        "Acme Ozone", "Evershine Millennium Paradise", "Sheth Vasant Oasis",
-        "Poonam Sagar", "Beverly Park", "Golden Nest", "Silver Park",
-        "Maxus Mall Residency", "Haware Citi", "Shree Krishna Towers",
-        "Sai Sarang", "Sheetal Tapovan", "Gundecha Valley", "Thakur Village"
-    ]
+    # One locality per zone; societies spread across them
+    societies_per_zone = max(1, -(-num_records // len(SYNTHETIC_ZONES)))
+    rates, history = generate_market(len(SYNTHETIC_ZONES), societies_per_zone, months=60, seed=seed)
+    rates = rates.sample(frac=1, random_state=seed).head(num_records)
     
-    zones = ["Mira Road East", "Mira Road West", "Mira Bhayandar", "Kashimira"]
+    data = rates.drop(columns="locality").astype(
+        {"area_name": str, "zone": str, "appreciation_5yr": float, "rental_yield": float}
+    ).round({"appreciation_5yr": 1, "rental_yield": 2}).to_dict("records")
     
-    data = []
+    # Monthly history for the first few records
+    keys = rates.head(history_records)[["area_name", "zone"]].astype(str)
+    history = history.astype({"area_name": str, "zone": str}).merge(keys, on=["area_name", "zone"])
+    history["date"] = history["date"].dt.strftime("%Y-%m-%d")
+    historical_data = history.drop(columns="locality").to_dict("records")
     
-    for i in range(num_records):
-        society = random.choice(societies)
-        zone = random.choice(zones)
-        
-        # Base rate varies by zone
-        if "East" in zone:
-            base_rate = random.randint(6500, 9500)
-        elif "West" in zone:
-            base_rate = random.randint(7000, 10500)
-        else:
-            base_rate = random.randint(6000, 9000)
-        
-        appreciation = round(random.uniform(15.0, 45.0), 1)
-        rental_yield = round(random.uniform(2.5, 4.5), 2)
-        
+    return data, historical_data
+
+
+# ==============================
+# SECTION F: Web Scraping (HTTP)
+# ==============================
+CARD_NAME_CLASS_RE = re.compile(r'(header|title|name)', re.I)
+# Broad searches, in the order they are tried; the selector cache learns which concrete one wins
+RATE_CARD_SELECTORS = [Selector.of(('div', 'section'), RATE_CARD_CLASS_RE)]
+CARD_NAME_SELECTORS = [Selector.of(tag, CARD_NAME_CLASS_RE) for tag in ('h2', 'h3', 'a')]
+RATE_CARDS_TEMPLATE = "rate_cards"
+LOCALITY_NAME_KEYS = ("localityName", "locality", "name")
+
+
+def parse_rate_cards(content, backend: Optional[str] = None, parse_only=RATE_CARD_STRAINER,
+                     template: str = RATE_CARDS_TEMPLATE) -> Optional[List[Dict]]:
+    """
+    Extract locality rate records from a rates page.
+    Returns None when the page has no candidate cards at all.
+    ``template`` keys the learned card selectors (see ``url_template``).
+    """
+    with stage("parse"):
+        # Build only the candidate card subtrees with the fast backend
+        soup = make_soup(content, parse_only=parse_only, backend=backend)
+
+        # Try to find property rate cards
+        # 99acres uses various class names; the card class seen on earlier pages is tried first
+        cards = default_selector_cache().find_all(template, "card", soup, RATE_CARD_SELECTORS)
+
+    if not cards:
+        return None
+    with stage("extract"):
+        return extract_rate_cards(cards, template)
+
+
+def extract_rate_cards(cards, template: str = RATE_CARDS_TEMPLATE) -> List[Dict]:
+    """Locality rate records from rate card elements, skipping cards without a name or rate"""
+    selectors = default_selector_cache()
+    data = []
+    for card in cards:
+        text = card.get_text(separator=' ', strip=True)
+
+        # Must contain rate information
+        if 'Rate on 99acres' not in text and '₹' not in text:
+            continue
+
+        # Extract area name (usually in a heading or link)
+        elem = selectors.find(template, "area_name", card, CARD_NAME_SELECTORS)
+        area_name = elem.get_text(strip=True) if elem else None
+
+        if not area_name or len(area_name) > 100:
+            continue
+
+        # Parse metrics
+        rate = parse_rate(text)
+        appreciation = parse_appreciation(text)
+        rental_yield = parse_rental_yield(text)
+
+        if not rate:  # Rate is mandatory
+            continue
+
+        zone = determine_zone(area_name)
+
         data.append({
-            "area_name": society,
+            "area_name": area_name,
             "zone": zone,
             "property_type": "Residential",
-            "rate_per_sqft": base_rate,
+            "rate_per_sqft": rate,
             "appreciation_5yr": appreciation,
             "rental_yield": rental_yield,
-            "data_source": "synthetic"
+            "data_source": "99acres_scraped"
         })
-    
-    # Generate historical price data
-    historical_data = []
-    for record in data[:10]:  # Generate historical for first 10 societies
-        current_rate = record["rate_per_sqft"]
-        appreciation_rate = record["appreciation_5yr"] / 100 / 5  # Annual rate
-        
-        for months_ago in range(0, 61, 6):  # 5 years, every 6 months
-            date = datetime.now() - timedelta(days=months_ago * 30)
-            years_back = months_ago / 12
-            
-            # Calculate historical rate
-            historical_rate = int(current_rate / ((1 + appreciation_rate) ** years_back))
-            
-            historical_data.append({
-                "area_name": record["area_name"],
-                "zone": record["zone"],
-                "date": date.strftime("%Y-%m-%d"),
-                "rate_per_sqft": historical_rate,
-                "data_source": "synthetic_historical"
-            })
-    
-    return data, historical_data
 
+    return data
 
-# ==============================
-# SECTION F: Web Scraping (HTTP)
-# ==============================
-def scrape_99acres(session: requests.Session) -> Optional[List[Dict]]:
+
+def rate_cards_from_state(state: Optional[Dict]) -> Optional[List[Dict]]:
+    """
+    Locality rate records from the page's embedded JSON.
+    Returns None when none of ``RATE_LIST_PATHS`` holds a locality rate list.
+    """
+    if not state:
+        return None
+    items = dig_first(state, RATE_LIST_PATHS, lambda node: (
+        isinstance(node, list) and node and isinstance(node[0], dict)
+        and first_value(node[0], LOCALITY_NAME_KEYS) is not None and first_value(node[0], RATE_KEYS) is not None
+    ))
+    if items is None:
+        return None
+
+    data = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        area_name = first_value(item, LOCALITY_NAME_KEYS)
+        rate = first_value(item, RATE_KEYS)
+        if not isinstance(area_name, str) or not area_name or len(area_name) > 100:
+            continue
+        try:
+            rate = int(float(str(rate).replace(",", "")))
+        except (TypeError, ValueError):
+            continue
+        if not rate:
+            continue
+        appreciation = first_value(item, CHANGE_KEYS[5])
+        rental_yield = first_value(item, YIELD_KEYS)
+        data.append({
+            "area_name": area_name,
+            "zone": determine_zone(area_name),
+            "property_type": "Residential",
+            "rate_per_sqft": rate,
+            "appreciation_5yr": float(appreciation) if isinstance(appreciation, (int, float)) else None,
+            "rental_yield": float(rental_yield) if isinstance(rental_yield, (int, float)) else None,
+            "data_source": "99acres_scraped"
+        })
+    return data
+
+
+def scrape_99acres(session: requests.Session, byte_budget: Optional[int] = None) -> Optional[List[Dict]]:
     """
     Attempt to scrape 99acres using HTTP requests
     Returns None if scraping fails (will fall back to synthetic data)
+    With a ``byte_budget`` pages are streamed and read only until the
+    embedded locality list has arrived, or up to the budget.
     """
     
     for url in POSSIBLE_URLS:
+        template = url_template(url)
         try:
             logger.info(f"Attempting to fetch: {url}")
             # Shorter timeout - fail fast
-            response = session.get(url, timeout=5)
+            if byte_budget:
+                scanner = EmbeddedStateScanner(rate_cards_from_state,
+                                               lambda body: parse_rate_cards(body, template=template))
+                response = stream_scan(session, url, scanner, shared_limiter(), max_bytes=byte_budget, timeout=5)
+            else:
+                response = cached_get(session, url, shared_limiter(), timeout=5)
             
             if response.status_code == 404:
                 logger.warning(f"URL not found: {url}")
                 continue
             
             response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Try to find property rate cards
-            # 99acres uses various class names, we'll try multiple selectors
-            cards = soup.find_all(['div', 'section'], class_=re.compile(r'(tuple|card|locality|area)', re.I))
+            if byte_budget:
+                data = response.value
+            else:
+                # Embedded page JSON first, card DOM only when it is missing
+                with default_metrics().timer("parse_seconds", kind="rate_cards"):
+                    with stage("parse"):
+                        state = extract_embedded_state(response.content)
+                    with stage("extract"):
+                        data = rate_cards_from_state(state)
+                    if not data:
+                        data = parse_rate_cards(response.content, template=template)
+            default_metrics().inc("pages_parsed_total", kind="rate_cards")
             
-            if not cards:
+            if data is None:
                 logger.warning(f"No property cards found on {url}")
                 continue
             
-            data = []
-            for card in cards:
-                text = card.get_text(separator=' ', strip=True)
-                
-                # Must contain rate information
-                if 'Rate on 99acres' not in text and '₹' not in text:
-                    continue
-                
-                # Extract area name (usually in a heading or link)
-                area_name = None
-                for tag in ['h2', 'h3', 'a']:
-                    elem = card.find(tag, class_=re.compile(r'(header|title|name)', re.I))
-                    if elem:
-                        area_name = elem.get_text(strip=True)
-                        break
-                
-                if not area_name or len(area_name) > 100:
-                    continue
-                
-                # Parse metrics
-                rate = parse_rate(text)
-                appreciation = parse_appreciation(text)
-                rental_yield = parse_rental_yield(text)
-                
-                if not rate:  # Rate is mandatory
-                    continue
-                
-                zone = determine_zone(area_name)
-                
-                data.append({
-                    "area_name": area_name,
-                    "zone": zone,
-                    "property_type": "Residential",
-                    "rate_per_sqft": rate,
-                    "appreciation_5yr": appreciation,
-                    "rental_yield": rental_yield,
-                    "data_source": "99acres_scraped"
-                })
-            
             if data:
                 logger.info(f"Successfully scraped {len(data)} records from {url}")
                 return data
@@ -304,71 +356,76 @@ def scrape_99acres(session: requests.Session) -> Optional[List[Dict]]:
 # ==============================
 # SECTION F.2: Trend Extraction (FAQ-based)
 # ==============================
-def parse_faq_trends(html_text: str, area_name: str) -> List[Dict]:
+def page_trend_rates(html_text: str) -> LocalityRates:
     """
-    Extract historical trends from the FAQ section text
-    99acres embeds this in text like:
+    Current rate and 1/3/5-year movement for a locality page.
+    Reads the embedded page JSON (__NEXT_DATA__ / reactInitialState) when
+    present, otherwise the FAQ section text, which 99acres writes like:
     "Property prices in X have moved: 5.3 % since 1 year 15.2 % since 3 year..."
     """
-    data_points = []
-    
-    # 1. Get Current Rate
-    rate_match = re.search(r"average flat rates in .*? is ₹ ([\d,]+) per sq ft", html_text, re.IGNORECASE)
-    if not rate_match:
-        return []
-        
-    current_rate = int(rate_match.group(1).replace(",", ""))
-    
-    # Add Current Year (approx)
-    data_points.append({
-        "locality": area_name,
-        "year": 2025,
-        "price_per_sqft": current_rate,
-        "source": "99acres_faq_current"
-    })
-    
-    # 2. Get Historical Percentages
-    # Pattern: "5.3 % since 1 year 15.2 % since 3 year 25.1 % since 5 year"
-    trend_match = re.search(r"moved:\s*([\d\.]+)\s*%\s*since\s*1\s*year\s*([\d\.]+)\s*%\s*since\s*3\s*year\s*([\d\.]+)\s*%\s*since\s*5\s*year", html_text, re.IGNORECASE)
+    return locality_rates_from_state(extract_embedded_state(html_text)) or scan_faq(html_text)
+
+
+def trend_points(localities: List[str], rates: List[Optional[LocalityRates]],
+                 scrape_date: Optional[date] = None) -> List[Dict]:
+    """
+    Current and back-calculated yearly points for a batch of localities.
+    Past prices for all localities come from one vectorized pass; the
+    years count back from the scrape date.
+    """
+    current, changes = rates_arrays(rates)
+    anchors = anchor_prices(current, changes)
+    years = anchor_years(scrape_date)
     
-    if trend_match:
-        p1 = float(trend_match.group(1))
-        p3 = float(trend_match.group(2))
-        p5 = float(trend_match.group(3))
-        
-        # Calculate historical prices
-        price_1y = int(current_rate / (1 + p1/100))
-        price_3y = int(current_rate / (1 + p3/100))
-        price_5y = int(current_rate / (1 + p5/100))
-        
-        data_points.append({"locality": area_name, "year": 2024, "price_per_sqft": price_1y, "source": "99acres_faq_derived"})
-        data_points.append({"locality": area_name, "year": 2022, "price_per_sqft": price_3y, "source": "99acres_faq_derived"})
-        data_points.append({"locality": area_name, "year": 2020, "price_per_sqft": price_5y, "source": "99acres_faq_derived"})
-        
+    data_points = []
+    for name, row in zip(localities, anchors):
+        if np.isnan(row[0]):
+            continue
+        data_points.append({"locality": name, "year": years[0], "price_per_sqft": int(row[0]), "source": "99acres_faq_current"})
+        if not np.isnan(row[1:]).any():
+            for year, price in zip(years[1:], row[1:]):
+                data_points.append({"locality": name, "year": year, "price_per_sqft": int(price), "source": "99acres_faq_derived"})
     return data_points
 
-def scrape_historical_trends(session: requests.Session) -> List[Dict]:
+
+def parse_faq_trends(html_text: str, area_name: str, scrape_date: Optional[date] = None) -> List[Dict]:
+    """Extract historical trends for a single locality page"""
+    return trend_points([area_name], [page_trend_rates(html_text)], scrape_date)
+
+
+TREND_URLS = [
+    ("Mira Road", "https://www.99acres.com/property-rates-and-price-trends-in-mira-road-mira-bhayandar-prffid"),
+    ("Mira Road East", "https://www.99acres.com/property-rates-and-price-trends-in-mira-road-east-mira-bhayandar-prffid"),
+    ("Bhayandar West", "https://www.99acres.com/property-rates-and-price-trends-in-bhayandar-west-mira-bhayandar-prffid"),
+]
+
+
+def fetch_trend_rates(session: requests.Session, byte_budget: Optional[int] = None) -> Tuple[List[str], List[LocalityRates]]:
     """
-    Visit specific locality pages to extract trend data from FAQs
+    Visit specific locality pages and read their current rate and price movement
+    (streamed until rate, yield and trend are found when given a ``byte_budget``)
     """
-    target_urls = [
-        ("Mira Road", "https://www.99acres.com/property-rates-and-price-trends-in-mira-road-mira-bhayandar-prffid"),
-        ("Mira Road East", "https://www.99acres.com/property-rates-and-price-trends-in-mira-road-east-mira-bhayandar-prffid"),
-        ("Bhayandar West", "https://www.99acres.com/property-rates-and-price-trends-in-bhayandar-west-mira-bhayandar-prffid"),
-    ]
+    names, rates = [], []
     
-    all_trends = []
-    
-    for name, url in target_urls:
+    for name, url in TREND_URLS:
         try:
             logger.info(f"Fetching trends for {name}...")
-            # Use a specialized header or retry here if needed
-            response = session.get(url, timeout=10)
+            if byte_budget:
+                response = stream_scan(session, url, LocalityRatesScanner(), shared_limiter(),
+                                       max_bytes=byte_budget, timeout=10)
+            else:
+                response = cached_get(session, url, shared_limiter(), timeout=10)
             if response.status_code == 200:
-                points = parse_faq_trends(response.text, name)
-                if points:
-                    logger.info(f"Found {len(points)} data points for {name}")
-                    all_trends.extend(points)
+                if byte_budget:
+                    page_rates = response.value
+                else:
+                    with default_metrics().timer("parse_seconds", kind="locality"), stage("parse"):
+                        page_rates = page_trend_rates(response.text)
+                default_metrics().inc("pages_parsed_total", kind="locality")
+                if page_rates.current_rate:
+                    logger.info(f"Found rate{' and trend' if page_rates.has_trend else ''} for {name}")
+                    names.append(name)
+                    rates.append(page_rates)
                 else:
                     logger.warning(f"No trend data found in FAQ for {name}")
             else:
@@ -377,7 +434,14 @@ def scrape_historical_trends(session: requests.Session) -> List[Dict]:
         except Exception as e:
             logger.error(f"Error scraping trends for {name}: {e}")
             
-    return all_trends
+    return names, rates
+
+
+def scrape_historical_trends(session: requests.Session, scrape_date: Optional[date] = None) -> List[Dict]:
+    """
+    Visit specific locality pages to extract trend data from FAQs
+    """
+    return trend_points(*fetch_trend_rates(session), scrape_date=scrape_date)
 
 
 # ==============================
@@ -408,45 +472,132 @@ def save_to_csv(data: List[Dict], filename_prefix: str = "mira_road_properties")
     return filepath
 
 
+def upsert_history(data: List[Dict], db_path: str = DEFAULT_HISTORY_PATH):
+    """Upsert scraped trend points into the consolidated historical price store"""
+    store = HistoryStore(db_path)
+    try:
+        n = store.upsert(data)
+    finally:
+        store.close()
+    logger.info(f"Upserted {n} historical points into {db_path}")
+
+
+def save_columnar(data: List[Dict], dataset, root: str, fmt: str = "parquet"):
+    """Append data to a typed, source/date-partitioned columnar dataset"""
+    if not data:
+        logger.warning("No data to save")
+        return None
+    
+    paths = write_dataset(data, dataset, root, fmt=fmt)
+    logger.info(f"Saved {len(data)} records to {', '.join(paths)}")
+    
+    return paths
+
+
+def save_delta(data: List[Dict], dataset: Dataset, state_path: str = DEFAULT_STATE_PATH,
+               filename_prefix: str = "mira_road_properties"):
+    """Save only the rows that are new, changed or gone since the last run"""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filepath = os.path.join(DATA_DIR, f"{filename_prefix}_delta_{timestamp}.ndjson")
+    
+    store = IncrementalStore(dataset, state_path)
+    try:
+        write_delta(store, data, filepath)
+    finally:
+        store.close()
+    logger.info(f"Saved delta ({store.summary()}) to {filepath}")
+    
+    return filepath
+
+
 # ==============================
 # SECTION H: Main Orchestration
 # ==============================
-def main():
+def main(argv=None):
     """Main execution function"""
+    parser = argparse.ArgumentParser(description="Collect Mira Road rates and historical trends from 99acres")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Write only new/changed/removed rows of scraped data as delta files")
+    parser.add_argument("--state", default=DEFAULT_STATE_PATH, help="State store used by --incremental")
+    parser.add_argument("--history-db", default=DEFAULT_HISTORY_PATH,
+                        help="Historical price store that scraped trend points are upserted into")
+    add_cache_arguments(parser)
+    add_columnar_arguments(parser)
+    add_metrics_arguments(parser)
+    add_profiling_arguments(parser)
+    add_streaming_arguments(parser)
+    add_selector_arguments(parser)
+    args = parser.parse_args(argv)
+    configure_cache_from_args(args)
+    selectors = configure_selector_cache_from_args(args)
+    metrics = configure_metrics("mira_road")
+    profiling_from_args(args, "mira_road")
+
     logger.info("Starting Mira Road property data collection...")
     
     session = create_session()
     
     # 1. Scrape Current Listings
-    scraped_listings = scrape_99acres(session)
+    byte_budget = byte_budget_from_args(args)
+    scraped_listings = scrape_99acres(session, byte_budget)
     current_data = None
+    current_scraped = False
     
     if scraped_listings and len(scraped_listings) >= 5:
         logger.info(f"Using scraped listings ({len(scraped_listings)} records)")
         current_data = scraped_listings
+        current_scraped = True
     else:
         logger.info("Listing scraping failed/insufficient. Generating synthetic listings...")
         current_data, _ = generate_synthetic_data(num_records=50) # Ignore synthetic historical for now
+        metrics.inc("synthetic_fallback_total", dataset="listings")
+    metrics.inc("records_total", len(current_data), dataset="listings", source="scraped" if current_scraped else "synthetic")
     
     # 2. Scrape Historical Trends
-    real_historical_data = scrape_historical_trends(session)
+    trend_names, trend_rates = fetch_trend_rates(session, byte_budget)
+    with stage("extract"):
+        real_historical_data = trend_points(trend_names, trend_rates)
     historical_data = None
     
     if real_historical_data:
         logger.info(f"Using scraped historical trends ({len(real_historical_data)} points)")
         historical_data = real_historical_data
+        with stage("extract"):
+            monthly = monthly_points(trend_names, trend_rates)
+        # Yearly anchors plus the interpolated monthly series go to the store
+        with stage("export"):
+            upsert_history(real_historical_data + monthly, args.history_db)
     else:
         logger.info("Trend scraping failed. Generating synthetic historical data...")
         _, historical_data = generate_synthetic_data(num_records=10) # Re-use generator for history
+        metrics.inc("synthetic_fallback_total", dataset="historical")
+    metrics.inc("records_total", len(historical_data), dataset="historical",
+                source="scraped" if real_historical_data else "synthetic")
         
     # 3. Save Data
-    current_file = save_to_csv(current_data, "mira_road_properties")
-    
-    if historical_data:
-        historical_file = save_to_csv(historical_data, "mira_road_historical")
-        logger.info(f"Historical data saved to {historical_file}")
+    with stage("export"):
+        # Synthetic fallbacks are never diffed against the state store
+        if args.incremental and current_scraped:
+            current_file = save_delta(current_data, LOCALITY_RATES, args.state, "mira_road_properties")
+        elif args.format != "csv":
+            save_columnar(current_data, RATE_COLUMNS, args.columnar_dir, args.format)
+        else:
+            current_file = save_to_csv(current_data, "mira_road_properties")
+        
+        if historical_data and args.incremental and real_historical_data:
+            historical_file = save_delta(historical_data, HISTORICAL_RATES, args.state, "mira_road_historical")
+            logger.info(f"Historical data saved to {historical_file}")
+        elif historical_data and args.format != "csv":
+            save_columnar(historical_data, HISTORICAL_COLUMNS, args.columnar_dir, args.format)
+        elif historical_data:
+            historical_file = save_to_csv(historical_data, "mira_road_historical")
+            logger.info(f"Historical data saved to {historical_file}")
     
     logger.info("✅ Data collection completed successfully")
+    selectors.flush()
+    report_from_args(args)
+    finish_profiling()
     return current_data
 
 
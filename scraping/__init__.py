@@ -0,0 +1,4 @@
+"""
+Shared infrastructure for the 99acres scrapers
+(scraper_mira_road, scrape_all_localities, scrape_properties_enhanced).
+"""
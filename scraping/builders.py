@@ -0,0 +1,157 @@
+"""
+Builder (developer) entity resolution.
+
+Listing cards name the builder inconsistently ("Lodha Group", "LODHA",
+"Lodha Developers Pvt. Ltd.") or not at all, in which case it has to be
+found in the title. ``BuilderIndex`` maps all of these to one canonical
+name so the builder table stays deduplicated:
+
+1. names are normalized once (case, punctuation, corporate suffixes such as
+   "group", "developers", "pvt ltd" dropped) and looked up exactly;
+2. near misses ("Hiranandni", "Shree Sai Developer") fall back to
+   character-trigram Dice similarity through an inverted trigram index, so
+   only builders sharing trigrams with the query are scored;
+3. results are memoized in a bounded LRU.
+
+Known builders and aliases come from ``scraping/builders.csv``; builders
+first seen on listings are added as they appear (``learn=True``). Learned
+builders are kept apart from the known ones and checked around the LRU
+rather than through it, so learning one does not throw the cache away.
+"""
+
+import csv
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Set
+
+DEFAULT_BUILDERS_FILE = os.path.join(os.path.dirname(__file__), "builders.csv")
+INDEPENDENT_BUILDER = "Independent Builder"
+
+CORPORATE_SUFFIXES = {
+    "group", "grp", "developers", "developer", "realty", "realtors", "properties", "property",
+    "builders", "builder", "constructions", "construction", "infra", "infrastructure", "housing",
+    "spaces", "lifespaces", "lifespace", "homes", "estates", "ltd", "limited", "pvt", "private",
+    "co", "company", "corp", "llp", "and", "the",
+}
+_NON_WORD_RE = re.compile(r"[^a-z0-9]+")
+MAX_TITLE_NGRAM = 3
+
+
+def normalize_builder(raw: str) -> str:
+    """Lowercased words without punctuation or corporate suffixes"""
+    words = _NON_WORD_RE.sub(" ", (raw or "").lower()).split()
+    core = [w for w in words if w not in CORPORATE_SUFFIXES]
+    return " ".join(core or words)
+
+
+def trigrams(key: str) -> Set[str]:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class BuilderIndex:
+    """Exact + trigram-fuzzy lookup of canonical builder names"""
+
+    def __init__(self, builders: Optional[Dict[str, List[str]]] = None, threshold: float = 0.7,
+                 cache_size: int = 8192):
+        self.threshold = threshold
+        self._canonical: Dict[str, str] = {}          # normalized key -> canonical name
+        self._learned: Dict[str, str] = {}            # same, for builders learned from listings
+        self._trigrams: Dict[str, Set[str]] = {}      # normalized key -> its trigrams
+        self._postings: Dict[str, Set[str]] = defaultdict(set)
+        self._learned_postings: Dict[str, Set[str]] = defaultdict(set)
+        self._lock = threading.Lock()
+        for name, aliases in (builders or {}).items():
+            self.add(name, aliases)
+        self._resolve_cached = lru_cache(maxsize=cache_size)(self._resolve)
+
+    @classmethod
+    def from_file(cls, path: str = DEFAULT_BUILDERS_FILE, **kwargs) -> "BuilderIndex":
+        builders = {}
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                builders[row["name"].strip()] = [a.strip() for a in (row.get("aliases") or "").split("|") if a.strip()]
+        return cls(builders, **kwargs)
+
+    def add(self, name: str, aliases: Iterable[str] = ()):
+        """Register a known builder; only before lookups start, as cached results are not revisited"""
+        self._add(name, aliases, self._canonical, self._postings)
+
+    def _add(self, name: str, aliases: Iterable[str], canonical: Dict[str, str], postings: Dict[str, Set[str]]):
+        with self._lock:
+            for raw in (name, *aliases):
+                key = normalize_builder(raw)
+                if not key or key in self._canonical or key in self._learned:
+                    continue
+                canonical[key] = name
+                grams = trigrams(key)
+                self._trigrams[key] = grams
+                for gram in grams:
+                    postings[gram].add(key)
+
+    @property
+    def names(self) -> Set[str]:
+        return set(self._canonical.values()) | set(self._learned.values())
+
+    def _fuzzy(self, key: str, canonical: Dict[str, str], postings: Dict[str, Set[str]]) -> Optional[str]:
+        grams = trigrams(key)
+        shared = Counter(k for gram in grams for k in postings.get(gram, ()))
+        best, best_score = None, self.threshold
+        for candidate, n in shared.items():
+            score = 2 * n / (len(grams) + len(self._trigrams[candidate]))
+            if score >= best_score:
+                best, best_score = candidate, score
+        return canonical[best] if best else None
+
+    def _resolve(self, key: str) -> Optional[str]:
+        return self._canonical.get(key) or self._fuzzy(key, self._canonical, self._postings)
+
+    def resolve(self, raw: str, learn: bool = False) -> Optional[str]:
+        """
+        Canonical name for a builder string. Unknown builders return None,
+        or with ``learn`` are registered under their own name so later
+        variants resolve to them.
+        """
+        key = normalize_builder(raw)
+        if not key:
+            return None
+        # Known builders go through the LRU; the learned ones are few and change
+        # as the crawl goes, so they are looked up around it
+        name = self._learned.get(key) or self._resolve_cached(key)
+        if name is None and self._learned:
+            name = self._fuzzy(key, self._learned, self._learned_postings)
+        if name is None and learn:
+            self._add(raw.strip(), (), self._learned, self._learned_postings)
+            name = raw.strip()
+        return name
+
+    def find_in_title(self, title: str) -> Optional[str]:
+        """First known builder named in a listing title (exact word n-grams only)"""
+        words = _NON_WORD_RE.sub(" ", (title or "").lower()).split()
+        for i in range(len(words)):
+            for n in range(MAX_TITLE_NGRAM, 0, -1):
+                if i + n <= len(words):
+                    ngram = " ".join(words[i:i + n])
+                    name = self._canonical.get(ngram) or self._learned.get(ngram)
+                    if name:
+                        return name
+        return None
+
+    def cache_info(self):
+        return self._resolve_cached.cache_info()
+
+
+_default_index: Optional[BuilderIndex] = None
+_default_lock = threading.Lock()
+
+
+def default_builder_index() -> BuilderIndex:
+    """Process-wide index over the bundled builder list"""
+    global _default_index
+    with _default_lock:
+        if _default_index is None:
+            _default_index = BuilderIndex.from_file()
+        return _default_index
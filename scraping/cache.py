@@ -0,0 +1,315 @@
+"""
+On-disk HTTP response cache shared by the 99acres scrapers.
+
+Bodies are stored gzip-compressed under their SHA-256 content hash, so
+identical pages are kept once; a SQLite index maps each URL to its current
+content hash plus validators (ETag / Last-Modified). Entries expire per
+URL-pattern TTL, stale entries are revalidated with conditional requests,
+and the least recently used entries are evicted once the cache exceeds its
+byte budget. In offline (replay) mode the cache never touches the network.
+"""
+
+import argparse
+import gzip
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Pattern, Tuple
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from scraping.metrics import default_metrics
+from scraping.profiling import stage
+from scraping.rate_limit import AdaptiveRateLimiter, throttled_get
+
+logger = logging.getLogger("ResponseCache")
+
+DEFAULT_CACHE_DIR = os.path.join("data", "http_cache")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# (pattern, ttl seconds) - first match wins
+DEFAULT_TTL_RULES: List[Tuple[str, int]] = [
+    (r"property-rates-and-price-trends-in-", 7 * 24 * 3600),  # locality rate/FAQ pages move slowly
+    (r"/property-in-.*-ffid", 12 * 3600),                      # listing pages churn daily
+]
+DEFAULT_TTL = 24 * 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    url TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    encoding TEXT,
+    content_type TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    fetched_at REAL NOT NULL,
+    last_access REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries (last_access);
+CREATE INDEX IF NOT EXISTS idx_entries_content_hash ON entries (content_hash);
+"""
+
+
+class CachedResponse:
+    """Minimal stand-in for ``requests.Response`` served from the cache"""
+
+    def __init__(self, url: str, status_code: int, content: bytes, headers: Optional[Dict[str, str]] = None,
+                 encoding: Optional[str] = None, from_cache: bool = True):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.headers = CaseInsensitiveDict(headers or {})
+        self.encoding = encoding
+        self.from_cache = from_cache
+
+    @property
+    def text(self) -> str:
+        # Same decoding requests applies for ``response.text``
+        try:
+            return str(self.content, self.encoding or "utf-8", errors="replace")
+        except LookupError:
+            return str(self.content, "utf-8", errors="replace")
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    def iter_content(self, chunk_size: int = 1, decode_unicode: bool = False):
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i:i + chunk_size]
+
+    def close(self):
+        pass
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} for url: {self.url}", response=self)
+
+
+class ResponseCache:
+    """Content-addressed, TTL-aware, LRU-bounded cache of GET responses"""
+
+    def __init__(
+        self,
+        root: str = DEFAULT_CACHE_DIR,
+        ttl_rules: Optional[List[Tuple[str, int]]] = None,
+        default_ttl: int = DEFAULT_TTL,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        offline: bool = False,
+    ):
+        self.root = root
+        self.blob_dir = os.path.join(root, "blobs")
+        self.ttl_rules: List[Tuple[Pattern, int]] = [
+            (re.compile(p), ttl) for p, ttl in (DEFAULT_TTL_RULES if ttl_rules is None else ttl_rules)
+        ]
+        self.default_ttl = default_ttl
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        os.makedirs(self.blob_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(root, "index.sqlite3"), check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.executescript(SCHEMA)
+
+    # -- index helpers --------------------------------------------------
+    def ttl_for(self, url: str) -> int:
+        for pattern, ttl in self.ttl_rules:
+            if pattern.search(url):
+                return ttl
+        return self.default_ttl
+
+    def _blob_path(self, content_hash: str) -> str:
+        return os.path.join(self.blob_dir, content_hash[:2], f"{content_hash}.gz")
+
+    def _entry(self, url: str) -> Optional[sqlite3.Row]:
+        with self._lock:
+            return self._db.execute("SELECT * FROM entries WHERE url = ?", (url,)).fetchone()
+
+    def _load(self, entry) -> Optional[CachedResponse]:
+        path = self._blob_path(entry["content_hash"])
+        try:
+            with gzip.open(path, "rb") as f:
+                content = f.read()
+        except OSError:
+            return None
+        with self._lock:
+            self._db.execute("UPDATE entries SET last_access = ? WHERE url = ?", (time.time(), entry["url"]))
+            self._db.commit()
+        headers = {"Content-Type": entry["content_type"] or ""}
+        if entry["etag"]:
+            headers["ETag"] = entry["etag"]
+        if entry["last_modified"]:
+            headers["Last-Modified"] = entry["last_modified"]
+        return CachedResponse(entry["url"], entry["status"], content, headers, entry["encoding"])
+
+    def is_fresh(self, entry) -> bool:
+        return time.time() - entry["fetched_at"] < self.ttl_for(entry["url"])
+
+    def has_fresh(self, url: str) -> bool:
+        """True when ``get`` would answer ``url`` without a network request"""
+        entry = self._entry(url)
+        return entry is not None and (self.offline or self.is_fresh(entry))
+
+    def urls(self, pattern: Optional[str] = None) -> List[str]:
+        """Cached URLs, optionally filtered by regex (used by replay runs)"""
+        with self._lock:
+            rows = self._db.execute("SELECT url FROM entries ORDER BY url").fetchall()
+        regex = re.compile(pattern) if pattern else None
+        return [r[0] for r in rows if not regex or regex.search(r[0])]
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    # -- mutation -------------------------------------------------------
+    def store(self, url: str, response) -> CachedResponse:
+        content = response.content
+        content_hash = hashlib.sha256(content).hexdigest()
+        path = self._blob_path(content_hash)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp, "wb", compresslevel=6) as f:
+                f.write(content)
+            os.replace(tmp, path)
+        # Resolve the encoding the same way response.text would
+        encoding = response.encoding or getattr(response, "apparent_encoding", None)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                """INSERT OR REPLACE INTO entries
+                   (url, content_hash, status, encoding, content_type, etag, last_modified, fetched_at, last_access, size)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (url, content_hash, response.status_code, encoding, response.headers.get("Content-Type"),
+                 response.headers.get("ETag"), response.headers.get("Last-Modified"), now, now, os.path.getsize(path)),
+            )
+            self._db.commit()
+        self.evict()
+        return CachedResponse(url, response.status_code, content, dict(response.headers), encoding, from_cache=False)
+
+    def refresh(self, url: str):
+        """Mark an entry as freshly validated (after a 304)"""
+        now = time.time()
+        with self._lock:
+            self._db.execute("UPDATE entries SET fetched_at = ?, last_access = ? WHERE url = ?", (now, now, url))
+            self._db.commit()
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits ``max_bytes``"""
+        with self._lock:
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            rows = self._db.execute("SELECT url, content_hash, size FROM entries ORDER BY last_access").fetchall()
+            for url, content_hash, size in rows:
+                if total <= self.max_bytes:
+                    break
+                self._db.execute("DELETE FROM entries WHERE url = ?", (url,))
+                total -= size
+                still_used = self._db.execute(
+                    "SELECT 1 FROM entries WHERE content_hash = ? LIMIT 1", (content_hash,)
+                ).fetchone()
+                if not still_used:
+                    try:
+                        os.remove(self._blob_path(content_hash))
+                    except OSError:
+                        pass
+                logger.debug(f"Evicted {url}")
+            self._db.commit()
+
+    # -- fetching -------------------------------------------------------
+    def get(self, session, url: str, limiter: Optional[AdaptiveRateLimiter] = None, **kwargs):
+        """
+        Serve ``url`` from the cache when fresh, revalidate when stale, and
+        fetch (through ``throttled_get``) on a miss. Offline mode answers a
+        miss with a 504, like an ``only-if-cached`` request. With
+        ``stream=True`` a miss comes back unread and is not stored; the
+        caller decides whether it read enough of the body to ``store`` it.
+        """
+        entry = self._entry(url)
+        if entry is not None and (self.offline or self.is_fresh(entry)):
+            cached = self._load(entry)
+            if cached is not None:
+                self.hits += 1
+                default_metrics().inc("cache_requests_total", result="hit")
+                return cached
+        if self.offline:
+            self.misses += 1
+            default_metrics().inc("cache_requests_total", result="miss")
+            logger.warning(f"Replay miss (not cached): {url}")
+            return CachedResponse(url, 504, b"", from_cache=True)
+
+        headers = dict(kwargs.pop("headers", None) or {})
+        if entry is not None:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+        if headers:
+            kwargs["headers"] = headers
+
+        response = throttled_get(session, url, limiter, **kwargs)
+        if response.status_code == 304 and entry is not None:
+            cached = self._load(entry)
+            if cached is not None:
+                self.refresh(url)
+                self.revalidated += 1
+                self.hits += 1
+                default_metrics().inc("cache_requests_total", result="revalidated")
+                return cached
+        self.misses += 1
+        default_metrics().inc("cache_requests_total", result="miss")
+        if response.status_code == 200 and not kwargs.get("stream"):
+            return self.store(url, response)
+        return response
+
+
+_active_cache: Optional[ResponseCache] = None
+
+
+def configure_cache(enabled: bool = True, **kwargs) -> Optional[ResponseCache]:
+    """Install the process-wide cache used by ``cached_get`` (``enabled=False`` bypasses it)"""
+    global _active_cache
+    _active_cache = ResponseCache(**kwargs) if enabled else None
+    return _active_cache
+
+
+def active_cache() -> Optional[ResponseCache]:
+    return _active_cache
+
+
+def cached_get(session, url: str, limiter: Optional[AdaptiveRateLimiter] = None, **kwargs):
+    """``throttled_get`` through the active cache, or straight through when none is configured"""
+    with stage("fetch"):
+        if _active_cache is None:
+            return throttled_get(session, url, limiter, **kwargs)
+        return _active_cache.get(session, url, limiter, **kwargs)
+
+
+def add_cache_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--replay", action="store_true", help="Parse cached pages only; never touch the network")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the on-disk response cache")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Response cache directory")
+    parser.add_argument("--cache-max-mb", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                        help="Evict least recently used pages beyond this size")
+
+
+def configure_cache_from_args(args: argparse.Namespace) -> Optional[ResponseCache]:
+    if args.no_cache and args.replay:
+        raise SystemExit("--replay needs the response cache; drop --no-cache")
+    return configure_cache(
+        enabled=not args.no_cache,
+        root=args.cache_dir,
+        max_bytes=args.cache_max_mb * 1024 * 1024,
+        offline=args.replay,
+    )
@@ -0,0 +1,156 @@
+"""
+Crawl checkpoints for resumable listing scrapes.
+
+Next to each NDJSON output file sits ``<output>.checkpoint``, an append-only
+log with one JSON line per event:
+
+    {"started": ..., ...run options}                          header
+    {"locality": ..., "page": ..., "offset": ..., ...}        page written
+    {"locality": ..., "finished": "<reason>"}                 locality done
+    {"swept": true, "offset": ...}                            removals written
+
+A page line is appended only after the page's records have been flushed,
+and records its end offset in the output. On resume the output is cut back
+to the last checkpointed offset (dropping a half-written page), finished
+localities are skipped and the rest continue after their last saved page.
+
+An incremental crawl commits each entry together with the listing state
+(``IncrementalStore.save_checkpoint``) before appending it here, so an entry
+a crash kept out of this log is put back from the store on resume
+(``restore``) instead of the page's deltas being cut off.
+"""
+
+import glob
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+from scraping.pagination import LocalityProgress
+
+CHECKPOINT_SUFFIX = ".checkpoint"
+
+
+def checkpoint_path(output_path: str) -> str:
+    return output_path + CHECKPOINT_SUFFIX
+
+
+def latest_checkpoint(pattern: str) -> Optional[str]:
+    """Output file of the most recent checkpoint matching ``pattern``, if any"""
+    paths = glob.glob(pattern + CHECKPOINT_SUFFIX)
+    if not paths:
+        return None
+    return max(paths, key=os.path.getmtime)[: -len(CHECKPOINT_SUFFIX)]
+
+
+class CrawlCheckpoint:
+    """Append-only record of completed (locality, page) pairs for one output file"""
+
+    def __init__(self, output_path: str):
+        self.path = checkpoint_path(output_path)
+        self.header: Dict = {}
+        self.pages: List[Dict] = []
+        self.finished: Dict[str, str] = {}
+        self.swept = False
+        self.offset = 0
+        self._f = None
+
+    @property
+    def started(self) -> Optional[float]:
+        return self.header.get("started")
+
+    def load(self) -> "CrawlCheckpoint":
+        if not os.path.exists(self.path):
+            return self
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break  # torn last line from a crash
+                self._add(entry)
+        return self
+
+    def _add(self, entry: Dict):
+        if "started" in entry:
+            self.header = entry
+        elif "finished" in entry:
+            self.finished[entry["locality"]] = entry["finished"]
+        else:
+            if "swept" in entry:
+                self.swept = True
+            else:
+                self.pages.append(entry)
+            self.offset = entry["offset"]
+
+    def open(self, **options):
+        """Start appending; writes the header when this is a fresh checkpoint"""
+        fresh = not self.header
+        if fresh:
+            self.header = {"started": time.time(), **options}
+        # Rewrite from the parsed entries so a torn trailing line is dropped;
+        # written aside and renamed so a crash mid-rewrite keeps the old log
+        self._f = open(self.path + ".tmp", "w", encoding="utf-8")
+        for entry in [self.header, *self.pages, *({"locality": l, "finished": r} for l, r in self.finished.items())]:
+            self._append(entry)
+        if self.swept:
+            self._append(self.sweep_entry(self.offset))
+        self._f.close()
+        os.replace(self.path + ".tmp", self.path)
+        self._f = open(self.path, "a", encoding="utf-8")
+        return self
+
+    def _append(self, entry: Dict):
+        self._f.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self._f.flush()
+
+    @staticmethod
+    def page_entry(locality: str, page: int, offset: int, **info) -> Dict:
+        return {"locality": locality, "page": page, "offset": offset, **info}
+
+    @staticmethod
+    def sweep_entry(offset: int) -> Dict:
+        return {"swept": True, "offset": offset}
+
+    def add(self, entry: Dict):
+        """Append a page or sweep entry"""
+        self._add(entry)
+        self._append(entry)
+
+    def page_done(self, locality: str, page: int, offset: int, **info):
+        self.add(self.page_entry(locality, page, offset, **info))
+
+    def restore(self, entry: Optional[Dict]) -> bool:
+        """Append an entry saved with the incremental store that is newer than this log; True if it was"""
+        if entry is None or entry["offset"] <= self.offset:
+            return False
+        self.add(entry)
+        return True
+
+    def locality_done(self, locality: str, reason: str):
+        if locality not in self.finished:
+            self.finished[locality] = reason
+            self._append({"locality": locality, "finished": reason})
+
+    def restore_progress(self) -> Dict[str, LocalityProgress]:
+        """Pagination state per locality as of the last checkpoint"""
+        restored: Dict[str, LocalityProgress] = {}
+        for entry in self.pages:
+            progress = restored.setdefault(entry["locality"], LocalityProgress())
+            page = entry["page"]
+            progress.scheduled = progress.fetched = progress.parsed = max(progress.parsed, page)
+            if page == 1:
+                progress.per_page = entry.get("records", 0)
+            if entry.get("last_page") is not None:
+                progress.last_page = entry["last_page"]
+            if entry.get("fingerprint"):
+                progress.fingerprints.add(entry["fingerprint"])
+        for locality, reason in self.finished.items():
+            progress = restored.setdefault(locality, LocalityProgress())
+            progress.finished = True
+            progress.reason = reason
+        return restored
+
+    def close(self):
+        if self._f is not None and not self._f.closed:
+            self._f.close()
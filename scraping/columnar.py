@@ -0,0 +1,224 @@
+"""
+Typed columnar export of scraper output (Parquet or Arrow IPC/Feather).
+
+Every run appends one file per source to a hive-partitioned dataset:
+
+    data/columnar/<dataset>/source=<source>/scrape_date=<YYYY-MM-DD>/part-<time>.parquet
+
+Columns have an explicit compact schema instead of pandas' object/float64
+defaults: repeated strings (zone, locality, source) are dictionary-encoded,
+rates are int32, percentages float32, and "NA"/"8.9%" style strings become
+null/8.9. Readers can then prune partitions and columns:
+
+    read_dataset("locality_trends", columns=["locality", "price_per_sqft"], sources=["99acres"])
+
+Requires ``pyarrow`` (``pip install pyarrow``); it is imported on first use
+so the scrapers still run without it when the columnar export is off.
+"""
+
+import glob
+import os
+import re
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_COLUMNAR_DIR = os.path.join("data", "columnar")
+FORMATS = ("parquet", "arrow")
+
+_PERCENT_RE = re.compile(r"^\s*([-+]?\d+(?:\.\d+)?)\s*%?\s*$")
+
+
+@dataclass(frozen=True)
+class Column:
+    name: str
+    kind: str                       # category | int16 | int32 | float32 | percent | date | string
+    aliases: Tuple[str, ...] = ()   # other record keys holding the same value
+
+
+@dataclass(frozen=True)
+class ColumnarDataset:
+    name: str
+    columns: Tuple[Column, ...]
+    source_fields: Tuple[str, ...] = ("source", "data_source")   # first present one picks the partition
+
+
+LOCALITY_TRENDS = ColumnarDataset("locality_trends", (
+    Column("town", "category"),
+    Column("locality", "category"),
+    Column("year", "int16"),
+    Column("price_per_sqft", "int32"),
+    Column("appreciation", "percent"),
+    Column("rental_yield", "percent"),
+    Column("current_rate", "int32"),
+))
+LOCALITY_RATES = ColumnarDataset("locality_rates", (
+    Column("area_name", "category"),
+    Column("zone", "category"),
+    Column("property_type", "category"),
+    Column("rate_per_sqft", "int32"),
+    Column("appreciation_5yr", "percent"),
+    Column("rental_yield", "percent"),
+))
+HISTORICAL_RATES = ColumnarDataset("historical_rates", (
+    Column("locality", "category", ("area_name",)),
+    Column("zone", "category"),
+    Column("year", "int16"),
+    Column("date", "date"),
+    Column("price_per_sqft", "int32", ("rate_per_sqft",)),
+))
+DATASETS = {d.name: d for d in (LOCALITY_TRENDS, LOCALITY_RATES, HISTORICAL_RATES)}
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset  # noqa: F401
+        import pyarrow.feather  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError as e:
+        raise ImportError("Columnar export needs pyarrow: pip install pyarrow") from e
+    return pyarrow
+
+
+def _arrow_type(pa, kind: str):
+    return {
+        "category": pa.dictionary(pa.int32(), pa.string()),
+        "int16": pa.int16(),
+        "int32": pa.int32(),
+        "float32": pa.float32(),
+        "percent": pa.float32(),
+        "date": pa.date32(),
+        "string": pa.string(),
+    }[kind]
+
+
+def schema(dataset: ColumnarDataset):
+    pa = _pyarrow()
+    return pa.schema([pa.field(c.name, _arrow_type(pa, c.kind)) for c in dataset.columns])
+
+
+def _is_missing(value: Any) -> bool:
+    # NaN != NaN: pandas hands missing floats over as NaN
+    return value is None or value != value or (isinstance(value, str) and value.strip().upper() in ("", "NA", "N/A"))
+
+
+def normalize(value: Any, kind: str) -> Any:
+    """Coerce one scraped value to the column's Python type; None when missing or unparseable"""
+    if _is_missing(value):
+        return None
+    try:
+        if kind in ("int16", "int32"):
+            return int(float(str(value).replace(",", "")))
+        if kind in ("float32", "percent"):
+            if isinstance(value, str):
+                m = _PERCENT_RE.match(value)
+                return float(m.group(1)) if m else None
+            return float(value)
+        if kind == "date":
+            if isinstance(value, datetime):
+                return value.date()
+            if isinstance(value, date):
+                return value
+            return date.fromisoformat(str(value)[:10])
+    except (TypeError, ValueError):
+        return None
+    return str(value)
+
+
+def _value(record: Dict, column: Column) -> Any:
+    for key in (column.name, *column.aliases):
+        if key in record:
+            return record[key]
+    return None
+
+
+def to_table(records: List[Dict], dataset: ColumnarDataset):
+    """Build an Arrow table with the dataset's schema from scraper records"""
+    pa = _pyarrow()
+    arrays = []
+    for column in dataset.columns:
+        values = [normalize(_value(r, column), column.kind) for r in records]
+        if column.kind == "category":
+            arrays.append(pa.array(values, type=pa.string()).dictionary_encode())
+        else:
+            arrays.append(pa.array(values, type=_arrow_type(pa, column.kind)))
+    return pa.Table.from_arrays(arrays, schema=schema(dataset))
+
+
+def write_dataset(
+    records: Iterable[Dict],
+    dataset: ColumnarDataset,
+    root: str = DEFAULT_COLUMNAR_DIR,
+    default_source: str = "unknown",
+    scraped_at: Optional[datetime] = None,
+    fmt: str = "parquet",
+) -> List[str]:
+    """Append ``records`` as one file per source partition; returns the written paths"""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown columnar format {fmt!r}; expected one of {FORMATS}")
+    pa = _pyarrow()
+    scraped_at = scraped_at or datetime.now()
+
+    by_source: Dict[str, List[Dict]] = {}
+    for record in records:
+        source = next((record[f] for f in dataset.source_fields if record.get(f)), default_source)
+        by_source.setdefault(str(source), []).append(record)
+
+    paths = []
+    for source, rows in by_source.items():
+        directory = os.path.join(
+            root, dataset.name, f"source={source}", f"scrape_date={scraped_at.date().isoformat()}",
+        )
+        os.makedirs(directory, exist_ok=True)
+        table = to_table(rows, dataset)
+        stem = os.path.join(directory, f"part-{scraped_at.strftime('%H%M%S%f')}")
+        if fmt == "parquet":
+            path = stem + ".parquet"
+            pa.parquet.write_table(table, path, compression="zstd")
+        else:
+            path = stem + ".arrow"
+            pa.feather.write_feather(table, path, compression="zstd")
+        paths.append(path)
+    return paths
+
+
+def read_dataset(
+    name: str,
+    root: str = DEFAULT_COLUMNAR_DIR,
+    columns: Optional[List[str]] = None,
+    sources: Optional[List[str]] = None,
+    since: Optional[str] = None,
+    fmt: str = "parquet",
+):
+    """
+    Load a dataset as an Arrow table, reading only ``columns`` and the
+    partitions matching ``sources`` / ``scrape_date >= since`` (YYYY-MM-DD).
+    """
+    pa = _pyarrow()
+    base = os.path.join(root, name)
+    files = sorted(glob.glob(os.path.join(base, "**", f"*.{fmt}"), recursive=True))
+    if not files:
+        raise FileNotFoundError(f"No {fmt} files under {base}")
+    ds = pa.dataset.dataset(
+        files,
+        format="parquet" if fmt == "parquet" else "ipc",
+        partition_base_dir=base,
+        partitioning=pa.dataset.partitioning(
+            pa.schema([("source", pa.string()), ("scrape_date", pa.string())]), flavor="hive",
+        ),
+    )
+    flt = None
+    if sources:
+        flt = pa.dataset.field("source").isin(sources)
+    if since:
+        cond = pa.dataset.field("scrape_date") >= since
+        flt = cond if flt is None else flt & cond
+    return ds.to_table(columns=columns, filter=flt)
+
+
+def add_columnar_arguments(parser):
+    group = parser.add_argument_group("columnar export")
+    group.add_argument("--format", choices=("csv",) + FORMATS, default="csv",
+                       help="Output format: legacy CSV or a typed, partitioned columnar dataset")
+    group.add_argument("--columnar-dir", default=DEFAULT_COLUMNAR_DIR, help="Root of the columnar datasets")
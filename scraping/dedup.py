@@ -0,0 +1,141 @@
+"""
+Streaming de-duplication of listings across result pages.
+
+The same listing turns up on several result pages of a locality as the
+results shift between requests. Each record gets a fingerprint of its
+normalized title, price, area, image URL and ``location``; repeats are
+dropped as they arrive, before they are written or counted.
+
+``location`` is the locality that was crawled, and a listing also shown
+under a neighbouring locality (``mira-road-east-mumbai`` and
+``mira-road-west-mumbai``) is kept under each. Merging those would keep
+whichever copy the pipeline happened to finish first, so the surviving
+``location`` would change from run to run, and with it the listing's key
+in the incremental store (``incremental.PROPERTIES``).
+
+Two set implementations:
+
+    exact   64-bit fingerprints in a set; no false drops in practice
+    bloom   a fixed-size Bloom filter for very large crawls: memory set by
+            ``capacity`` and ``error_rate`` up front, at the cost of that
+            fraction of unique listings being dropped as "seen"
+"""
+
+import argparse
+import hashlib
+import math
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+from scraping.localities import normalize_name
+from scraping.metrics import default_metrics
+
+DEDUP_MODES = ("exact", "bloom", "off")
+DEFAULT_CAPACITY = 1_000_000
+DEFAULT_ERROR_RATE = 0.001
+PLACEHOLDER_IMAGE_HOSTS = ("via.placeholder.com",)
+
+
+def _number(value) -> str:
+    try:
+        return str(int(float(value)))
+    except (TypeError, ValueError):
+        return ""
+
+
+def _image_key(url: Optional[str]) -> str:
+    """Host and path of a real photo URL (size/query variants collapse), '' for none or a placeholder"""
+    if not url:
+        return ""
+    parts = urlsplit(str(url).strip())
+    host = parts.netloc.lower()
+    if not host or host in PLACEHOLDER_IMAGE_HOSTS:
+        return ""
+    return host + parts.path
+
+
+def listing_fingerprint(record: Dict) -> bytes:
+    """16-byte digest of a listing's normalized identity fields"""
+    image = _image_key(record.get("image_url"))
+    fields = (
+        normalize_name(record.get("title") or ""),
+        _number(record.get("price")),
+        _number(record.get("sqft")),
+        image,
+        normalize_name(record.get("location") or ""),
+    )
+    return hashlib.blake2b("\x1f".join(fields).encode("utf-8"), digest_size=16).digest()
+
+
+class BloomFilter:
+    """Bit array sized for ``capacity`` items at ``error_rate`` false positives; k bits per item by double hashing"""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, error_rate: float = DEFAULT_ERROR_RATE):
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def add(self, digest: bytes) -> bool:
+        """Set the digest's bits; True if they were all set already (probably seen)"""
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:16], "little") | 1
+        bits, size = self.bits, self.size
+        present = True
+        for i in range(self.hashes):
+            n = (h1 + i * h2) % size
+            mask = 1 << (n & 7)
+            if not bits[n >> 3] & mask:
+                present = False
+                bits[n >> 3] |= mask
+        return present
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.bits)
+
+
+class ListingDeduper:
+    """``seen(record)`` is True for a repeat of a listing already passed through"""
+
+    def __init__(self, mode: str = "exact", capacity: int = DEFAULT_CAPACITY, error_rate: float = DEFAULT_ERROR_RATE):
+        if mode not in ("exact", "bloom"):
+            raise ValueError(f"Unknown dedup mode {mode!r}")
+        self.mode = mode
+        self._exact = set() if mode == "exact" else None
+        self._bloom = BloomFilter(capacity, error_rate) if mode == "bloom" else None
+        self.kept = 0
+        self.dropped = 0
+
+    def seen(self, record: Dict) -> bool:
+        digest = listing_fingerprint(record)
+        if self._bloom is not None:
+            repeat = self._bloom.add(digest)
+        else:
+            key = int.from_bytes(digest[:8], "little")
+            repeat = key in self._exact
+            if not repeat:
+                self._exact.add(key)
+        if repeat:
+            self.dropped += 1
+            default_metrics().inc("duplicates_dropped_total", dataset="properties")
+        else:
+            self.kept += 1
+        return repeat
+
+    def summary(self) -> str:
+        return f"{self.dropped} duplicates dropped, {self.kept} unique ({self.mode})"
+
+
+def add_dedup_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--dedup", choices=DEDUP_MODES, default="exact",
+                        help="Drop listings already seen this run: exact fingerprint set, Bloom filter, or off")
+    parser.add_argument("--dedup-capacity", type=int, default=DEFAULT_CAPACITY,
+                        help="Listings the --dedup bloom filter is sized for")
+    parser.add_argument("--dedup-error-rate", type=float, default=DEFAULT_ERROR_RATE,
+                        help="Share of unique listings --dedup bloom may drop at capacity")
+
+
+def deduper_from_args(args: argparse.Namespace) -> Optional[ListingDeduper]:
+    if args.dedup == "off":
+        return None
+    return ListingDeduper(args.dedup, args.dedup_capacity, args.dedup_error_rate)
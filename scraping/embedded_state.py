@@ -0,0 +1,190 @@
+"""
+Extraction of the JSON state 99acres embeds in its pages.
+
+Pages carry either a Next.js ``<script id="__NEXT_DATA__">`` blob or a
+``window.reactInitialState = {...}`` assignment (see inspect_99acres_raw).
+The blob is located with plain substring scans bounded to ``max_scan``
+characters and decoded with a single ``raw_decode`` call, so no regex ever
+runs over the page. Locality rates are read only from known key paths: an
+alias search over the whole state can land on a listing card, whose price
+per sq.ft would silently replace the locality's rate. Listing arrays are
+still found by an alias search (``find_record_list``). Callers fall back to
+the DOM/regex parsers when nothing is found.
+"""
+
+import json
+import logging
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from scraping.rates import LocalityRates
+
+logger = logging.getLogger("EmbeddedState")
+
+MAX_SCAN = 4 * 1024 * 1024
+NEXT_DATA_MARKER = '<script id="__NEXT_DATA__"'
+REACT_STATE_MARKER = 'window.reactInitialState'
+SCRIPT_END = '</script>'
+
+_decoder = json.JSONDecoder()
+
+# Known locations of the locality overview in page state, most specific first.
+# Only these are read; check a new entry against a page saved with
+# inspect_99acres_raw before adding it
+LOCALITY_OVERVIEW_PATHS: List[Tuple[str, ...]] = [
+    ("props", "pageProps", "localityOverview"),
+    ("props", "pageProps", "pageData", "localityOverview"),
+    ("props", "pageProps", "priceTrends"),
+    ("localityOverview",),
+    ("priceTrends",),
+]
+# Known locations of the rates page's locality list, same rules
+RATE_LIST_PATHS: List[Tuple[str, ...]] = [
+    ("props", "pageProps", "localityRates"),
+    ("props", "pageProps", "pageData", "localityRates"),
+    ("localityRates",),
+]
+RATE_KEYS = ("avgPricePerSqft", "averagePricePerSqft", "avgRate", "currentRate", "pricePerSqft")
+YIELD_KEYS = ("rentalYield", "avgRentalYield", "rental_yield")
+CHANGE_KEYS = {
+    1: ("priceChange1Y", "change1Y", "oneYearChange", "yoyChange"),
+    3: ("priceChange3Y", "change3Y", "threeYearChange"),
+    5: ("priceChange5Y", "change5Y", "fiveYearChange"),
+}
+
+
+def extract_embedded_state(html: Union[str, bytes], max_scan: int = MAX_SCAN) -> Optional[Dict]:
+    """Return the decoded ``__NEXT_DATA__`` / ``reactInitialState`` object, or None"""
+    if isinstance(html, bytes):
+        html = _decode_window(html, max_scan)
+        if html is None:
+            return None
+
+    idx = html.find(NEXT_DATA_MARKER, 0, max_scan)
+    if idx != -1:
+        start = html.find('>', idx) + 1
+        end = html.find(SCRIPT_END, start)
+        if start and end != -1:
+            try:
+                return json.loads(html[start:end])
+            except ValueError as e:
+                logger.debug(f"Bad __NEXT_DATA__ JSON: {e}")
+
+    idx = html.find(REACT_STATE_MARKER, 0, max_scan)
+    if idx != -1:
+        start = html.find('{', idx + len(REACT_STATE_MARKER))
+        if start != -1:
+            try:
+                state, _ = _decoder.raw_decode(html, start)
+                return state if isinstance(state, dict) else None
+            except ValueError as e:
+                logger.debug(f"Bad reactInitialState JSON: {e}")
+    return None
+
+
+def _decode_window(content: bytes, max_scan: int) -> Optional[str]:
+    """Decode just the part of a raw body that holds the state blob"""
+    for marker in (NEXT_DATA_MARKER.encode(), REACT_STATE_MARKER.encode()):
+        idx = content.find(marker, 0, max_scan)
+        if idx != -1:
+            end = content.find(SCRIPT_END.encode(), idx)
+            return content[idx:end + len(SCRIPT_END) if end != -1 else len(content)].decode("utf-8", errors="replace")
+    return None
+
+
+def dig(data: Any, path: Sequence[str]) -> Any:
+    """Follow ``path`` through nested dicts; None when any step is missing"""
+    for key in path:
+        if not isinstance(data, dict):
+            return None
+        data = data.get(key)
+    return data
+
+
+def dig_first(data: Any, paths: Iterable[Sequence[str]], accept: Callable[[Any], bool]) -> Any:
+    """Value at the first of ``paths`` that ``accept`` takes; None when none does"""
+    for path in paths:
+        candidate = dig(data, path)
+        if candidate is not None and accept(candidate):
+            return candidate
+    return None
+
+
+def first_value(record: Dict, keys: Iterable[str]) -> Any:
+    """First non-empty value among ``keys`` in ``record``"""
+    for key in keys:
+        value = record.get(key)
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def iter_nodes(data: Any, max_nodes: int = 50000):
+    """Breadth-first walk over every dict/list in ``data`` (bounded)"""
+    queue = deque([data])
+    seen = 0
+    while queue and seen < max_nodes:
+        node = queue.popleft()
+        seen += 1
+        if isinstance(node, dict):
+            yield node
+            queue.extend(v for v in node.values() if isinstance(v, (dict, list)))
+        elif isinstance(node, list):
+            yield node
+            queue.extend(v for v in node if isinstance(v, (dict, list)))
+
+
+def find_dict_with(data: Any, keys: Iterable[str]) -> Optional[Dict]:
+    """Shallowest dict holding any of ``keys``"""
+    keys = tuple(keys)
+    for node in iter_nodes(data):
+        if isinstance(node, dict) and any(k in node for k in keys):
+            return node
+    return None
+
+
+def find_record_list(data: Any, required: Sequence[Iterable[str]], min_len: int = 1) -> Optional[List[Dict]]:
+    """
+    Shallowest list of dicts whose first item has at least one key from
+    each alias group in ``required`` (e.g. a listing array with price and area).
+    """
+    groups = [tuple(g) for g in required]
+    for node in iter_nodes(data):
+        if isinstance(node, list) and len(node) >= min_len and isinstance(node[0], dict):
+            if all(any(k in node[0] for k in group) for group in groups):
+                return [item for item in node if isinstance(item, dict)]
+    return None
+
+
+def _number(value: Any) -> Optional[float]:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, str):
+        cleaned = value.replace(",", "").replace("%", "").replace("₹", "").strip()
+        try:
+            return float(cleaned)
+        except ValueError:
+            return None
+    return None
+
+
+def locality_rates_from_state(state: Optional[Dict]) -> Optional[LocalityRates]:
+    """Map a page state to ``LocalityRates``; None when no current rate is present"""
+    if not state:
+        return None
+    overview = dig_first(state, LOCALITY_OVERVIEW_PATHS,
+                         lambda node: isinstance(node, dict) and first_value(node, RATE_KEYS) is not None)
+    if overview is None:
+        return None
+
+    rate = _number(first_value(overview, RATE_KEYS))
+    if not rate:
+        return None
+    return LocalityRates(
+        current_rate=int(rate),
+        rental_yield=_number(first_value(overview, YIELD_KEYS)),
+        change_1y=_number(first_value(overview, CHANGE_KEYS[1])),
+        change_3y=_number(first_value(overview, CHANGE_KEYS[3])),
+        change_5y=_number(first_value(overview, CHANGE_KEYS[5])),
+        source="embedded_json",
+    )
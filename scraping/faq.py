@@ -0,0 +1,110 @@
+"""
+Single-pass scanner for the 99acres locality FAQ sentences.
+
+The locality pages state the current rate, rental yield and 1/3/5-year
+price movement in FAQ answers such as:
+
+    "... average flat rates in Mira Road is ₹ 16,450 per sq ft ..."
+    "... average rental yield in Mira Road is 4 % ..."
+    "... have moved: 5.3 % since 1 year 15.2 % since 3 year 25.1 % since 5 year"
+
+The FAQ region is located once with plain substring searches for the
+sentence lead-ins; one compiled alternation then walks just that region and
+stops as soon as all three sentences have been seen. Every gap is bounded
+and stays on one line, so a page full of near-misses cannot trigger the
+runaway backtracking of an unanchored ``.*?`` search.
+"""
+
+import re
+from typing import Union
+
+from scraping.rates import LocalityRates
+
+_NUM = r"[-+]?\d+(?:\.\d+)?"
+_GAP = r"[^\n]{0,300}?"
+
+FAQ_RE = re.compile(
+    rf"average flat rates in {_GAP} is ₹ (?P<rate>[\d,]+) per sq ft"
+    rf"|average rental yield in {_GAP} is (?P<yield>{_NUM})\s*%"
+    rf"|moved:\s*(?P<p1>{_NUM})\s*%\s*since\s*1\s*year\s*"
+    rf"(?P<p3>{_NUM})\s*%\s*since\s*3\s*year\s*"
+    rf"(?P<p5>{_NUM})\s*%\s*since\s*5\s*year",
+    re.IGNORECASE,
+)
+FAQ_ANCHORS = ("average flat rates in", "average rental yield in", "moved:")
+
+
+def find_faq_region(html: str) -> int:
+    """Offset of the first FAQ lead-in, or -1 when the page has none"""
+    lowered = html.lower()
+    if len(lowered) != len(html):
+        # Case mapping changed the length, so offsets would not line up
+        return 0
+    hits = [i for i in (lowered.find(anchor) for anchor in FAQ_ANCHORS) if i != -1]
+    return min(hits) if hits else -1
+
+
+def _take(rates: LocalityRates, m: "re.Match") -> bool:
+    """Fill the first value of each sentence kind; True once all three are known"""
+    if m.group("rate") is not None:
+        if rates.current_rate is None:
+            rates.current_rate = int(m.group("rate").replace(",", ""))
+    elif m.group("yield") is not None:
+        if rates.rental_yield is None:
+            rates.rental_yield = float(m.group("yield"))
+    elif not rates.has_trend:
+        rates.change_1y = float(m.group("p1"))
+        rates.change_3y = float(m.group("p3"))
+        rates.change_5y = float(m.group("p5"))
+    return rates.current_rate is not None and rates.rental_yield is not None and rates.has_trend
+
+
+def scan_faq(html: Union[str, bytes]) -> LocalityRates:
+    """Extract rate, rental yield and 1/3/5-year movement in one pass over ``html``"""
+    if isinstance(html, bytes):
+        html = html.decode("utf-8", errors="replace")
+    rates = LocalityRates(source="faq")
+    start = find_faq_region(html)
+    if start == -1:
+        return rates
+    for m in FAQ_RE.finditer(html, start):
+        if _take(rates, m):
+            break
+    return rates
+
+
+class FaqScanner:
+    """
+    ``scan_faq`` over a page that arrives in pieces. ``feed(chunk)`` scans
+    the chunk together with the last ``OVERLAP`` characters before it, so a
+    sentence cut by a chunk boundary is matched whole once its end arrives;
+    nothing else of the page is kept. Every sentence ends in literal text
+    (``per sq ft``, ``%``, ``year``), so a cut one never matches early with a
+    truncated number, and one seen again in the overlap changes nothing.
+    """
+
+    OVERLAP = 1024
+
+    def __init__(self):
+        self.rates = LocalityRates(source="faq")
+        self.complete = False
+        self._in_region = False
+        self._tail = ""
+
+    def feed(self, chunk: str) -> bool:
+        """Scan the next piece of text; True once rate, yield and trend have all been seen"""
+        if self.complete:
+            return True
+        text = self._tail + chunk
+        self._tail = text[-self.OVERLAP:]
+        start = 0
+        if not self._in_region:
+            start = find_faq_region(text)
+            if start == -1:
+                return False
+            self._in_region = True
+        for m in FAQ_RE.finditer(text, start):
+            if _take(self.rates, m):
+                self.complete = True
+                break
+        return self.complete
@@ -0,0 +1,148 @@
+"""
+Concurrent fetch engine for the 99acres scrapers.
+
+Runs the blocking ``requests`` calls on a thread pool under asyncio so many
+pages can be in flight at once. Each worker thread gets its own session from
+the scraper's ``create_session`` so retry and header configuration is kept.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+
+from scraping.cache import active_cache, cached_get
+from scraping.rate_limit import AdaptiveRateLimiter, shared_limiter
+from scraping.streaming import DEFAULT_BYTE_BUDGET, PageScanner, stream_scan
+
+logger = logging.getLogger("FetchEngine")
+
+
+@dataclass
+class FetchResult:
+    """
+    Outcome of a single GET; ``text`` is the decoded body as ``response.text``
+    returns it, or, for a streamed fetch, ``value`` is the scanner's result
+    """
+    url: str
+    status: Optional[int] = None
+    text: Optional[str] = None
+    error: Optional[str] = None
+    elapsed: float = 0.0
+    value: Any = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status == 200 and (self.text is not None or self.value is not None)
+
+
+class PolitenessBudget:
+    """
+    Global spacing between request starts, shared across every host.
+    ``requests_per_second=None`` disables the budget.
+    """
+
+    def __init__(self, requests_per_second: Optional[float] = None):
+        self.interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class AsyncFetcher:
+    """
+    Fetch many URLs concurrently with at most ``per_host_limit`` requests in
+    flight per host and ``max_concurrency`` overall. Every request is also
+    paced by the adaptive per-host ``limiter``. With a ``scanner_factory``
+    bodies are streamed through a fresh scanner each and read only until it
+    is done or ``max_bytes`` are in (see ``scraping.streaming``).
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], requests.Session],
+        per_host_limit: int = 4,
+        max_concurrency: int = 16,
+        requests_per_second: Optional[float] = None,
+        timeout: float = 10,
+        limiter: Optional[AdaptiveRateLimiter] = None,
+        scanner_factory: Optional[Callable[[], PageScanner]] = None,
+        max_bytes: int = DEFAULT_BYTE_BUDGET,
+    ):
+        self.session_factory = session_factory
+        self.per_host_limit = max(1, per_host_limit)
+        self.max_concurrency = max(1, max_concurrency)
+        self.requests_per_second = requests_per_second
+        self.timeout = timeout
+        self.limiter = limiter or shared_limiter()
+        self.scanner_factory = scanner_factory
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._budget: Optional[PolitenessBudget] = None
+
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self.session_factory()
+            self._local.session = session
+        return session
+
+    def _get(self, url: str) -> FetchResult:
+        start = time.monotonic()
+        try:
+            if self.scanner_factory is not None:
+                r = stream_scan(self._session(), url, self.scanner_factory(), self.limiter,
+                                max_bytes=self.max_bytes, timeout=self.timeout)
+                return FetchResult(url, status=r.status_code, value=r.value, elapsed=time.monotonic() - start)
+            r = cached_get(self._session(), url, self.limiter, timeout=self.timeout)
+            return FetchResult(url, status=r.status_code, text=r.text, elapsed=time.monotonic() - start)
+        except Exception as e:
+            return FetchResult(url, error=str(e), elapsed=time.monotonic() - start)
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        if host not in self._host_semaphores:
+            self._host_semaphores[host] = asyncio.Semaphore(self.per_host_limit)
+        return self._host_semaphores[host]
+
+    async def fetch(self, url: str) -> FetchResult:
+        async with self._host_semaphore(url):
+            cache = active_cache()
+            if cache is None or not cache.has_fresh(url):
+                await self._budget.acquire()
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self._get, url)
+
+    async def fetch_all(self, urls: List[str]) -> List[FetchResult]:
+        """Fetch every URL; results come back in the same order as ``urls``"""
+        self._budget = PolitenessBudget(self.requests_per_second)
+        self._host_semaphores = {}
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            self._executor = executor
+            try:
+                return await asyncio.gather(*(self.fetch(url) for url in urls))
+            finally:
+                self._executor = None
+
+
+def fetch_all(urls: List[str], session_factory: Callable[[], requests.Session], **kwargs) -> List[FetchResult]:
+    """Synchronous entry point: run an ``AsyncFetcher`` over ``urls`` to completion"""
+    fetcher = AsyncFetcher(session_factory, **kwargs)
+    return asyncio.run(fetcher.fetch_all(urls))
@@ -0,0 +1,242 @@
+"""
+Consolidated historical price store.
+
+All locality price points live in one SQLite file instead of a growing set
+of timestamped CSVs with differing columns. The schema is normalized:
+
+    localities(id, name, zone, town)
+    sources(id, name)
+    price_points(locality_id, period, source_id, price_per_sqft,
+                 appreciation, rental_yield, updated_at)
+
+``price_points`` is keyed on (locality_id, period, source_id), so a point
+scraped again replaces the old value instead of adding a duplicate row, and
+"history for locality X" is an index seek. ``period`` is "YYYY" for yearly
+points and "YYYY-MM-DD" for dated ones, so both sort chronologically.
+
+Import the existing CSV snapshots once with:
+
+    python -m scraping.history compact            # data/*historical*.csv + comprehensive CSV
+    python -m scraping.history show "Mira Road"
+"""
+
+import argparse
+import csv
+import glob
+import logging
+import os
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Optional
+
+from scraping.columnar import normalize
+
+logger = logging.getLogger("HistoryStore")
+
+DEFAULT_HISTORY_PATH = os.path.join("data", "price_history.sqlite")
+DEFAULT_IMPORT_PATTERNS = [
+    os.path.join("data", "mira_road_historical_*.csv"),
+    os.path.join("data", "mira_road_historical_trends.csv"),
+    os.path.join("data", "mira_bhayandar_comprehensive.csv"),
+]
+
+# Record keys that hold each normalized field, across the scrapers' CSV layouts
+LOCALITY_KEYS = ("locality", "area_name")
+PRICE_KEYS = ("price_per_sqft", "rate_per_sqft")
+SOURCE_KEYS = ("source", "data_source")
+PERIOD_KEYS = ("date", "year")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS localities (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    zone TEXT,
+    town TEXT
+);
+CREATE TABLE IF NOT EXISTS sources (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS price_points (
+    locality_id INTEGER NOT NULL REFERENCES localities (id),
+    period TEXT NOT NULL,
+    source_id INTEGER NOT NULL REFERENCES sources (id),
+    price_per_sqft INTEGER NOT NULL,
+    appreciation REAL,
+    rental_yield REAL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (locality_id, period, source_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_price_points_source_period ON price_points (source_id, period);
+"""
+
+
+def _first(record: Dict, keys) -> Optional[str]:
+    for key in keys:
+        value = record.get(key)
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def normalize_point(record: Dict, default_source: str = "unknown") -> Optional[Dict]:
+    """Map one scraper/CSV row onto the store's columns; None if it has no locality, period or price"""
+    locality = _first(record, LOCALITY_KEYS)
+    price = normalize(_first(record, PRICE_KEYS), "int32")
+    period = _first(record, PERIOD_KEYS)
+    if not locality or not price or period is None:
+        return None
+    period = str(period).strip()
+    if period.replace(".", "", 1).isdigit():
+        period = str(int(float(period)))   # 2024 / "2024.0" -> "2024"
+    else:
+        period = period[:10]
+    return {
+        "locality": str(locality).strip(),
+        "zone": normalize(record.get("zone"), "string"),
+        "town": normalize(record.get("town"), "string"),
+        "period": period,
+        "source": str(_first(record, SOURCE_KEYS) or default_source),
+        "price_per_sqft": price,
+        "appreciation": normalize(_first(record, ("appreciation", "appreciation_5yr")), "percent"),
+        "rental_yield": normalize(record.get("rental_yield"), "percent"),
+    }
+
+
+class HistoryStore:
+    """SQLite store of locality price points with upsert-on-key semantics"""
+
+    def __init__(self, path: str = DEFAULT_HISTORY_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path)
+        self._db.row_factory = sqlite3.Row
+        self._db.executescript(SCHEMA)
+        self._locality_ids: Dict[str, int] = {}
+        self._source_ids: Dict[str, int] = {}
+
+    def _locality_id(self, point: Dict) -> int:
+        name = point["locality"]
+        if name not in self._locality_ids:
+            self._db.execute(
+                "INSERT INTO localities (name, zone, town) VALUES (?, ?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET zone = COALESCE(excluded.zone, zone), "
+                "town = COALESCE(excluded.town, town)",
+                (name, point["zone"], point["town"]),
+            )
+            self._locality_ids[name] = self._db.execute(
+                "SELECT id FROM localities WHERE name = ?", (name,)
+            ).fetchone()[0]
+        return self._locality_ids[name]
+
+    def _source_id(self, name: str) -> int:
+        if name not in self._source_ids:
+            self._db.execute("INSERT OR IGNORE INTO sources (name) VALUES (?)", (name,))
+            self._source_ids[name] = self._db.execute(
+                "SELECT id FROM sources WHERE name = ?", (name,)
+            ).fetchone()[0]
+        return self._source_ids[name]
+
+    def upsert(self, records: Iterable[Dict], default_source: str = "unknown") -> int:
+        """Insert or replace price points in one transaction; returns how many rows were accepted"""
+        now = time.time()
+        rows = []
+        for record in records:
+            point = normalize_point(record, default_source)
+            if point is None:
+                continue
+            rows.append((
+                self._locality_id(point), point["period"], self._source_id(point["source"]),
+                point["price_per_sqft"], point["appreciation"], point["rental_yield"], now,
+            ))
+        with self._db:
+            self._db.executemany(
+                "INSERT INTO price_points (locality_id, period, source_id, price_per_sqft, "
+                "appreciation, rental_yield, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (locality_id, period, source_id) DO UPDATE SET "
+                "price_per_sqft = excluded.price_per_sqft, "
+                "appreciation = COALESCE(excluded.appreciation, appreciation), "
+                "rental_yield = COALESCE(excluded.rental_yield, rental_yield), "
+                "updated_at = excluded.updated_at",
+                rows,
+            )
+        return len(rows)
+
+    def price_history(self, locality: str, source: Optional[str] = None,
+                      include_synthetic: bool = False) -> List[Dict]:
+        """Price points for one locality, oldest first"""
+        query = (
+            "SELECT p.period, s.name AS source, p.price_per_sqft, p.appreciation, p.rental_yield "
+            "FROM localities l JOIN price_points p ON p.locality_id = l.id "
+            "JOIN sources s ON s.id = p.source_id WHERE l.name = ?"
+        )
+        params: list = [locality]
+        if source is not None:
+            query += " AND s.name = ?"
+            params.append(source)
+        elif not include_synthetic:
+            query += " AND s.name NOT LIKE 'synthetic%'"
+        query += " ORDER BY p.period, s.name"
+        return [dict(row) for row in self._db.execute(query, params)]
+
+    def localities(self) -> List[str]:
+        return [row[0] for row in self._db.execute("SELECT name FROM localities ORDER BY name")]
+
+    def count(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM price_points").fetchone()[0]
+
+    def close(self):
+        self._db.close()
+
+
+def import_csv(store: HistoryStore, path: str) -> int:
+    """Upsert one historical CSV snapshot; files without a source column are tagged by file name"""
+    default_source = os.path.splitext(os.path.basename(path))[0]
+    with open(path, newline="", encoding="utf-8") as f:
+        return store.upsert(csv.DictReader(f), default_source=default_source)
+
+
+def compact(store: HistoryStore, paths: Iterable[str], remove: bool = False) -> int:
+    """Import CSVs oldest first so newer snapshots win on overlapping keys"""
+    total = 0
+    for path in sorted(set(paths), key=os.path.getmtime):
+        n = import_csv(store, path)
+        logger.info(f"Imported {n} points from {path}")
+        total += n
+        if remove:
+            os.remove(path)
+    return total
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Consolidated historical price store")
+    parser.add_argument("--db", default=DEFAULT_HISTORY_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    comp = sub.add_parser("compact", help="Import historical CSV snapshots into the store")
+    comp.add_argument("paths", nargs="*", help=f"CSV files or globs (default: {' '.join(DEFAULT_IMPORT_PATTERNS)})")
+    comp.add_argument("--remove", action="store_true", help="Delete each CSV after importing it")
+
+    show = sub.add_parser("show", help="Print the price history of one locality")
+    show.add_argument("locality")
+    show.add_argument("--source")
+    show.add_argument("--include-synthetic", action="store_true")
+
+    args = parser.parse_args(argv)
+    store = HistoryStore(args.db)
+    try:
+        if args.command == "compact":
+            patterns = args.paths or DEFAULT_IMPORT_PATTERNS
+            paths = [p for pattern in patterns for p in glob.glob(pattern)]
+            total = compact(store, paths, remove=args.remove)
+            print(f"Imported {total} points from {len(set(paths))} files; store holds {store.count()} points")
+        else:
+            for point in store.price_history(args.locality, args.source, args.include_synthetic):
+                print(f"{point['period']:<10} {point['price_per_sqft']:>8} {point['source']}")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
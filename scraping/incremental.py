@@ -0,0 +1,263 @@
+"""
+Incremental crawl state: per-listing fingerprints and delta output.
+
+The store keeps one row per listing (a short digest of its identity fields,
+a digest of the fields whose change matters, first/last seen time and the
+last record). Each run reports only what moved:
+
+    new      - key not seen before
+    changed  - key seen before with a different fingerprint
+    removed  - key from a fully crawled scope (locality) not seen this run
+
+Deltas are written as NDJSON lines ``{"op", "key", "seen_at", "record"}``.
+The current state is rebuilt either straight from the store or by replaying
+delta files in order:
+
+    python -m scraping.incremental snapshot --dataset properties --out current.json
+    python -m scraping.incremental replay data/properties_delta_*.ndjson --out current.json
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from scraping.writers import JsonArrayWriter, NdjsonWriter, iter_ndjson
+
+logger = logging.getLogger("IncrementalStore")
+
+DEFAULT_STATE_PATH = os.path.join("data", "listing_state.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS listings (
+    dataset TEXT NOT NULL,
+    key TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    record TEXT NOT NULL,
+    PRIMARY KEY (dataset, key)
+);
+CREATE INDEX IF NOT EXISTS idx_listings_scope ON listings (dataset, scope, last_seen);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    dataset TEXT NOT NULL,
+    path TEXT NOT NULL,
+    started REAL NOT NULL,
+    entry TEXT NOT NULL,
+    PRIMARY KEY (dataset, path)
+);
+"""
+
+
+@dataclass(frozen=True)
+class Dataset:
+    """How records of one output are identified and compared"""
+    name: str
+    key_fields: Tuple[str, ...]
+    fingerprint_fields: Tuple[str, ...]
+    scope_field: Optional[str] = None   # None: one crawl covers the whole dataset
+
+
+PROPERTIES = Dataset(
+    "properties",
+    key_fields=("location", "title", "sqft"),
+    fingerprint_fields=("title", "price", "sqft", "location"),
+    scope_field="location",
+)
+LOCALITY_RATES = Dataset(
+    "locality_rates",
+    key_fields=("area_name", "zone", "property_type"),
+    fingerprint_fields=("rate_per_sqft", "appreciation_5yr", "rental_yield"),
+)
+HISTORICAL_RATES = Dataset(
+    "historical_rates",
+    key_fields=("locality", "year", "source"),
+    fingerprint_fields=("price_per_sqft",),
+)
+DATASETS = {d.name: d for d in (PROPERTIES, LOCALITY_RATES, HISTORICAL_RATES)}
+
+
+def _digest(record: Dict, fields: Tuple[str, ...]) -> str:
+    joined = "\x1f".join(str(record.get(f, "")) for f in fields)
+    return hashlib.blake2b(joined.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class IncrementalStore:
+    """
+    SQLite-backed listing state for one dataset. ``observe`` every record of
+    a run, then ``sweep`` the scopes that were crawled completely and
+    ``commit``; nothing is persisted until a commit.
+    """
+
+    def __init__(self, dataset: Dataset, path: str = DEFAULT_STATE_PATH, started: Optional[float] = None):
+        self.dataset = dataset
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path)
+        self._db.executescript(SCHEMA)
+        # A resumed crawl passes its original start time so listings seen
+        # before the restart still count as seen this run
+        self.started = time.time() if started is None else started
+        self.counts = {"new": 0, "changed": 0, "unchanged": 0, "removed": 0}
+
+    def _scope(self, record: Dict) -> str:
+        field = self.dataset.scope_field
+        return str(record.get(field, "")) if field else ""
+
+    def observe(self, record: Dict) -> Optional[Dict]:
+        """Record a listing seen this run; returns its delta entry, or None if unchanged"""
+        key = _digest(record, self.dataset.key_fields)
+        fingerprint = _digest(record, self.dataset.fingerprint_fields)
+        now = time.time()
+        row = self._db.execute(
+            "SELECT fingerprint, last_seen FROM listings WHERE dataset = ? AND key = ?",
+            (self.dataset.name, key),
+        ).fetchone()
+
+        if row is not None and (row[0] == fingerprint or row[1] >= self.started):
+            # Unchanged, or a duplicate of a listing already seen this run
+            self._db.execute(
+                "UPDATE listings SET last_seen = ? WHERE dataset = ? AND key = ?",
+                (now, self.dataset.name, key),
+            )
+            self.counts["unchanged"] += 1
+            return None
+
+        op = "new" if row is None else "changed"
+        self._db.execute(
+            "INSERT INTO listings (dataset, key, scope, fingerprint, first_seen, last_seen, record) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (dataset, key) DO UPDATE SET scope = excluded.scope, "
+            "fingerprint = excluded.fingerprint, last_seen = excluded.last_seen, record = excluded.record",
+            (self.dataset.name, key, self._scope(record), fingerprint, now, now,
+             json.dumps(record, ensure_ascii=False, separators=(",", ":"))),
+        )
+        self.counts[op] += 1
+        return {"op": op, "key": key, "seen_at": now, "record": record}
+
+    def sweep(self, scopes: Optional[Iterable[str]] = None) -> List[Dict]:
+        """
+        Remove and return listings of the given scopes not seen this run.
+        Only pass scopes whose crawl finished cleanly; ``None`` sweeps the
+        whole dataset.
+        """
+        query = "SELECT key, record FROM listings WHERE dataset = ? AND last_seen < ?"
+        params: list = [self.dataset.name, self.started]
+        if scopes is not None:
+            scopes = list(scopes)
+            if not scopes:
+                return []
+            query += f" AND scope IN ({','.join('?' * len(scopes))})"
+            params.extend(scopes)
+        rows = self._db.execute(query, params).fetchall()
+        self._db.executemany(
+            "DELETE FROM listings WHERE dataset = ? AND key = ?",
+            [(self.dataset.name, key) for key, _ in rows],
+        )
+        now = time.time()
+        self.counts["removed"] += len(rows)
+        return [{"op": "removed", "key": key, "seen_at": now, "record": json.loads(record)} for key, record in rows]
+
+    def save_checkpoint(self, path: str, started: float, entry: Dict):
+        """Keep the latest checkpoint entry of a crawl; it is committed with the state it describes"""
+        self._db.execute(
+            "INSERT INTO checkpoints (dataset, path, started, entry) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (dataset, path) DO UPDATE SET started = excluded.started, entry = excluded.entry",
+            (self.dataset.name, os.path.abspath(path), started,
+             json.dumps(entry, ensure_ascii=False, separators=(",", ":"))),
+        )
+
+    def saved_checkpoint(self, path: str, started: float) -> Optional[Dict]:
+        """Last committed checkpoint entry of the crawl started at ``started``, if any"""
+        row = self._db.execute(
+            "SELECT entry FROM checkpoints WHERE dataset = ? AND path = ? AND started = ?",
+            (self.dataset.name, os.path.abspath(path), started),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def commit(self):
+        self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+    def current(self) -> Iterator[Dict]:
+        """Every listing currently live in this dataset"""
+        for (record,) in self._db.execute(
+            "SELECT record FROM listings WHERE dataset = ? ORDER BY scope, first_seen",
+            (self.dataset.name,),
+        ):
+            yield json.loads(record)
+
+    def summary(self) -> str:
+        return ", ".join(f"{n} {op}" for op, n in self.counts.items())
+
+
+def write_delta(
+    store: IncrementalStore,
+    records: Iterable[Dict],
+    path: str,
+    scopes: Optional[Iterable[str]] = None,
+) -> int:
+    """Observe a complete batch of records, write its delta to ``path`` and commit"""
+    with NdjsonWriter(path) as writer:
+        for record in records:
+            change = store.observe(record)
+            if change:
+                writer.write(change)
+        for change in store.sweep(scopes):
+            writer.write(change)
+    store.commit()
+    return writer.count
+
+
+def replay_deltas(paths: Iterable[str], state: Optional[Dict[str, Dict]] = None) -> Dict[str, Dict]:
+    """Apply delta files, oldest first, onto ``state`` (key -> record)"""
+    state = {} if state is None else state
+    for path in paths:
+        for change in iter_ndjson(path):
+            if change["op"] == "removed":
+                state.pop(change["key"], None)
+            else:
+                state[change["key"]] = change["record"]
+    return state
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild current listing state from the incremental store or delta files")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    snap = sub.add_parser("snapshot", help="Dump the live listings held in the state store")
+    snap.add_argument("--dataset", choices=sorted(DATASETS), default=PROPERTIES.name)
+    snap.add_argument("--state", default=DEFAULT_STATE_PATH)
+    snap.add_argument("--out", required=True)
+
+    replay = sub.add_parser("replay", help="Replay delta files (applied in sorted order)")
+    replay.add_argument("deltas", nargs="+", help="Delta files or glob patterns")
+    replay.add_argument("--out", required=True)
+
+    args = parser.parse_args(argv)
+    with JsonArrayWriter(args.out) as writer:
+        if args.command == "snapshot":
+            store = IncrementalStore(DATASETS[args.dataset], args.state)
+            try:
+                for record in store.current():
+                    writer.write(record)
+            finally:
+                store.close()
+        else:
+            paths = sorted(p for pattern in args.deltas for p in (glob.glob(pattern) or [pattern]))
+            for record in replay_deltas(paths).values():
+                writer.write(record)
+    print(f"Wrote {writer.count} records to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
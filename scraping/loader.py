@@ -0,0 +1,380 @@
+"""
+Bulk upsert of scraper output into the app database.
+
+Records are streamed from the scrapers' NDJSON / JSON / CSV output (or
+passed in directly) and written in batches: each batch is one transaction
+of multi-row ``INSERT ... ON CONFLICT (key) DO UPDATE`` statements, so a
+reload of the same scrape updates rows in place instead of duplicating
+them. Row ids are derived from each record's identity fields, which keeps
+them stable across runs.
+
+Targets:
+
+    listings            Prisma ``Listing`` (SQLite ``prisma/dev.db``); rows
+                        are owned by the user given by ``--owner-email``
+    historical_prices   Prisma ``HistoricalPrice`` from trend/history rows
+    properties          Supabase/Postgres ``properties``
+
+Databases are given as a SQLite path (or ``sqlite:///path``) or a
+``postgresql://`` URL; Postgres needs ``psycopg`` (or ``psycopg2``),
+imported on first use. Any other DB-API connection can be passed to
+``BulkLoader`` with its placeholder.
+
+    python -m scraping.loader listings data/properties_scraped_*.ndjson
+    python -m scraping.loader historical_prices data/mira_bhayandar_comprehensive.csv
+    python -m scraping.loader properties data/properties_scraped_*.ndjson --db postgresql://localhost/app
+"""
+
+import argparse
+import csv
+import glob
+import gzip
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from scraping.history import normalize_point
+from scraping.localities import default_resolver
+from scraping.metrics import default_metrics
+from scraping.profiling import stage
+from scraping.writers import iter_ndjson
+
+logger = logging.getLogger("BulkLoader")
+
+DEFAULT_DB = "prisma/dev.db"
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_OWNER_EMAIL = "demo@miraroad.com"
+# Bound parameters per statement: SQLite's compile-time default, and what
+# the Postgres wire protocol allows
+SQLITE_MAX_PARAMS = 32766
+POSTGRES_MAX_PARAMS = 65535
+# Listing bid bounds around the asking price, as in the seeded listings
+MIN_BID_RATIO = 0.95
+MAX_BID_RATIO = 1.05
+
+
+@dataclass(frozen=True)
+class Target:
+    """One table: its columns, conflict key, and how a record becomes a row"""
+    name: str
+    table: str
+    columns: Tuple[str, ...]
+    key: Tuple[str, ...]
+    row: Callable[[Dict, Dict], Optional[Tuple]]   # (record, context) -> values in column order, or None to skip
+    insert_only: Tuple[str, ...] = ()              # kept from the first load, e.g. creation time
+
+
+def stable_id(*parts) -> str:
+    """Same identity fields, same id, on every run; UUID-shaped so uuid id columns take it too"""
+    h = hashlib.blake2b("\x1f".join(map(str, parts)).encode("utf-8"), digest_size=16).hexdigest()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+def _epoch_ms(value: Optional[datetime] = None) -> int:
+    """Prisma's SQLite DATETIME: milliseconds since the epoch"""
+    return int((value or datetime.now(timezone.utc)).timestamp() * 1000)
+
+
+def _listing_row(record: Dict, context: Dict) -> Optional[Tuple]:
+    price, sqft = record.get("price"), record.get("sqft")
+    if not price or not sqft or not record.get("location"):
+        return None
+    location = record["location"]
+    now = context["now_ms"]
+    return (
+        stable_id("listing", location, record.get("title"), sqft),
+        record.get("title") or "Property",
+        record.get("description") or "",
+        location,
+        default_resolver().zone(location),
+        "Residential",
+        int(sqft),
+        f"{record.get('bedrooms') or 1}BHK",
+        int(record.get("price_per_sqft") or round(price / sqft)),
+        int(price),
+        round(price * MIN_BID_RATIO),
+        round(price * MAX_BID_RATIO),
+        "active" if record.get("status", "available") == "available" else str(record["status"]),
+        record.get("image_url"),
+        now,
+        now,
+        context["user_id"],
+    )
+
+
+def _historical_row(record: Dict, context: Dict) -> Optional[Tuple]:
+    point = normalize_point(record, context.get("default_source", "99acres"))
+    if point is None:
+        return None
+    period = point["period"]
+    if len(period) == 4:
+        day = datetime(int(period), 1, 1, tzinfo=timezone.utc)
+    else:
+        day = datetime.strptime(period, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    return (
+        stable_id("historical", point["locality"], period, point["source"]),
+        point["locality"],
+        point["zone"] or default_resolver().zone(point["locality"]),
+        point["price_per_sqft"],
+        _epoch_ms(day),
+        point["source"],
+    )
+
+
+def _property_row(record: Dict, context: Dict) -> Optional[Tuple]:
+    price, sqft = record.get("price"), record.get("sqft")
+    if not price or not sqft or not record.get("location"):
+        return None
+    location = record["location"]
+    return (
+        stable_id("listing", location, record.get("title"), sqft),
+        record.get("title") or "Property",
+        record.get("description"),
+        int(price),
+        location,
+        location,
+        int(sqft),
+        record.get("type") or "Apartment",
+        record.get("bedrooms"),
+        record.get("bathrooms"),
+        record.get("image_url"),
+        record.get("status") or "available",
+        record.get("builder"),
+    )
+
+
+LISTINGS = Target(
+    "listings", "Listing",
+    ("id", "title", "description", "areaName", "zone", "propertyType", "area", "configuration", "ratePerSqft",
+     "totalPrice", "minBidAmount", "maxBidAmount", "status", "imageUrl", "createdAt", "updatedAt", "userId"),
+    key=("id",),
+    row=_listing_row,
+    insert_only=("createdAt", "userId"),
+)
+HISTORICAL_PRICES = Target(
+    "historical_prices", "HistoricalPrice",
+    ("id", "areaName", "zone", "ratePerSqft", "date", "dataSource"),
+    key=("id",),
+    row=_historical_row,
+)
+PROPERTIES = Target(
+    "properties", "properties",
+    ("id", "title", "description", "price", "location", "locality", "sqft", "type", "bedrooms", "bathrooms",
+     "image_url", "status", "builder"),
+    key=("id",),
+    row=_property_row,
+)
+TARGETS = {t.name: t for t in (LISTINGS, HISTORICAL_PRICES, PROPERTIES)}
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+@dataclass
+class LoadStats:
+    rows: int = 0        # rows sent (after de-duplicating each batch on the key)
+    skipped: int = 0     # records without the fields the target needs
+    batches: int = 0
+    seconds: float = 0.0
+
+
+class BulkLoader:
+    """
+    Batched multi-row upserts into one target over a DB-API connection.
+    ``placeholder`` is the driver's parameter marker ("?" for sqlite3,
+    "%s" for psycopg).
+    """
+
+    def __init__(self, conn, target: Target, batch_size: int = DEFAULT_BATCH_SIZE, placeholder: str = "?",
+                 max_params: int = SQLITE_MAX_PARAMS, context: Optional[Dict] = None):
+        self.conn = conn
+        self.target = target
+        self.batch_size = max(1, batch_size)
+        self.placeholder = placeholder
+        self.context = dict(context or {})
+        self.context.setdefault("now_ms", _epoch_ms())
+        self.rows_per_statement = max(1, min(self.batch_size, max_params // len(target.columns)))
+        self._key_index = [target.columns.index(c) for c in target.key]
+        self._sql: Dict[int, str] = {}
+        self.stats = LoadStats()
+
+    def _statement(self, n: int) -> str:
+        """INSERT of ``n`` rows with the upsert clause; built once per row count"""
+        sql = self._sql.get(n)
+        if sql is None:
+            target = self.target
+            row = "(" + ", ".join([self.placeholder] * len(target.columns)) + ")"
+            updates = ", ".join(
+                f"{_quote(c)} = excluded.{_quote(c)}" for c in target.columns
+                if c not in target.key and c not in target.insert_only
+            )
+            sql = self._sql[n] = (
+                f"INSERT INTO {_quote(target.table)} ({', '.join(map(_quote, target.columns))}) "
+                f"VALUES {', '.join([row] * n)} "
+                f"ON CONFLICT ({', '.join(map(_quote, target.key))}) DO UPDATE SET {updates}"
+            )
+        return sql
+
+    def _write(self, rows: List[Tuple]):
+        """One transaction: the batch as one or more multi-row statements"""
+        cursor = self.conn.cursor()
+        try:
+            for start in range(0, len(rows), self.rows_per_statement):
+                chunk = rows[start:start + self.rows_per_statement]
+                cursor.execute(self._statement(len(chunk)), [value for row in chunk for value in row])
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            cursor.close()
+        self.stats.rows += len(rows)
+        self.stats.batches += 1
+        default_metrics().inc("db_rows_upserted_total", len(rows), table=self.target.table)
+
+    def _flush(self, batch: Dict[Tuple, Tuple]):
+        with default_metrics().timer("db_batch_seconds", table=self.target.table), stage("export"):
+            self._write(list(batch.values()))
+        batch.clear()
+
+    def load(self, records: Iterable[Dict]) -> LoadStats:
+        """Upsert ``records`` batch by batch; returns the running totals"""
+        started = time.perf_counter()
+        # Keyed per batch: Postgres rejects a statement that updates the same row twice
+        batch: Dict[Tuple, Tuple] = {}
+        for record in records:
+            row = self.target.row(record, self.context)
+            if row is None:
+                self.stats.skipped += 1
+                continue
+            batch[tuple(row[i] for i in self._key_index)] = row
+            if len(batch) >= self.batch_size:
+                self._flush(batch)
+        if batch:
+            self._flush(batch)
+        self.stats.seconds += time.perf_counter() - started
+        return self.stats
+
+
+def connect(db: str) -> Tuple[object, str, int]:
+    """(connection, placeholder, max parameters) for a SQLite path / sqlite:/// URL or a Postgres URL"""
+    if db.startswith(("postgres://", "postgresql://")):
+        try:
+            import psycopg
+            return psycopg.connect(db), "%s", POSTGRES_MAX_PARAMS
+        except ImportError:
+            pass
+        try:
+            import psycopg2
+        except ImportError as e:
+            raise ImportError("Loading into Postgres needs psycopg: pip install psycopg") from e
+        return psycopg2.connect(db), "%s", POSTGRES_MAX_PARAMS
+    path = db[len("sqlite:///"):] if db.startswith("sqlite:///") else db
+    conn = sqlite3.connect(path)
+    try:
+        max_params = conn.getlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER)
+    except AttributeError:   # Python < 3.11
+        max_params = 999
+    return conn, "?", max_params
+
+
+def listing_target(db: str) -> str:
+    """Where scraped listings go: Supabase ``properties`` on Postgres, Prisma ``Listing`` on SQLite"""
+    return PROPERTIES.name if db.startswith(("postgres://", "postgresql://")) else LISTINGS.name
+
+
+def owner_id(conn, placeholder: str, email: str) -> str:
+    """Id of the Prisma ``User`` that scraped listings are attached to"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f'SELECT "id" FROM "User" WHERE "email" = {placeholder}', (email,))
+        row = cursor.fetchone()
+    finally:
+        cursor.close()
+    if row is None:
+        raise ValueError(f"No User with email {email!r} to own the scraped listings")
+    return row[0]
+
+
+def load_records(records: Iterable[Dict], target: str, db: str = DEFAULT_DB, batch_size: int = DEFAULT_BATCH_SIZE,
+                 owner_email: str = DEFAULT_OWNER_EMAIL, default_source: str = "99acres") -> LoadStats:
+    """Open ``db``, upsert ``records`` into the named target and close it"""
+    conn, placeholder, max_params = connect(db)
+    try:
+        context = {"default_source": default_source}
+        if target == LISTINGS.name:
+            context["user_id"] = owner_id(conn, placeholder, owner_email)
+        loader = BulkLoader(conn, TARGETS[target], batch_size, placeholder, max_params, context)
+        stats = loader.load(records)
+    finally:
+        conn.close()
+    logger.info(f"Upserted {stats.rows} rows into {TARGETS[target].table} ({db}) in {stats.batches} batches, "
+                f"{stats.seconds:.1f}s; {stats.skipped} records skipped")
+    return stats
+
+
+def iter_records(path: str) -> Iterator[Dict]:
+    """Records of a scraper output file: NDJSON (snapshot or delta, optionally gzipped), JSON array or CSV"""
+    if ".ndjson" in path:
+        for record in iter_ndjson(path):
+            if "op" in record and "record" in record:
+                # Delta line; removals carry no new values to load
+                if record["op"] == "removed":
+                    continue
+                record = record["record"]
+            yield record
+        return
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8", newline="") as f:
+        if path.endswith((".csv", ".csv.gz")):
+            yield from csv.DictReader(f)
+        else:
+            data = json.load(f)
+            yield from (data if isinstance(data, list) else [data])
+
+
+def iter_paths(patterns: Iterable[str]) -> Iterator[Dict]:
+    for pattern in patterns:
+        paths = sorted(glob.glob(pattern)) or [pattern]
+        for path in paths:
+            yield from iter_records(path)
+
+
+def add_loader_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--load-db", metavar="DB",
+                        help="Also upsert the scraped records into this database (SQLite path or postgresql:// URL)")
+    parser.add_argument("--load-batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help="Rows per transaction for --load-db")
+    parser.add_argument("--load-owner-email", default=DEFAULT_OWNER_EMAIL,
+                        help="Prisma User that owns listings loaded with --load-db")
+
+
+def load_from_args(args: argparse.Namespace, records: Iterable[Dict], target: str) -> Optional[LoadStats]:
+    """Upsert ``records`` when ``--load-db`` was given"""
+    if not args.load_db:
+        return None
+    return load_records(records, target, args.load_db, args.load_batch_size, args.load_owner_email)
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Bulk upsert scraper output into the app database")
+    parser.add_argument("target", choices=sorted(TARGETS))
+    parser.add_argument("inputs", nargs="+", help="NDJSON / JSON / CSV files or glob patterns")
+    parser.add_argument("--db", default=DEFAULT_DB, help="SQLite path or postgresql:// URL")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Rows per transaction")
+    parser.add_argument("--owner-email", default=DEFAULT_OWNER_EMAIL, help="Prisma User that owns loaded listings")
+    parser.add_argument("--source", default="99acres", help="dataSource for rows that do not name one")
+    args = parser.parse_args(argv)
+
+    load_records(iter_paths(args.inputs), args.target, args.db, args.batch_size, args.owner_email, args.source)
+
+
+if __name__ == "__main__":
+    main()
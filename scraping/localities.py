@@ -0,0 +1,199 @@
+"""
+Gazetteer-backed locality resolver.
+
+Maps any raw locality name or URL slug ("Mira Road East",
+"mira-road-east-mumbai", "Flat in Bhayander West near station") to a
+canonical gazetteer entry with its zone and URL slugs. Entries live in
+``scraping/gazetteer.csv``:
+
+    name,zone,town,slug,listing_slug,aliases
+
+All names and aliases are compiled once into an Aho-Corasick automaton, so
+finding every gazetteer name inside a raw string is one pass over the
+string regardless of gazetteer size; results are memoized in a bounded LRU.
+Matching is word-aligned and prefers the longest (most specific) name,
+then the earliest one.
+"""
+
+import csv
+import os
+import re
+import threading
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_GAZETTEER = os.path.join(os.path.dirname(__file__), "gazetteer.csv")
+DEFAULT_ZONE = "Mira Road & Beyond"
+
+_NON_WORD_RE = re.compile(r"[^a-z0-9]+")
+# Trailing city suffixes used in listing slugs ("mira-road-east-mumbai")
+_CITY_SUFFIXES = (" mumbai",)
+
+
+def normalize_name(raw: str) -> str:
+    """Lowercase, punctuation/hyphens to single spaces"""
+    return _NON_WORD_RE.sub(" ", (raw or "").lower()).strip()
+
+
+def slugify(raw: str) -> str:
+    return normalize_name(raw).replace(" ", "-")
+
+
+@dataclass(frozen=True)
+class Locality:
+    name: str
+    zone: str
+    town: str
+    slug: str
+    listing_slug: str = ""
+
+
+class AhoCorasick:
+    """Multi-pattern substring matcher: finds all patterns in one left-to-right pass"""
+
+    def __init__(self, patterns: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        self.patterns: List[str] = []
+        for pattern in patterns:
+            self._add(pattern)
+        self._build()
+
+    def _add(self, pattern: str):
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append(len(self.patterns))
+        self.patterns.append(pattern)
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(ch, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def find_all(self, text: str) -> List[Tuple[int, int]]:
+        """(end offset, pattern index) for every occurrence"""
+        matches = []
+        node = 0
+        goto, fail, out = self._goto, self._fail, self._out
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for idx in out[node]:
+                matches.append((i, idx))
+        return matches
+
+
+class LocalityResolver:
+    """Resolves raw names/slugs to gazetteer localities"""
+
+    def __init__(self, localities: Iterable[Locality], aliases: Optional[Dict[str, List[str]]] = None,
+                 cache_size: int = 4096):
+        self.localities = list(localities)
+        self._by_key: Dict[str, Locality] = {}
+        for loc in self.localities:
+            keys = [loc.name, loc.slug, loc.listing_slug, *(aliases or {}).get(loc.name, [])]
+            for key in filter(None, map(normalize_name, keys)):
+                self._by_key.setdefault(key, loc)
+        # Patterns are padded with spaces so matches align to whole words
+        keys = sorted(self._by_key)
+        self._matcher = AhoCorasick(f" {key} " for key in keys)
+        self._pattern_keys = keys
+        self._resolve_cached = lru_cache(maxsize=cache_size)(self._resolve)
+
+    @classmethod
+    def from_file(cls, path: str = DEFAULT_GAZETTEER, cache_size: int = 4096) -> "LocalityResolver":
+        localities, aliases = [], {}
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                name = row["name"].strip()
+                localities.append(Locality(
+                    name=name,
+                    zone=row["zone"].strip() or DEFAULT_ZONE,
+                    town=row.get("town", "").strip(),
+                    slug=row.get("slug", "").strip() or slugify(name),
+                    listing_slug=row.get("listing_slug", "").strip(),
+                ))
+                aliases[name] = [a.strip() for a in (row.get("aliases") or "").split("|") if a.strip()]
+        return cls(localities, aliases, cache_size)
+
+    def _resolve(self, key: str, exact: bool) -> Optional[Locality]:
+        loc = self._by_key.get(key)
+        if loc is None:
+            for suffix in _CITY_SUFFIXES:
+                if key.endswith(suffix):
+                    loc = self._by_key.get(key[: -len(suffix)])
+        if loc is not None or exact:
+            return loc
+        best = None   # (length, -start) - longest, then earliest match wins
+        for end, idx in self._matcher.find_all(f" {key} "):
+            length = len(self._matcher.patterns[idx])
+            rank = (length, -(end - length))
+            if best is None or rank > best[0]:
+                best = (rank, idx)
+        return self._by_key[self._pattern_keys[best[1]]] if best else None
+
+    def resolve(self, raw: str, exact: bool = False) -> Optional[Locality]:
+        """
+        Gazetteer entry for ``raw``. With ``exact`` only the name, slug or an
+        alias as a whole matches; otherwise the most specific gazetteer name
+        contained in ``raw`` is used.
+        """
+        return self._resolve_cached(normalize_name(raw), exact)
+
+    def zone(self, raw: str) -> str:
+        loc = self.resolve(raw)
+        return loc.zone if loc else DEFAULT_ZONE
+
+    def display_name(self, raw: str) -> str:
+        """Canonical name, or a title-cased version of an unknown slug"""
+        loc = self.resolve(raw, exact=True)
+        if loc:
+            return loc.name
+        name = normalize_name(raw)
+        for suffix in _CITY_SUFFIXES:
+            if name.endswith(suffix):
+                name = name[: -len(suffix)]
+        return name.title()
+
+    def slug(self, raw: str) -> str:
+        """Slug for the locality rates/price-trend URLs"""
+        loc = self.resolve(raw, exact=True)
+        return loc.slug if loc else slugify(raw)
+
+    def cache_info(self):
+        return self._resolve_cached.cache_info()
+
+    def cache_clear(self):
+        self._resolve_cached.cache_clear()
+
+
+_default_resolver: Optional[LocalityResolver] = None
+_default_lock = threading.Lock()
+
+
+def default_resolver() -> LocalityResolver:
+    """Process-wide resolver over the bundled gazetteer"""
+    global _default_resolver
+    with _default_lock:
+        if _default_resolver is None:
+            _default_resolver = LocalityResolver.from_file()
+        return _default_resolver
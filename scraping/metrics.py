@@ -0,0 +1,324 @@
+"""
+Run metrics shared by the scrapers.
+
+A process-wide registry of counters, gauges and histograms, fed from the
+choke points every scraper goes through:
+
+    throttled_get   fetch latency per host, response bytes, statuses,
+                    throttles (429/503), retries (throttle and urllib3 transport)
+    ResponseCache   cache hits / misses / revalidations
+    parsers         parse time per page, pages parsed
+    scrapers        records produced, synthetic-fallback datasets
+
+At the end of a run ``write_report`` writes a JSON report
+(``data/metrics/<scraper>_<timestamp>.json``) and a Prometheus textfile
+(``data/metrics/<scraper>.prom``, for node_exporter's textfile collector).
+The textfile carries ``scraper_last_run_timestamp_seconds`` so a scheduled
+crawl that stopped running, slowed down or fell back to synthetic data
+shows up in alerting.
+"""
+
+import argparse
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger("Metrics")
+
+DEFAULT_METRICS_DIR = os.path.join("data", "metrics")
+PREFIX = "scraper_"
+# Seconds; covers cache-speed parses up to slow-drip fetches
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+HELP = {
+    "fetch_seconds": ("histogram", "Network GET latency per attempt"),
+    "response_bytes_total": ("counter", "Response body bytes received from the network"),
+    "responses_total": ("counter", "Network responses by status"),
+    "fetch_errors_total": ("counter", "GETs that raised instead of returning a response"),
+    "throttled_total": ("counter", "429/503 responses"),
+    "retries_total": ("counter", "Repeated requests: throttle retries and urllib3 transport retries"),
+    "cache_requests_total": ("counter", "Response cache lookups by result"),
+    "parse_seconds": ("histogram", "Parse time per page"),
+    "pages_parsed_total": ("counter", "Pages parsed"),
+    "stream_stops_total": ("counter", "Streamed pages by why reading stopped: found, budget or end"),
+    "selector_lookups_total": ("counter", "Learned card/field selector lookups by result: hit or miss"),
+    "db_rows_upserted_total": ("counter", "Rows bulk-upserted into the app database per table"),
+    "db_batch_seconds": ("histogram", "Time per bulk upsert batch (one transaction)"),
+    "duplicates_dropped_total": ("counter", "Listings dropped as repeats of one already seen this run"),
+    "records_total": ("counter", "Records produced per dataset"),
+    "synthetic_fallback_total": ("counter", "Datasets generated synthetically because scraping failed"),
+    "run_duration_seconds": ("gauge", "Wall time of the last run"),
+    "records_per_second": ("gauge", "Records produced per second of run time"),
+    "last_run_timestamp_seconds": ("gauge", "Unix time the last run finished"),
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _key(labels: Dict) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)   # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def add(self, other: "Histogram"):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate by linear interpolation inside the bucket holding the q-th observation"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return self.max
+
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count, "sum": self.sum, "max": self.max,
+            "mean": self.sum / self.count if self.count else None,
+            "p50": self.quantile(0.5), "p90": self.quantile(0.9), "p99": self.quantile(0.99),
+        }
+
+
+class Metrics:
+    """Thread-safe registry; metric names are given without the ``scraper_`` prefix"""
+
+    def __init__(self, scraper: str = "scraper"):
+        self.scraper = scraper
+        self.started = time.time()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1, **labels):
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            key = _key(labels)
+            series[key] = series.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels):
+        with self._lock:
+            self._gauges.setdefault(name, {})[_key(labels)] = value
+
+    def observe(self, name: str, value: float, **labels):
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            key = _key(labels)
+            if key not in series:
+                series[key] = Histogram()
+            series[key].observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def total(self, name: str, **match) -> float:
+        """Sum of a counter over every series whose labels include ``match``"""
+        want = set(_key(match))
+        with self._lock:
+            return sum(v for k, v in self._counters.get(name, {}).items() if want <= set(k))
+
+    def histogram(self, name: str) -> Histogram:
+        """All series of a histogram merged into one"""
+        merged = Histogram()
+        with self._lock:
+            for h in self._histograms.get(name, {}).values():
+                merged.add(h)
+        return merged
+
+    def drain(self) -> Dict:
+        """Everything recorded since the last drain, picklable, for ``merge`` in the main process"""
+        with self._lock:
+            delta = {"counters": self._counters, "gauges": self._gauges, "histograms": self._histograms}
+            self._counters, self._gauges, self._histograms = {}, {}, {}
+        return delta
+
+    def merge(self, delta: Optional[Dict]):
+        if not delta:
+            return
+        with self._lock:
+            for name, series in delta["counters"].items():
+                counters = self._counters.setdefault(name, {})
+                for key, value in series.items():
+                    counters[key] = counters.get(key, 0) + value
+            for name, series in delta["gauges"].items():
+                self._gauges.setdefault(name, {}).update(series)
+            for name, series in delta["histograms"].items():
+                histograms = self._histograms.setdefault(name, {})
+                for key, h in series.items():
+                    if key in histograms:
+                        histograms[key].add(h)
+                    else:
+                        histograms[key] = h
+
+    def finish(self) -> Dict:
+        """Set the run gauges and return the headline numbers"""
+        finished = time.time()
+        duration = finished - self.started
+        records = self.total("records_total")
+        self.set("run_duration_seconds", duration)
+        self.set("records_per_second", records / duration if duration else 0.0)
+        self.set("last_run_timestamp_seconds", finished)
+
+        hits = self.total("cache_requests_total", result="hit")
+        lookups = self.total("cache_requests_total")
+        responses = self.total("responses_total")
+        errors = self.total("fetch_errors_total")
+        failed = sum(self.total("responses_total", status=s) for s in self._statuses() if int(s) >= 400)
+        fetch = self.histogram("fetch_seconds")
+        parse = self.histogram("parse_seconds")
+        return {
+            "duration_s": duration,
+            "records": records,
+            "records_per_second": records / duration if duration else 0.0,
+            "requests": responses + errors,
+            "response_bytes": self.total("response_bytes_total"),
+            "error_rate": (failed + errors) / (responses + errors) if responses + errors else 0.0,
+            "throttled": self.total("throttled_total"),
+            "retries": self.total("retries_total"),
+            "cache_hit_rate": hits / lookups if lookups else None,
+            "fetch_seconds": fetch.to_dict(),
+            "pages_parsed": self.total("pages_parsed_total"),
+            "parse_seconds": parse.to_dict(),
+            "synthetic_fallbacks": self.total("synthetic_fallback_total"),
+        }
+
+    def _statuses(self) -> List[str]:
+        with self._lock:
+            return sorted({v for key in self._counters.get("responses_total", {}) for k, v in key if k == "status"})
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            def rows(series, value=lambda v: v):
+                return [{"labels": dict(k), "value": value(v)} for k, v in sorted(series.items())]
+            return {
+                "counters": {n: rows(s) for n, s in sorted(self._counters.items())},
+                "gauges": {n: rows(s) for n, s in sorted(self._gauges.items())},
+                "histograms": {n: rows(s, Histogram.to_dict) for n, s in sorted(self._histograms.items())},
+            }
+
+    def prometheus(self) -> str:
+        """Text exposition format, every series labelled with the scraper name"""
+        def labels(key: LabelKey, extra: Tuple = ()) -> str:
+            pairs = (("scraper", self.scraper),) + key + extra
+            return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+        lines = []
+        with self._lock:
+            families = [(n, s, "counter") for n, s in self._counters.items()] + \
+                       [(n, s, "gauge") for n, s in self._gauges.items()]
+            for name, series, kind in sorted(families):
+                full = PREFIX + name
+                lines += [f"# HELP {full} {HELP.get(name, (kind, name))[1]}", f"# TYPE {full} {kind}"]
+                lines += [f"{full}{labels(k)} {_number(v)}" for k, v in sorted(series.items())]
+            for name, series in sorted(self._histograms.items()):
+                full = PREFIX + name
+                lines += [f"# HELP {full} {HELP.get(name, ('histogram', name))[1]}", f"# TYPE {full} histogram"]
+                for key, h in sorted(series.items()):
+                    cumulative = 0
+                    for bound, n in zip(h.buckets + (float("inf"),), h.counts):
+                        cumulative += n
+                        le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                        lines.append(f"{full}_bucket{labels(key, (('le', le),))} {cumulative}")
+                    lines.append(f"{full}_sum{labels(key)} {_number(h.sum)}")
+                    lines.append(f"{full}_count{labels(key)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+
+_metrics = Metrics()
+_metrics_lock = threading.Lock()
+
+
+def default_metrics() -> Metrics:
+    return _metrics
+
+
+def configure_metrics(scraper: str) -> Metrics:
+    """Start a fresh registry for this run of ``scraper``"""
+    global _metrics
+    with _metrics_lock:
+        _metrics = Metrics(scraper)
+        return _metrics
+
+
+def write_report(metrics: Optional[Metrics] = None, directory: str = DEFAULT_METRICS_DIR,
+                 extra: Optional[Dict] = None) -> Tuple[str, str]:
+    """Write the JSON run report and the Prometheus textfile; returns both paths"""
+    metrics = metrics or default_metrics()
+    summary = metrics.finish()
+    os.makedirs(directory, exist_ok=True)
+    stamp = datetime.fromtimestamp(metrics.started).strftime("%Y%m%d_%H%M%S")
+    report_path = os.path.join(directory, f"{metrics.scraper}_{stamp}.json")
+    report = {
+        "scraper": metrics.scraper,
+        "started": datetime.fromtimestamp(metrics.started).isoformat(timespec="seconds"),
+        "finished": datetime.now().isoformat(timespec="seconds"),
+        "summary": summary,
+        **(extra or {}),
+        "metrics": metrics.snapshot(),
+    }
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    # The textfile collector may read at any moment: write aside, then rename
+    prom_path = os.path.join(directory, f"{metrics.scraper}.prom")
+    with open(prom_path + ".tmp", "w", encoding="utf-8") as f:
+        f.write(metrics.prometheus())
+    os.replace(prom_path + ".tmp", prom_path)
+    logger.info(
+        f"Run report: {summary['records']:.0f} records, {summary['records_per_second']:.1f}/s, "
+        f"{summary['requests']:.0f} requests ({summary['error_rate']:.0%} failed, {summary['throttled']:.0f} throttled), "
+        f"{summary['synthetic_fallbacks']:.0f} synthetic fallbacks -> {report_path}, {prom_path}"
+    )
+    return report_path, prom_path
+
+
+def add_metrics_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--metrics-dir", default=DEFAULT_METRICS_DIR,
+                        help="Where the JSON run report and Prometheus textfile are written")
+    parser.add_argument("--no-metrics", action="store_true", help="Do not write a run report")
+
+
+def report_from_args(args: argparse.Namespace, extra: Optional[Dict] = None):
+    if not args.no_metrics:
+        return write_report(directory=args.metrics_dir, extra=extra)
+    return None
@@ -0,0 +1,210 @@
+"""
+Adaptive pagination for the listing result pages.
+
+Instead of walking a fixed number of pages per locality, the controller
+reads each page's result count / next-page signal and stops a locality as
+soon as a page comes back empty, repeats an earlier page, or the known
+result count has been covered. While page N is being parsed, page N+1 is
+already being fetched; if N turns out to be the last page, at most that one
+speculative request is wasted.
+"""
+
+import hashlib
+import math
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from scraping.embedded_state import find_dict_with, first_value
+
+TOTAL_KEYS = ("totalCount", "totalResults", "resultCount", "totalProperties")
+TOTAL_TEXT_RE = re.compile(
+    rb"of\s+([\d,]+)\s+(?:results|properties|listings)|([\d,]+)\s+(?:results|properties|listings)\s+found",
+    re.IGNORECASE,
+)
+NEXT_LINK_RE = re.compile(rb"""rel=["']next["']""", re.IGNORECASE)
+
+Job = Tuple[str, int]
+
+
+@dataclass
+class PageSignals:
+    """What a result page says about pagination"""
+    records: int = 0
+    total_results: Optional[int] = None
+    has_next: Optional[bool] = None   # None when the page gives no hint
+    fingerprint: str = ""
+
+
+def page_fingerprint(records: Iterable[Dict]) -> str:
+    """Order-insensitive digest of a page's listings, used to spot repeated pages"""
+    keys = sorted(f"{r.get('title')}|{r.get('price')}|{r.get('sqft')}" for r in records)
+    return hashlib.sha1("\n".join(keys).encode("utf-8")).hexdigest() if keys else ""
+
+
+def read_page_signals(content: bytes, page: int, records: List[Dict], state: Optional[Dict] = None) -> PageSignals:
+    """Pull result count and next-page hints out of a listing page"""
+    signals = PageSignals(records=len(records), fingerprint=page_fingerprint(records))
+
+    if state:
+        holder = find_dict_with(state, TOTAL_KEYS)
+        total = first_value(holder, TOTAL_KEYS) if holder else None
+        if isinstance(total, (int, float)) and not isinstance(total, bool):
+            signals.total_results = int(total)
+    if signals.total_results is None:
+        m = TOTAL_TEXT_RE.search(content)
+        if m:
+            signals.total_results = int((m.group(1) or m.group(2)).replace(b",", b""))
+
+    # Boundary-checked so page=20..29 is not read as a link to page 2 (";" covers "&amp;page=")
+    if NEXT_LINK_RE.search(content) or re.search(rb"[?&;]page=%d(?!\d)" % (page + 1), content):
+        signals.has_next = True
+    return signals
+
+
+@dataclass
+class LocalityProgress:
+    scheduled: int = 0          # highest page queued for fetching
+    fetched: int = 0            # highest page handed to the parse stage
+    parsed: int = 0             # highest page whose result has been seen
+    per_page: int = 0
+    last_page: Optional[int] = None
+    finished: bool = False
+    failed_page: Optional[int] = None   # first page that failed to fetch
+    reason: str = ""
+    fingerprints: Set[str] = field(default_factory=set)
+
+
+class PaginationController:
+    """
+    Decides which (locality, page) jobs to fetch. Thread-safe: the fetch
+    stage calls ``should_fetch``/``after_fetch``, the writer calls ``after_parse``.
+    """
+
+    def __init__(self, max_pages: int = 20, lookahead: int = 1):
+        self.max_pages = max_pages
+        self.lookahead = max(0, lookahead)
+        self.progress: Dict[str, LocalityProgress] = {}
+        self._lock = threading.Lock()
+
+    def start(self, localities: Iterable[str], restored: Optional[Dict[str, LocalityProgress]] = None) -> List[Job]:
+        """
+        First job per locality. ``restored`` progress (from a checkpoint)
+        continues a locality after its last saved page, or skips it if done.
+        """
+        jobs = []
+        for locality in localities:
+            progress = (restored or {}).get(locality)
+            if progress is None:
+                progress = LocalityProgress()
+            self.progress[locality] = progress
+            if progress.finished:
+                continue
+            page = progress.parsed + 1
+            if page > self.max_pages or (progress.last_page is not None and page > progress.last_page):
+                self._finish(progress, f"reached page {progress.parsed} before resume")
+                continue
+            progress.scheduled = page
+            jobs.append((locality, page))
+        return jobs
+
+    def _finish(self, progress: LocalityProgress, reason: str, failed: bool = False):
+        if not progress.finished:
+            progress.finished = True
+            progress.reason = reason
+            if not failed:
+                # A failed request past the real last page is not a failed crawl
+                progress.failed_page = None
+
+    def _next_jobs(self, locality: str) -> List[Job]:
+        """
+        Queue the next page if it is within the lookahead window and not known
+        to be past the end. Only one page per locality is in flight at a time,
+        so pages reach the parse stage in order.
+        """
+        progress = self.progress[locality]
+        page = progress.scheduled + 1
+        if progress.finished or progress.scheduled > progress.fetched:
+            return []
+        if page > progress.parsed + 1 + self.lookahead:
+            return []
+        if page > self.max_pages:
+            return []
+        if progress.last_page is not None and page > progress.last_page:
+            return []
+        progress.scheduled = page
+        return [(locality, page)]
+
+    def should_fetch(self, job: Job) -> bool:
+        locality, page = job
+        with self._lock:
+            progress = self.progress[locality]
+            if progress.finished:
+                return False
+            return progress.last_page is None or page <= progress.last_page
+
+    def after_fetch(self, job: Job, ok: bool) -> List[Job]:
+        """Speculatively queue the next page as soon as this one is fetched"""
+        locality, page = job
+        with self._lock:
+            progress = self.progress[locality]
+            if not ok:
+                if progress.finished:
+                    return []
+                # Pages before the failed one may still be waiting to be parsed
+                progress.failed_page = page
+                progress.last_page = min(page - 1, progress.last_page if progress.last_page is not None else page)
+                if progress.parsed >= progress.last_page:
+                    self._finish(progress, f"page {page} failed to fetch", failed=True)
+                return []
+            progress.fetched = max(progress.fetched, page)
+            return self._next_jobs(locality)
+
+    def after_parse(self, job: Job, signals: Optional[PageSignals]) -> Tuple[bool, List[Job]]:
+        """
+        Record a parsed page. Returns (keep, follow-up jobs); ``keep`` is
+        False when the page repeats an earlier one, arrives after the end or
+        failed to parse (``signals`` is None).
+        """
+        locality, page = job
+        with self._lock:
+            progress = self.progress[locality]
+            progress.parsed = max(progress.parsed, page)
+            if progress.finished:
+                return False, []
+            if signals is None:
+                # The parse failed: the pages from here on were never read, so
+                # the locality is neither done nor complete enough to sweep
+                progress.failed_page = page
+                progress.last_page = min(page - 1, progress.last_page if progress.last_page is not None else page)
+                self._finish(progress, f"page {page} failed to parse", failed=True)
+                return False, []
+            if signals.records == 0:
+                self._finish(progress, f"page {page} empty")
+                return False, []
+            if signals.fingerprint in progress.fingerprints:
+                self._finish(progress, f"page {page} repeats an earlier page")
+                return False, []
+            progress.fingerprints.add(signals.fingerprint)
+
+            if page == 1:
+                progress.per_page = signals.records
+            total_pages = None
+            if signals.total_results is not None and progress.per_page:
+                total_pages = max(1, math.ceil(signals.total_results / progress.per_page))
+                if progress.failed_page is None:
+                    progress.last_page = total_pages
+
+            if total_pages is None and progress.failed_page is None:
+                total_pages = progress.last_page
+
+            if total_pages is not None and page >= total_pages:
+                self._finish(progress, f"covered all {total_pages} pages")
+            elif page >= self.max_pages:
+                self._finish(progress, f"reached max pages ({self.max_pages})")
+            elif signals.has_next is None and progress.per_page and signals.records < progress.per_page:
+                self._finish(progress, f"page {page} is short ({signals.records}/{progress.per_page})")
+            elif progress.failed_page is not None and page >= progress.last_page:
+                self._finish(progress, f"page {progress.failed_page} failed to fetch", failed=True)
+            return True, self._next_jobs(locality)
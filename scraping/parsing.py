@@ -0,0 +1,79 @@
+"""
+HTML parser backend selection and card-only (strained) parsing.
+
+Pages are parsed with the fastest available BeautifulSoup tree builder
+(lxml, a C parser) instead of the pure-Python ``html.parser``, and only the
+subtrees that can hold rate/listing cards are built. Everything outside
+those subtrees (scripts, navigation, footers) is skipped during parsing,
+so ``find_all`` afterwards walks a much smaller tree.
+
+Set ``SCRAPER_HTML_BACKEND=html.parser`` to force the old builder.
+"""
+
+import os
+import re
+from typing import Callable, Dict, Optional
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml  # noqa: F401
+    _LXML_AVAILABLE = True
+except ImportError:
+    _LXML_AVAILABLE = False
+
+DEFAULT_BACKEND = os.environ.get("SCRAPER_HTML_BACKEND") or ("lxml" if _LXML_AVAILABLE else "html.parser")
+
+
+def _class_tokens(attrs: Dict) -> list:
+    value = attrs.get("class") if attrs else None
+    if not value:
+        return []
+    if isinstance(value, str):
+        return value.split()
+    return list(value)
+
+
+class CardStrainer(SoupStrainer):
+    """
+    ``parse_only`` filter driven by a ``predicate(name, class_tokens)``.
+    Top-level tags the predicate rejects are dropped; accepted tags are kept
+    with their whole subtree, so ``find_all`` over the strained soup returns
+    the same cards as over the full document.
+    """
+
+    def __init__(self, predicate: Callable[[str, list], bool]):
+        # A name rule that never matches keeps stray top-level text out
+        super().__init__(name=lambda _name: False)
+        self.predicate = predicate
+
+    def _accepts(self, name, attrs) -> bool:
+        return self.predicate(name, _class_tokens(attrs))
+
+    # bs4 >= 4.13
+    def allow_tag_creation(self, nsprefix, name, attrs) -> bool:
+        return self._accepts(name, attrs)
+
+    # bs4 < 4.13
+    def search_tag(self, markup_name=None, markup_attrs={}):
+        if isinstance(markup_name, str):
+            return self._accepts(markup_name, dict(markup_attrs or {}))
+        return super().search_tag(markup_name, markup_attrs)
+
+
+# scraper_mira_road.scrape_99acres: div/section with tuple|card|locality|area classes
+RATE_CARD_CLASS_RE = re.compile(r'(tuple|card|locality|area)', re.I)
+RATE_CARD_STRAINER = CardStrainer(
+    lambda name, classes: name in ('div', 'section') and any(RATE_CARD_CLASS_RE.search(c) for c in classes)
+)
+
+# scrape_properties_enhanced.scrape_locality_properties: tupleNew/srpTuple cards, article or srpWrap fallbacks
+LISTING_CARD_CLASSES = {'tupleNew', 'srpTuple', 'srpWrap'}
+LISTING_CARD_STRAINER = CardStrainer(
+    lambda name, classes: name == 'article' or (name == 'div' and not LISTING_CARD_CLASSES.isdisjoint(classes))
+)
+
+
+def make_soup(markup, parse_only: Optional[SoupStrainer] = None, backend: Optional[str] = None) -> BeautifulSoup:
+    """Parse ``markup`` with the configured backend, optionally building only strained subtrees"""
+    return BeautifulSoup(markup, backend or DEFAULT_BACKEND, parse_only=parse_only)
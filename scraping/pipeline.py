@@ -0,0 +1,214 @@
+"""
+Staged fetch -> parse -> write pipeline.
+
+I/O threads fetch pages, a process pool parses them, and the calling thread
+writes records as parse results complete. A bounded queue sits between
+fetch and parse, and a semaphore caps how many pages are being parsed or
+waiting to be written, so a slow stage applies backpressure instead of
+letting pages pile up in memory.
+
+``parse`` runs in worker processes: it must be a module-level function and
+its inputs/outputs picklable (page bytes in, record dicts out). Workers are
+started with forkserver (spawn where that is missing), never fork: by the
+time the first page is parsed the fetch threads are running and hold
+locks (cache database, rate limiter, logging) a forked child would inherit
+mid-use. Nothing is inherited, so ``initializer`` sets up whatever
+process-wide state ``parse`` reads, and the run metrics a worker records
+are drained and merged back with each result.
+
+The job set may grow while the pipeline runs: ``on_fetched`` and ``sink``
+can return follow-up jobs (e.g. the next result page), and the pipeline
+finishes once every queued job has been written or dropped.
+"""
+
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable, Iterable, Optional
+
+from scraping.metrics import default_metrics
+
+logger = logging.getLogger("Pipeline")
+
+_DONE = object()
+
+
+@dataclass
+class PipelineStats:
+    jobs: int = 0
+    fetched: int = 0
+    fetch_failed: int = 0
+    skipped: int = 0
+    parse_failed: int = 0
+    parse_seconds: float = 0.0
+    elapsed: float = 0.0
+
+
+def _timed_parse(parse: Callable, job, body: bytes, drain_metrics: bool):
+    """Runs in the parse worker: the result, the worker-side parse time and, from a worker process, its metrics"""
+    start = time.perf_counter()
+    result = parse(job, body)
+    seconds = time.perf_counter() - start
+    return result, seconds, default_metrics().drain() if drain_metrics else None
+
+
+def _worker_context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def run_pipeline(
+    jobs: Iterable[Hashable],
+    fetch: Callable[[Any], Optional[bytes]],
+    parse: Callable[[Any, bytes], Any],
+    sink: Callable[[Any, Any], Optional[Iterable[Hashable]]],
+    fetch_workers: int = 4,
+    parse_workers: Optional[int] = None,
+    queue_size: int = 8,
+    should_fetch: Optional[Callable[[Any], bool]] = None,
+    on_fetched: Optional[Callable[[Any, bool], Optional[Iterable[Hashable]]]] = None,
+    kind: str = "page",
+    initializer: Optional[Callable] = None,
+    initargs: tuple = (),
+) -> PipelineStats:
+    """
+    Run every job through fetch -> parse -> sink.
+
+    ``fetch(job)`` returns the page body or None to skip the job.
+    ``parse(job, body)`` returns the page result; ``sink(job, result)`` is
+    called on the calling thread, one job at a time, in the order pages
+    reached the parse stage (``result`` is None when parsing failed).
+    ``should_fetch(job)`` can drop a queued job before it is fetched, and
+    ``on_fetched(job, ok)`` runs right after each fetch. Both ``on_fetched``
+    and ``sink`` may return follow-up jobs.
+    ``parse_workers=0`` parses on a single thread instead of a process pool;
+    otherwise ``initializer(*initargs)`` runs once in each worker process.
+    Parse times are recorded in the run metrics under ``kind``.
+    """
+    stats = PipelineStats()
+    metrics = default_metrics()
+    start = time.monotonic()
+    fetch_workers = max(1, fetch_workers)
+
+    job_q: "queue.Queue" = queue.Queue()
+    parse_q: "queue.Queue" = queue.Queue(maxsize=queue_size)
+    write_q: "queue.Queue" = queue.Queue()
+    in_flight = threading.BoundedSemaphore(queue_size)
+    lock = threading.Lock()
+    outstanding = [0]
+
+    def enqueue(new_jobs):
+        for job in new_jobs or ():
+            with lock:
+                outstanding[0] += 1
+                stats.jobs += 1
+            job_q.put(job)
+
+    def finish_job():
+        # Called once per job after it is written or dropped; follow-ups are
+        # enqueued before this, so reaching zero means no work is left
+        with lock:
+            outstanding[0] -= 1
+            done = outstanding[0] == 0
+        if done:
+            for _ in range(fetch_workers):
+                job_q.put(_DONE)
+
+    def fetch_worker():
+        for job in iter(job_q.get, _DONE):
+            if should_fetch is not None and not should_fetch(job):
+                with lock:
+                    stats.skipped += 1
+                finish_job()
+                continue
+            try:
+                body = fetch(job)
+            except Exception as e:
+                logger.error(f"Fetch failed for {job}: {e}")
+                body = None
+            with lock:
+                if body is None:
+                    stats.fetch_failed += 1
+                else:
+                    stats.fetched += 1
+            if body is None:
+                if on_fetched is not None:
+                    enqueue(on_fetched(job, False))
+                finish_job()
+                continue
+            # Hold the job count open until follow-ups are queued, so the writer
+            # finishing this job first cannot end the run early
+            with lock:
+                outstanding[0] += 1
+            # Queue the page before its follow-ups so pages of one chain reach
+            # the parse stage (and the sink) in order
+            parse_q.put((job, body))  # blocks while the parse stage is saturated
+            if on_fetched is not None:
+                enqueue(on_fetched(job, True))
+            finish_job()
+
+    def dispatcher(executor: Executor):
+        for job, body in iter(parse_q.get, _DONE):
+            in_flight.acquire()  # released by the writer once the result is consumed
+            try:
+                future = executor.submit(_timed_parse, parse, job, body, processes)
+            except Exception as e:
+                # A broken pool: the writer reports the page as a failed parse
+                future = Future()
+                future.set_exception(e)
+            write_q.put((job, future))
+        write_q.put(_DONE)
+
+    initial = list(jobs)
+    if not initial:
+        stats.elapsed = time.monotonic() - start
+        return stats
+    enqueue(initial)
+
+    processes = parse_workers != 0
+    executor: Executor = (
+        ProcessPoolExecutor(parse_workers, mp_context=_worker_context(), initializer=initializer, initargs=initargs)
+        if processes else ThreadPoolExecutor(1)
+    )
+    with executor:
+        fetchers = [threading.Thread(target=fetch_worker, daemon=True) for _ in range(fetch_workers)]
+        for t in fetchers:
+            t.start()
+        dispatch = threading.Thread(target=dispatcher, args=(executor,), daemon=True)
+        dispatch.start()
+
+        def close_parse_queue():
+            for t in fetchers:
+                t.join()
+            parse_q.put(_DONE)
+
+        closer = threading.Thread(target=close_parse_queue, daemon=True)
+        closer.start()
+
+        for job, future in iter(write_q.get, _DONE):
+            try:
+                result, seconds, worker_metrics = future.result()
+                metrics.merge(worker_metrics)
+                stats.parse_seconds += seconds
+                metrics.observe("parse_seconds", seconds, kind=kind)
+                metrics.inc("pages_parsed_total", kind=kind)
+            except Exception as e:
+                logger.error(f"Parse failed for {job}: {e}")
+                stats.parse_failed += 1
+                result = None
+            finally:
+                in_flight.release()
+            try:
+                enqueue(sink(job, result))
+            finally:
+                finish_job()
+
+        closer.join()
+        dispatch.join()
+
+    stats.elapsed = time.monotonic() - start
+    return stats
@@ -0,0 +1,287 @@
+"""
+Persistent builder profile store.
+
+Profiles are kept per resolved builder name (see ``scraping.builders``) in
+SQLite, one row per field:
+
+    builder_fields(builder, field, value, source, updated_at)
+
+Each field has its own time-to-live (ratings go stale faster than project
+counts), so a lookup only asks the sources for fields that are missing or
+expired. Sources are tried in order and the first one that knows a field
+wins:
+
+* ``RERADumpSource`` - a CSV/JSON/NDJSON export with one row per promoter;
+* ``HeuristicSource`` - the tier-based estimates the scraper always used,
+  seeded by builder name so the same builder always gets the same numbers.
+
+Repeat crawls therefore reuse stored profiles instead of regenerating them.
+
+    python -m scraping.profiles lookup Lodha "Sheth Developers" --rera-dump data/maharera_promoters.csv
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import sqlite3
+import time
+import zlib
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from scraping.builders import default_builder_index
+
+DEFAULT_PROFILES_PATH = os.path.join("data", "builder_profiles.sqlite")
+
+DAY = 24 * 3600
+# Profile fields and how long a stored value stays fresh, in seconds
+PROFILE_FIELDS: Dict[str, float] = {
+    "rera_registered": 30 * DAY,
+    "rera_number": 30 * DAY,
+    "on_time_delivery_rate": 90 * DAY,
+    "total_projects": 30 * DAY,
+    "completed_projects": 30 * DAY,
+    "avg_customer_rating": 7 * DAY,
+    "resale_velocity_index": 30 * DAY,
+    "legal_issues_count": 7 * DAY,
+}
+
+PREMIUM_BUILDERS = {"Lodha", "Godrej", "Tata", "Oberoi", "Hiranandani"}
+MID_TIER_BUILDERS = {"Runwal", "Kalpataru", "Shapoorji", "Mahindra", "Piramal"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS builder_fields (
+    builder TEXT NOT NULL,
+    field TEXT NOT NULL,
+    value TEXT NOT NULL,
+    source TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (builder, field)
+) WITHOUT ROWID;
+"""
+_IN_CHUNK = 500   # stay under SQLite's bound-parameter limit
+
+
+class HeuristicSource:
+    """Tier-based profile estimates, deterministic per builder name"""
+
+    name = "heuristic"
+
+    def profile(self, builder: str) -> Dict:
+        rng = random.Random(zlib.crc32(builder.encode("utf-8")))
+        if builder in PREMIUM_BUILDERS:
+            profile = {
+                "rera_registered": True,
+                "on_time_delivery_rate": rng.randint(85, 95),
+                "total_projects": rng.randint(40, 80),
+                "completed_projects": rng.randint(35, 70),
+                "avg_customer_rating": round(rng.uniform(4.0, 4.7), 1),
+                "resale_velocity_index": rng.randint(75, 90),
+                "legal_issues_count": rng.randint(0, 2),
+            }
+        elif builder in MID_TIER_BUILDERS:
+            profile = {
+                "rera_registered": True,
+                "on_time_delivery_rate": rng.randint(70, 85),
+                "total_projects": rng.randint(20, 40),
+                "completed_projects": rng.randint(15, 35),
+                "avg_customer_rating": round(rng.uniform(3.5, 4.2), 1),
+                "resale_velocity_index": rng.randint(60, 75),
+                "legal_issues_count": rng.randint(1, 4),
+            }
+        else:
+            profile = {
+                "rera_registered": rng.choice([True, False]),
+                "on_time_delivery_rate": rng.randint(55, 75),
+                "total_projects": rng.randint(5, 20),
+                "completed_projects": rng.randint(3, 15),
+                "avg_customer_rating": round(rng.uniform(3.0, 3.8), 1),
+                "resale_velocity_index": rng.randint(40, 65),
+                "legal_issues_count": rng.randint(2, 8),
+            }
+        profile["completed_projects"] = min(profile["completed_projects"], profile["total_projects"])
+        return profile
+
+    def fetch(self, builders: Sequence[str]) -> Dict[str, Dict]:
+        return {builder: self.profile(builder) for builder in builders}
+
+
+class RERADumpSource:
+    """
+    Promoter rows from a RERA export (.csv, .json list or .ndjson). Column
+    names vary between exports, so each field accepts a few aliases;
+    promoter names are resolved through the builder index.
+    """
+
+    name = "rera_dump"
+    COLUMNS = {
+        "name": ("promoter_name", "promoter", "builder", "name"),
+        "rera_number": ("registration_number", "rera_number", "promoter_registration_no"),
+        "total_projects": ("total_projects", "projects_registered"),
+        "completed_projects": ("completed_projects", "projects_completed"),
+        "on_time_delivery_rate": ("on_time_delivery_rate", "on_time_completion_pct"),
+        "legal_issues_count": ("legal_issues_count", "complaints", "complaint_count"),
+    }
+    INT_FIELDS = ("total_projects", "completed_projects", "on_time_delivery_rate", "legal_issues_count")
+
+    def __init__(self, path: str):
+        self.path = path
+        self._profiles: Optional[Dict[str, Dict]] = None
+
+    def _rows(self) -> Iterable[Dict]:
+        with open(self.path, newline="", encoding="utf-8") as f:
+            if self.path.endswith(".csv"):
+                yield from csv.DictReader(f)
+            elif self.path.endswith(".ndjson"):
+                yield from (json.loads(line) for line in f if line.strip())
+            else:
+                yield from json.load(f)
+
+    def _load(self) -> Dict[str, Dict]:
+        index = default_builder_index()
+        profiles = {}
+        for row in self._rows():
+            values = {}
+            for field, aliases in self.COLUMNS.items():
+                value = next((row[a] for a in aliases if row.get(a) not in (None, "")), None)
+                if value is None:
+                    continue
+                if field in self.INT_FIELDS:
+                    try:
+                        value = int(float(value))
+                    except (TypeError, ValueError):
+                        continue
+                values[field] = value
+            raw_name = str(values.pop("name", "")).strip()
+            if not raw_name:
+                continue
+            values["rera_registered"] = True
+            profiles[index.resolve(raw_name) or raw_name] = values
+        return profiles
+
+    def fetch(self, builders: Sequence[str]) -> Dict[str, Dict]:
+        if self._profiles is None:
+            self._profiles = self._load()
+        return {builder: self._profiles[builder] for builder in builders if builder in self._profiles}
+
+
+class BuilderProfileStore:
+    """SQLite-backed builder profiles with per-field TTL and batch lookup"""
+
+    def __init__(self, path: str = DEFAULT_PROFILES_PATH, sources: Optional[List] = None,
+                 ttl: Optional[Dict[str, float]] = None):
+        self.path = path
+        self.sources = sources if sources is not None else [HeuristicSource()]
+        self.ttl = {**PROFILE_FIELDS, **(ttl or {})}
+        self.counts = Counter()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path)
+        self._db.executescript(SCHEMA)
+
+    def _stored(self, builders: Sequence[str]) -> Dict[str, Dict[str, tuple]]:
+        stored: Dict[str, Dict[str, tuple]] = {}
+        for i in range(0, len(builders), _IN_CHUNK):
+            chunk = builders[i:i + _IN_CHUNK]
+            rows = self._db.execute(
+                f"SELECT builder, field, value, source, updated_at FROM builder_fields "
+                f"WHERE builder IN ({','.join('?' * len(chunk))})", chunk,
+            )
+            for builder, field, value, source, updated_at in rows:
+                stored.setdefault(builder, {})[field] = (json.loads(value), source, updated_at)
+        return stored
+
+    def lookup(self, builders: Iterable[str], now: Optional[float] = None) -> Dict[str, Dict]:
+        """
+        Profiles for many builders at once. Fresh stored fields are reused;
+        missing or expired ones are fetched from the sources in one batch per
+        source and written back in a single transaction.
+        """
+        now = time.time() if now is None else now
+        builders = list(dict.fromkeys(builders))
+        stored = self._stored(builders)
+
+        values = {b: {} for b in builders}
+        wanted = {}
+        for builder in builders:
+            fields = stored.get(builder, {})
+            for field, ttl in self.ttl.items():
+                if field in fields and now - fields[field][2] < ttl:
+                    values[builder][field] = fields[field][0]
+            missing = [f for f in self.ttl if f not in values[builder]]
+            if missing:
+                wanted[builder] = missing
+        self.counts["cached"] += len(builders) - len(wanted)
+        self.counts["refreshed"] += len(wanted)
+
+        rows = []
+        for source in self.sources:
+            if not wanted:
+                break
+            for builder, fetched in source.fetch(list(wanted)).items():
+                for field in [f for f in wanted[builder] if fetched.get(f) is not None]:
+                    values[builder][field] = fetched[field]
+                    rows.append((builder, field, json.dumps(fetched[field]), source.name, now))
+                    wanted[builder].remove(field)
+                if not wanted[builder]:
+                    del wanted[builder]
+        # Fields no source knows (e.g. rera_number without a dump) keep their
+        # last value, or are stored as unknown, so they are not asked for
+        # again until their TTL runs out
+        for builder, fields in wanted.items():
+            for field in fields:
+                value, source, _ = stored.get(builder, {}).get(field, (None, "unknown", None))
+                values[builder][field] = value
+                rows.append((builder, field, json.dumps(value), source, now))
+
+        with self._db:
+            self._db.executemany(
+                "INSERT INTO builder_fields (builder, field, value, source, updated_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (builder, field) DO UPDATE SET value = excluded.value, "
+                "source = excluded.source, updated_at = excluded.updated_at",
+                rows,
+            )
+        return {b: {"name": b, **{f: values[b][f] for f in self.ttl if values[b].get(f) is not None}}
+                for b in builders}
+
+    def get(self, builder: str) -> Dict:
+        return self.lookup([builder])[builder]
+
+    def count(self) -> int:
+        return self._db.execute("SELECT COUNT(DISTINCT builder) FROM builder_fields").fetchone()[0]
+
+    def close(self):
+        self._db.close()
+
+
+def profile_sources(rera_dump: Optional[str] = None) -> List:
+    """The RERA dump (when given) first, the heuristic estimates as fallback"""
+    return ([RERADumpSource(rera_dump)] if rera_dump else []) + [HeuristicSource()]
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--profiles-db", default=DEFAULT_PROFILES_PATH, help="Builder profile store")
+    parser.add_argument("--rera-dump", help="RERA promoter export (.csv/.json/.ndjson) preferred over estimates")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Builder profile store")
+    add_profile_arguments(parser)
+    sub = parser.add_subparsers(dest="command", required=True)
+    look = sub.add_parser("lookup", help="Print profiles, refreshing expired fields")
+    look.add_argument("builders", nargs="+")
+    args = parser.parse_args(argv)
+
+    index = default_builder_index()
+    store = BuilderProfileStore(args.profiles_db, profile_sources(args.rera_dump))
+    try:
+        names = [index.resolve(name) or name for name in args.builders]
+        for profile in store.lookup(names).values():
+            print(json.dumps(profile, ensure_ascii=False))
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+"""
+Opt-in profiling of the scraper stages.
+
+With ``--profile`` the code every scraper goes through is wrapped per stage
+
+    fetch      cached_get (cache lookup, rate limiter, HTTP)
+    parse      embedded JSON, BeautifulSoup construction, FAQ regexes
+    extract    cards / JSON -> records, trend rows
+    export     CSV / columnar / NDJSON / history writes, json.dump
+
+with cProfile and tracemalloc, and a run folder is written to
+``data/profiles/<scraper>_<timestamp>/``:
+
+    <stage>.pstats     cProfile stats of every call of the stage, all threads
+                       merged (``python -m pstats``, snakeviz)
+    <stage>.txt        the same, top functions by cumulative time
+    stacks.folded      sampled call stacks rooted at their stage, in the
+                       collapsed format flamegraph.pl and speedscope read
+    allocations.txt    peak traced memory per stage, the top allocation sites
+                       of the first calls of each stage, and what the run
+                       still held at the end
+    summary.json       calls, busy time, peak memory and calls left to the
+                       sampler (see below) per stage
+
+Without ``--profile``, ``stage()`` hands back one shared no-op context
+manager and ``staged()`` returns the function unchanged.
+
+Up to Python 3.11 cProfile only sees the thread that enables it, so each
+thread gets its own profile per stage. From 3.12 cProfile sits on
+``sys.monitoring``: one profile can be active per interpreter, and it records
+every thread while enabled. A stage call that finds another thread's profile
+active is therefore left to the stack sampler, which covers all threads, and
+counted in ``unprofiled_calls``; on 3.12+ a stage's ``.pstats`` can also hold
+calls other threads made meanwhile. Work in other processes is invisible
+either way, which is why the properties scraper parses in-process while
+profiling.
+"""
+
+import argparse
+import cProfile
+import contextlib
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("Profiling")
+
+DEFAULT_PROFILE_DIR = os.path.join("data", "profiles")
+# Allocation sites are reported by line; deeper tracebacks multiply tracemalloc's overhead
+TRACE_FRAMES = 1
+MAX_STACK_DEPTH = 96
+_SKIP_FILES = {os.path.abspath(__file__), os.path.abspath(contextlib.__file__)}
+
+
+@dataclass
+class StageStats:
+    calls: int = 0
+    busy_seconds: float = 0.0
+    peak_bytes: int = 0
+    sampled_calls: int = 0
+    unprofiled_calls: int = 0
+
+
+_labels: Dict[object, Optional[str]] = {}   # code object -> label, None for the profiler's own frames
+
+
+def _frame_label(code) -> Optional[str]:
+    if code not in _labels:
+        if os.path.abspath(code.co_filename) in _SKIP_FILES:
+            _labels[code] = None
+        else:
+            module = os.path.splitext(os.path.basename(code.co_filename))[0]
+            _labels[code] = f"{module}:{code.co_name}".replace(";", ",").replace(" ", "_")
+    return _labels[code]
+
+
+def _stack(frame) -> Tuple[str, ...]:
+    """Root-first frame labels of a live frame, leaving out the profiler's own frames"""
+    labels = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        label = _frame_label(frame.f_code)
+        if label is not None:
+            labels.append(label)
+        frame = frame.f_back
+    return tuple(reversed(labels))
+
+
+class Profiler:
+    """Per-stage cProfile, tracemalloc and a stack sampler for one scraper run"""
+
+    def __init__(self, scraper: str, directory: str = DEFAULT_PROFILE_DIR, top: int = 25,
+                 interval: float = 0.005, alloc_samples: int = 3):
+        self.scraper = scraper
+        self.started = time.time()
+        stamp = datetime.fromtimestamp(self.started).strftime("%Y%m%d_%H%M%S")
+        self.run_dir = os.path.join(directory, f"{scraper}_{stamp}")
+        self.top = top
+        self.interval = interval
+        self.alloc_samples = alloc_samples
+        self.stages: Dict[str, StageStats] = {}
+        self._profiles: Dict[str, List[cProfile.Profile]] = {}
+        self._allocations: Dict[str, Counter] = {}
+        self._running: Dict[int, List[str]] = {}   # thread id -> stage stack, read by the sampler
+        self._stacks: Counter = Counter()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._busy = 0                              # stages running in any thread
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._baseline = None
+
+    def start(self) -> "Profiler":
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACE_FRAMES)
+        self._baseline = self._snapshot()
+        self._sampler = threading.Thread(target=self._sample, daemon=True, name="profile-sampler")
+        self._sampler.start()
+        return self
+
+    @staticmethod
+    def _snapshot():
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ])
+
+    def _thread_profile(self, name: str) -> cProfile.Profile:
+        profiles = getattr(self._local, "profiles", None)
+        if profiles is None:
+            profiles = self._local.profiles = {}
+        profile = profiles.get(name)
+        if profile is None:
+            profile = profiles[name] = cProfile.Profile()
+        return profile
+
+    def _enable(self, name: str) -> bool:
+        """Enable this thread's profile of the stage; False if another profile holds the interpreter (3.12+)"""
+        profile = self._thread_profile(name)
+        try:
+            profile.enable()
+        except ValueError:
+            return False
+        with self._lock:
+            profiles = self._profiles.setdefault(name, [])
+            if profile not in profiles:
+                profiles.append(profile)
+        return True
+
+    @contextmanager
+    def stage(self, name: str):
+        tid = threading.get_ident()
+        with self._lock:
+            stack = self._running.setdefault(tid, [])
+            # A stage entered again from inside itself counts toward the outer call
+            nested = name in stack
+            if not nested:
+                outer = stack[-1] if stack else None
+                stats = self.stages.setdefault(name, StageStats())
+                stats.calls += 1
+                sample = stats.sampled_calls < self.alloc_samples
+                stats.sampled_calls += sample
+                if self._busy == 0:
+                    tracemalloc.reset_peak()
+                self._busy += 1
+        if nested:
+            yield
+            return
+
+        # Only a profile this thread enabled may be disabled: on 3.11 disable()
+        # clears the thread's profiler whichever profile it is called on
+        enabled = getattr(self._local, "enabled", None)
+        if enabled is None:
+            enabled = self._local.enabled = {}
+        if outer is not None and enabled.pop(outer, False):
+            self._thread_profile(outer).disable()
+        before = self._snapshot() if sample else None
+        start_bytes = tracemalloc.get_traced_memory()[0]
+        with self._lock:
+            stack.append(name)
+        start = time.perf_counter()
+        profiled = enabled[name] = self._enable(name)
+        try:
+            yield
+        finally:
+            if enabled.pop(name):
+                self._thread_profile(name).disable()
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1] - start_bytes
+            with self._lock:
+                stack.pop()
+                self._busy -= 1
+                stats.busy_seconds += elapsed
+                stats.peak_bytes = max(stats.peak_bytes, peak)
+                stats.unprofiled_calls += not profiled
+            if before is not None:
+                grown = Counter()
+                for diff in self._snapshot().compare_to(before, "lineno"):
+                    if diff.size_diff > 0:
+                        grown[str(diff.traceback)] += diff.size_diff
+                with self._lock:
+                    self._allocations.setdefault(name, Counter()).update(grown)
+            if outer is not None:
+                enabled[outer] = self._enable(outer)
+
+    def _sample(self):
+        """Record the stack of every thread that is inside a stage, every ``interval`` seconds"""
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            with self._lock:
+                running = [(tid, stack[-1]) for tid, stack in self._running.items() if stack]
+            for tid, name in running:
+                frame = frames.get(tid)
+                if frame is not None:
+                    self._stacks[(name,) + _stack(frame)] += 1
+
+    def finish(self) -> str:
+        """Stop sampling and tracing and write the run folder; returns its path"""
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        final = self._snapshot()
+        tracemalloc.stop()
+        os.makedirs(self.run_dir, exist_ok=True)
+
+        for name, profiles in sorted(self._profiles.items()):
+            stats = pstats.Stats(profiles[0])
+            for profile in profiles[1:]:
+                stats.add(profile)
+            stats.dump_stats(os.path.join(self.run_dir, f"{name}.pstats"))
+            with open(os.path.join(self.run_dir, f"{name}.txt"), "w", encoding="utf-8") as f:
+                stats.stream = f
+                stats.sort_stats("cumulative").print_stats(self.top)
+
+        with open(os.path.join(self.run_dir, "stacks.folded"), "w", encoding="utf-8") as f:
+            for stack, count in sorted(self._stacks.items()):
+                f.write(f"{';'.join(stack)} {count}\n")
+
+        with open(os.path.join(self.run_dir, "allocations.txt"), "w", encoding="utf-8") as f:
+            f.write("Traced memory peak per stage (concurrent stages share one peak)\n\n")
+            for name, stats in sorted(self.stages.items()):
+                f.write(f"  {name:<10} {stats.peak_bytes / 2 ** 20:10.2f} MiB  over {stats.calls} calls\n")
+            for name, grown in sorted(self._allocations.items()):
+                f.write(f"\nTop {self.top} allocation sites grown during the first "
+                        f"{self.stages[name].sampled_calls} {name} calls\n\n")
+                for site, size in grown.most_common(self.top):
+                    f.write(f"  {size / 1024:12.1f} KiB  {site}\n")
+            f.write(f"\nTop {self.top} allocation sites still held at the end of the run\n\n")
+            for diff in final.compare_to(self._baseline, "lineno")[:self.top]:
+                f.write(f"  {diff.size_diff / 1024:12.1f} KiB  {diff.count_diff:+8d} blocks  {diff.traceback}\n")
+
+        summary = {
+            "scraper": self.scraper,
+            "started": datetime.fromtimestamp(self.started).isoformat(timespec="seconds"),
+            "duration_s": time.time() - self.started,
+            "stack_samples": sum(self._stacks.values()),
+            "stages": {name: asdict(stats) for name, stats in sorted(self.stages.items())},
+        }
+        with open(os.path.join(self.run_dir, "summary.json"), "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        logger.info(f"Profile written to {self.run_dir} ({', '.join(sorted(self._profiles))})")
+        return self.run_dir
+
+
+_profiler: Optional[Profiler] = None
+_NO_STAGE = nullcontext()
+
+
+def active_profiler() -> Optional[Profiler]:
+    return _profiler
+
+
+def stage(name: str):
+    """Context manager around one call of a stage; a shared no-op unless profiling is on"""
+    profiler = _profiler
+    if profiler is None:
+        return _NO_STAGE
+    return profiler.stage(name)
+
+
+def staged(name: str, func: Callable) -> Callable:
+    """``func`` wrapped in ``stage(name)`` while profiling, else ``func`` itself"""
+    profiler = _profiler
+    if profiler is None:
+        return func
+
+    def wrapper(*args, **kwargs):
+        with profiler.stage(name):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def start_profiling(scraper: str, directory: str = DEFAULT_PROFILE_DIR, top: int = 25,
+                    interval: float = 0.005) -> Profiler:
+    global _profiler
+    _profiler = Profiler(scraper, directory, top, interval).start()
+    return _profiler
+
+
+def finish_profiling() -> Optional[str]:
+    """Write the run folder of the active profiler, if any, and switch profiling off"""
+    global _profiler
+    profiler, _profiler = _profiler, None
+    return profiler.finish() if profiler is not None else None
+
+
+def add_profiling_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile each stage (cProfile, tracemalloc, sampled stacks) into a run folder")
+    parser.add_argument("--profile-dir", default=DEFAULT_PROFILE_DIR, help="Where --profile run folders are written")
+    parser.add_argument("--profile-top", type=int, default=25,
+                        help="Functions and allocation sites listed per stage")
+    parser.add_argument("--profile-interval", type=float, default=0.005,
+                        help="Seconds between call-stack samples for stacks.folded")
+
+
+def profiling_from_args(args: argparse.Namespace, scraper: str) -> Optional[Profiler]:
+    if not args.profile:
+        return None
+    return start_profiling(scraper, args.profile_dir, args.profile_top, args.profile_interval)
@@ -0,0 +1,209 @@
+"""
+Adaptive per-host rate limiting for the 99acres scrapers.
+
+Each host gets a token bucket whose refill rate follows AIMD: it grows
+additively while responses are healthy and is cut multiplicatively on
+429/503. A ``Retry-After`` header pauses the host until the server says
+it is ready again. This replaces the fixed ``time.sleep`` delays the
+scrapers used between requests.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+from scraping.metrics import default_metrics
+
+logger = logging.getLogger("RateLimiter")
+
+THROTTLE_STATUSES = (429, 503)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Convert a Retry-After header (delta-seconds or HTTP-date) to seconds"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+@dataclass
+class HostBucket:
+    rate: float
+    capacity: float
+    tokens: float
+    updated: float = field(default_factory=time.monotonic)
+    blocked_until: float = 0.0
+    successes: int = 0
+    throttles: int = 0
+
+
+class AdaptiveRateLimiter:
+    """
+    Thread-safe token bucket per host with AIMD rate control.
+
+    ``acquire`` blocks until the host has a token; ``record`` feeds the
+    response status (and Retry-After) back into the host's rate.
+    """
+
+    def __init__(
+        self,
+        initial_rate: float = 1.0,
+        min_rate: float = 0.05,
+        max_rate: float = 8.0,
+        increase: float = 0.1,
+        decrease: float = 0.5,
+        burst: float = 2.0,
+    ):
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.burst = burst
+        self._buckets: Dict[str, HostBucket] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def host_of(url: str) -> str:
+        return urlsplit(url).netloc or url
+
+    def _bucket(self, host: str) -> HostBucket:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = HostBucket(rate=self.initial_rate, capacity=self.burst, tokens=1.0)
+            self._buckets[host] = bucket
+        return bucket
+
+    def _refill(self, bucket: HostBucket, now: float):
+        bucket.tokens = min(bucket.capacity, bucket.tokens + (now - bucket.updated) * bucket.rate)
+        bucket.updated = now
+
+    def _reserve(self, host: str) -> float:
+        """Take a token if one is available, else return how long to wait"""
+        with self._lock:
+            bucket = self._bucket(host)
+            now = time.monotonic()
+            self._refill(bucket, now)
+            if now < bucket.blocked_until:
+                return bucket.blocked_until - now
+            if bucket.tokens >= 1.0:
+                bucket.tokens -= 1.0
+                return 0.0
+            return (1.0 - bucket.tokens) / bucket.rate
+
+    def acquire(self, url: str) -> float:
+        """Block until a request to ``url``'s host is allowed; returns seconds waited"""
+        host = self.host_of(url)
+        waited = 0.0
+        while True:
+            wait = self._reserve(host)
+            if wait <= 0:
+                return waited
+            time.sleep(wait)
+            waited += wait
+
+    def record(self, url: str, status_code: Optional[int], retry_after: Optional[float] = None):
+        """Feed a response outcome back into the host's rate"""
+        host = self.host_of(url)
+        with self._lock:
+            bucket = self._bucket(host)
+            now = time.monotonic()
+            self._refill(bucket, now)
+            if status_code in THROTTLE_STATUSES:
+                bucket.throttles += 1
+                bucket.rate = max(self.min_rate, bucket.rate * self.decrease)
+                bucket.tokens = 0.0
+                if retry_after is not None:
+                    bucket.blocked_until = max(bucket.blocked_until, now + retry_after)
+                logger.warning(
+                    f"{host} throttled (status {status_code}, retry-after {retry_after}); "
+                    f"rate -> {bucket.rate:.2f} req/s"
+                )
+            elif status_code is not None and status_code < 500:
+                bucket.successes += 1
+                bucket.rate = min(self.max_rate, bucket.rate + self.increase)
+
+    def rate(self, url: str) -> float:
+        with self._lock:
+            return self._bucket(self.host_of(url)).rate
+
+
+_shared_limiter: Optional[AdaptiveRateLimiter] = None
+_shared_lock = threading.Lock()
+
+
+def shared_limiter() -> AdaptiveRateLimiter:
+    """Process-wide limiter so every scraper paces the same host together"""
+    global _shared_limiter
+    with _shared_lock:
+        if _shared_limiter is None:
+            _shared_limiter = AdaptiveRateLimiter()
+        return _shared_limiter
+
+
+def _transport_retries(response) -> int:
+    """Retries urllib3 made inside ``session.get`` (connection errors, 5xx in status_forcelist)"""
+    retries = getattr(getattr(response, "raw", None), "retries", None)
+    return len(getattr(retries, "history", None) or ())
+
+
+def wire_bytes(response, decoded: int) -> int:
+    """Body bytes read off the connection (before gzip decoding); ``decoded`` where urllib3 does not count them (chunked bodies)"""
+    tell = getattr(getattr(response, "raw", None), "tell", None)
+    return (tell() if callable(tell) else 0) or decoded
+
+
+def throttled_get(session, url: str, limiter: Optional[AdaptiveRateLimiter] = None, max_attempts: int = 3, **kwargs):
+    """
+    ``session.get`` paced by ``limiter``. 429/503 responses are reported to
+    the limiter and retried (after the limiter's backoff) up to
+    ``max_attempts`` times; the last response is returned either way.
+    Every attempt is recorded in the run metrics; with ``stream=True`` the
+    body is left unread and its bytes are for the reader to record.
+    """
+    limiter = limiter or shared_limiter()
+    metrics = default_metrics()
+    host = limiter.host_of(url)
+    response = None
+    for attempt in range(max(1, max_attempts)):
+        if attempt:
+            metrics.inc("retries_total", host=host, kind="throttle")
+        limiter.acquire(url)
+        start = time.perf_counter()
+        try:
+            response = session.get(url, **kwargs)
+        except Exception:
+            metrics.inc("fetch_errors_total", host=host)
+            raise
+        metrics.observe("fetch_seconds", time.perf_counter() - start, host=host)
+        metrics.inc("responses_total", host=host, status=response.status_code)
+        if not kwargs.get("stream"):
+            metrics.inc("response_bytes_total", wire_bytes(response, len(response.content)), host=host)
+        transport = _transport_retries(response)
+        if transport:
+            metrics.inc("retries_total", transport, host=host, kind="transport")
+        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        limiter.record(url, response.status_code, retry_after)
+        if response.status_code not in THROTTLE_STATUSES:
+            break
+        metrics.inc("throttled_total", host=host)
+        if attempt < max_attempts - 1:
+            # Hand the connection back before retrying (a streamed body is still unread)
+            response.close()
+    return response
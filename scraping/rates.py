@@ -0,0 +1,22 @@
+"""
+Typed locality rate/trend values shared by the rate scrapers
+(scrape_all_localities.parse_page and scraper_mira_road.parse_faq_trends).
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class LocalityRates:
+    """Current rate and price movement for one locality page"""
+    current_rate: Optional[int] = None       # ₹ per sq ft
+    rental_yield: Optional[float] = None     # percent
+    change_1y: Optional[float] = None        # percent moved since 1 year
+    change_3y: Optional[float] = None
+    change_5y: Optional[float] = None
+    source: str = "faq"                      # "embedded_json" or "faq"
+
+    @property
+    def has_trend(self) -> bool:
+        return None not in (self.change_1y, self.change_3y, self.change_5y)
@@ -0,0 +1,400 @@
+"""
+Learned selectors for card extraction.
+
+The card parsers find elements with broad searches: a class regex tested
+against every element (rate cards, locality names) or ``find(...) or
+find(...)`` chains (listing card fields). On one kind of page the same
+concrete selector wins every time (``div.localityCard``, ``h3.localityName``,
+``span.srpTuple__price``), so the cache remembers the winner per URL
+template and field and tries it first on later pages. The broad search
+runs only when the learned selector misses, plus on every
+``verify_every``-th lookup to catch layout drift the fast path would not
+notice on its own (say, a second card class next to the learned one). Where
+the broad search picks something else, its winner replaces the learned one
+and the broad result is used, so fallback results match the old parsers;
+between verifications a learned selector that still matches is trusted. The
+fallback for single elements walks the card once for all alternatives
+(``first_match``) rather than once per alternative.
+
+Hits and misses are counted per (template, field, selector); a miss means
+the broad search found something the learned selector did not, while a field
+neither finds is just absent from that card. Once
+``configure_selector_cache`` has named a database they are stored in SQLite
+with the learned selectors, so the next run starts calibrated. Parse
+workers in other processes hand their counts back with ``drain``; the main
+process ``merge``s them and is the only writer.
+"""
+
+import argparse
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Dict, List, Optional, Pattern, Sequence, Tuple, Union
+from urllib.parse import urlsplit
+
+from bs4 import SoupStrainer, Tag
+
+from scraping.metrics import default_metrics
+
+logger = logging.getLogger("SelectorCache")
+
+DEFAULT_SELECTORS_PATH = os.path.join("data", "selectors.sqlite")
+DEFAULT_VERIFY_EVERY = 50
+
+# 99acres paths name the locality between "-in-" and the -ffid/-prffid suffix
+TEMPLATE_SLUG_RE = re.compile(r"-in-[a-z0-9-]+?-(?=(?:pr)?ffid$)")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS selector_stats (
+    template   TEXT NOT NULL,
+    field      TEXT NOT NULL,
+    selector   TEXT NOT NULL,
+    hits       INTEGER NOT NULL DEFAULT 0,
+    misses     INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (template, field, selector)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS learned_selectors (
+    template   TEXT NOT NULL,
+    field      TEXT NOT NULL,
+    selector   TEXT NOT NULL,
+    learned_at REAL NOT NULL,
+    PRIMARY KEY (template, field)
+) WITHOUT ROWID;
+"""
+
+Key = Tuple[str, str]
+
+
+def url_template(url: str) -> str:
+    """Host and path with the locality slug and numbers wildcarded; the query is dropped"""
+    parts = urlsplit(url)
+    path = TEMPLATE_SLUG_RE.sub("-in-*-", parts.path)
+    return parts.netloc + re.sub(r"\d+", "*", path)
+
+
+def _class_tokens(element) -> List[str]:
+    value = element.get("class") or []
+    return value.split() if isinstance(value, str) else list(value)
+
+
+@dataclass(frozen=True)
+class Selector:
+    """
+    ``find(names, class_=classes)``: tag names plus class tokens, a class
+    regex (broad searches only), or no class condition.
+    """
+    names: Tuple[str, ...]
+    classes: Union[None, Tuple[str, ...], Pattern] = None
+
+    @classmethod
+    def of(cls, names: Union[str, Sequence[str]], classes: Union[None, str, Sequence[str], Pattern] = None) -> "Selector":
+        names = (names,) if isinstance(names, str) else tuple(names)
+        if isinstance(classes, str):
+            classes = (classes,)
+        elif classes is not None and not isinstance(classes, re.Pattern):
+            classes = tuple(classes)
+        return cls(names, classes)
+
+    @cached_property
+    def _query(self):
+        """What find/find_all get: a bare tag name (bs4's fast path) or a strainer built once, not per call"""
+        name = self.names[0] if len(self.names) == 1 else list(self.names)
+        if self.classes is None:
+            return name
+        if isinstance(self.classes, re.Pattern):
+            return SoupStrainer(name, class_=self.classes)
+        return SoupStrainer(name, class_=self.classes[0] if len(self.classes) == 1 else list(self.classes))
+
+    def find(self, node):
+        return node.find(self._query)
+
+    def find_all(self, node) -> list:
+        return node.find_all(self._query)
+
+    def matches(self, element) -> bool:
+        """The test ``find`` applies, for class conditions on single tokens"""
+        if element.name not in self.names:
+            return False
+        return self.classes is None or self._matching_class(element) is not None
+
+    def _matching_class(self, element) -> Optional[str]:
+        for token in _class_tokens(element):
+            if self.classes.search(token) if isinstance(self.classes, re.Pattern) else token in self.classes:
+                return token
+        return None
+
+    def concrete(self, elements: Sequence) -> "Selector":
+        """The exact selector for elements this one matched: their tag names and matching class tokens"""
+        names = tuple(sorted({e.name for e in elements}))
+        if self.classes is None:
+            return Selector(names)
+        return Selector(names, tuple(sorted({c for c in map(self._matching_class, elements) if c})))
+
+    def __str__(self) -> str:
+        label = "|".join(self.names)
+        if isinstance(self.classes, re.Pattern):
+            return f"{label}~{self.classes.pattern}"
+        return f"{label}.{'|'.join(self.classes)}" if self.classes else label
+
+    @classmethod
+    def parse(cls, label: str) -> "Selector":
+        names, _, classes = label.partition(".")
+        return cls(tuple(names.split("|")), tuple(classes.split("|")) if classes else None)
+
+
+def _settled(firsts: list) -> bool:
+    """True once an alternative has a non-empty match and every earlier one an empty one"""
+    for found in firsts:
+        if found is None:
+            return False
+        if found:
+            return True
+    return False
+
+
+def first_match(node, selectors: Sequence[Selector]) -> Tuple[Optional[Selector], object]:
+    """
+    ``find(a) or find(b) or ...`` over ``node`` in one walk instead of one
+    per alternative: the first alternative whose first match is non-empty and
+    that match, else (None, the last alternative's match)
+    """
+    firsts = [None] * len(selectors)
+    for element in node.descendants:
+        if not isinstance(element, Tag):
+            continue
+        new = False
+        for i, selector in enumerate(selectors):
+            if firsts[i] is None and selector.matches(element):
+                firsts[i] = element
+                new = True
+        if new and _settled(firsts):
+            break
+    for selector, found in zip(selectors, firsts):
+        if found:
+            return selector, found
+    return None, firsts[-1] if firsts else None
+
+
+def _same(a: list, b: list) -> bool:
+    return len(a) == len(b) and all(x is y for x, y in zip(a, b))
+
+
+class SelectorCache:
+    """Learned winning selector per (URL template, field), with hit/miss counts"""
+
+    def __init__(self, path: Optional[str] = None, verify_every: int = DEFAULT_VERIFY_EVERY, enabled: bool = True):
+        self.path = path
+        self.verify_every = verify_every
+        self.enabled = enabled
+        self.learned: Dict[Key, Selector] = {}
+        self.counts: Dict[Tuple[str, str, str], List[int]] = {}   # [hits, misses] not yet drained/flushed
+        self._relearned: Dict[Key, Selector] = {}
+        self._lookups: Dict[Key, int] = {}
+        self._lock = threading.Lock()
+        if path and enabled and os.path.exists(path):
+            self._load()
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        db = sqlite3.connect(self.path, timeout=30)
+        db.executescript(SCHEMA)
+        return db
+
+    def _load(self):
+        db = self._connect()
+        try:
+            for template, field, selector in db.execute("SELECT template, field, selector FROM learned_selectors"):
+                self.learned[(template, field)] = Selector.parse(selector)
+        finally:
+            db.close()
+
+    # -- lookups --------------------------------------------------------
+    def _fast(self, key: Key) -> Tuple[Optional[Selector], bool]:
+        """Learned selector for ``key`` and whether this lookup is a verification"""
+        learned = self.learned.get(key) if self.enabled else None
+        if learned is None:
+            return None, False
+        with self._lock:
+            n = self._lookups[key] = self._lookups.get(key, 0) + 1
+        return learned, bool(self.verify_every) and n % self.verify_every == 0
+
+    def _count(self, key: Key, selector: Selector, hit: bool):
+        with self._lock:
+            counts = self.counts.setdefault(key + (str(selector),), [0, 0])
+            counts[0 if hit else 1] += 1
+
+    def _learn(self, key: Key, selector: Selector):
+        if self.enabled and self.learned.get(key) != selector:
+            with self._lock:
+                self.learned[key] = self._relearned[key] = selector
+
+    def find(self, template: str, field: str, node, broad: Sequence[Selector]):
+        """First element matched by ``broad`` (tried in order), the learned selector first"""
+        key = (template, field)
+        learned, verify = self._fast(key)
+        if learned is not None:
+            found = learned.find(node)
+            if found and not verify:
+                self._count(key, learned, hit=True)
+                return found
+        winner, result = first_match(node, broad)
+        if learned is not None:
+            # Nothing anywhere is an absent field, not a wrong selector
+            hit = found is result or not (found or result)
+            self._count(key, learned, hit)
+            if hit:
+                return result
+        if winner is not None:
+            self._learn(key, winner.concrete([result]))
+        return result
+
+    def find_all(self, template: str, field: str, node, broad: Sequence[Selector]) -> list:
+        """Elements of the first ``broad`` selector that matches any, the learned selector first"""
+        key = (template, field)
+        learned, verify = self._fast(key)
+        if learned is not None:
+            found = learned.find_all(node)
+            if found and not verify:
+                self._count(key, learned, hit=True)
+                return found
+        result, winner = [], None
+        for selector in broad:
+            result = selector.find_all(node)
+            if result:
+                winner = selector
+                break
+        if learned is not None:
+            hit = _same(found, result)
+            self._count(key, learned, hit)
+            if hit:
+                return result
+        if winner is not None:
+            self._learn(key, winner.concrete(result))
+        return result
+
+    # -- bookkeeping ----------------------------------------------------
+    def drain(self) -> Dict:
+        """Counts and relearned selectors since the last drain, picklable, for ``merge`` in the main process"""
+        with self._lock:
+            delta = {
+                "counts": self.counts,
+                "learned": {key: str(selector) for key, selector in self._relearned.items()},
+            }
+            self.counts, self._relearned = {}, {}
+        return delta
+
+    def merge(self, delta: Optional[Dict]):
+        if not delta:
+            return
+        with self._lock:
+            for key, (hits, misses) in delta["counts"].items():
+                counts = self.counts.setdefault(key, [0, 0])
+                counts[0] += hits
+                counts[1] += misses
+            for key, label in delta["learned"].items():
+                self.learned[key] = self._relearned[key] = Selector.parse(label)
+
+    def totals(self) -> Tuple[int, int]:
+        """Hits and misses not yet flushed"""
+        with self._lock:
+            return sum(c[0] for c in self.counts.values()), sum(c[1] for c in self.counts.values())
+
+    def flush(self):
+        """Record pending counts in the run metrics and, with a database, store them and the learned selectors"""
+        delta = self.drain()
+        hits = sum(c[0] for c in delta["counts"].values())
+        misses = sum(c[1] for c in delta["counts"].values())
+        if hits:
+            default_metrics().inc("selector_lookups_total", hits, result="hit")
+        if misses:
+            default_metrics().inc("selector_lookups_total", misses, result="miss")
+        if not self.path or not self.enabled:
+            return
+        now = time.time()
+        db = self._connect()
+        try:
+            with db:
+                db.executemany(
+                    """INSERT INTO selector_stats (template, field, selector, hits, misses, updated_at)
+                       VALUES (?, ?, ?, ?, ?, ?)
+                       ON CONFLICT (template, field, selector) DO UPDATE SET
+                           hits = hits + excluded.hits, misses = misses + excluded.misses,
+                           updated_at = excluded.updated_at""",
+                    [key + (h, m, now) for key, (h, m) in delta["counts"].items()],
+                )
+                db.executemany(
+                    """INSERT INTO learned_selectors (template, field, selector, learned_at) VALUES (?, ?, ?, ?)
+                       ON CONFLICT (template, field) DO UPDATE SET
+                           selector = excluded.selector, learned_at = excluded.learned_at""",
+                    [key + (label, now) for key, label in delta["learned"].items()],
+                )
+        finally:
+            db.close()
+        logger.info(f"Selector cache: {hits} hits, {misses} misses, {len(delta['learned'])} selectors (re)learned "
+                    f"-> {self.path}")
+
+    def history(self) -> List[Tuple]:
+        """Stored (template, field, selector, hits, misses, updated_at) rows"""
+        if not self.path or not os.path.exists(self.path):
+            return []
+        db = self._connect()
+        try:
+            return db.execute(
+                "SELECT template, field, selector, hits, misses, updated_at FROM selector_stats "
+                "ORDER BY template, field, hits DESC"
+            ).fetchall()
+        finally:
+            db.close()
+
+
+_selector_cache = SelectorCache()
+
+
+def default_selector_cache() -> SelectorCache:
+    return _selector_cache
+
+
+def configure_selector_cache(path: Optional[str] = DEFAULT_SELECTORS_PATH, enabled: bool = True,
+                             verify_every: int = DEFAULT_VERIFY_EVERY) -> SelectorCache:
+    """Install the process-wide cache, loading the selectors learned by earlier runs from ``path``"""
+    global _selector_cache
+    _selector_cache = SelectorCache(path, verify_every, enabled)
+    return _selector_cache
+
+
+def add_selector_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--selectors-db", default=DEFAULT_SELECTORS_PATH,
+                        help="Learned card selectors and their hit/miss history")
+    parser.add_argument("--no-learned-selectors", action="store_true",
+                        help="Always run the broad card/field searches")
+    parser.add_argument("--selector-verify-every", type=int, default=DEFAULT_VERIFY_EVERY,
+                        help="Re-run the broad search on every Nth lookup to catch layout drift (0 never)")
+
+
+def configure_selector_cache_from_args(args: argparse.Namespace) -> SelectorCache:
+    return configure_selector_cache(args.selectors_db, not args.no_learned_selectors, args.selector_verify_every)
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Show learned card selectors and their hit/miss history")
+    parser.add_argument("--selectors-db", default=DEFAULT_SELECTORS_PATH)
+    args = parser.parse_args(argv)
+
+    cache = SelectorCache(args.selectors_db)
+    for (template, field), selector in sorted(cache.learned.items()):
+        print(f"{template}  {field:<12} -> {selector}")
+    print()
+    for template, field, selector, hits, misses, updated in cache.history():
+        rate = hits / (hits + misses) if hits + misses else 0.0
+        print(f"{template}  {field:<12} {selector:<40} {hits:>8} hits {misses:>6} misses ({rate:.0%})")
+
+
+if __name__ == "__main__":
+    main()
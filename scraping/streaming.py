@@ -0,0 +1,251 @@
+"""
+Streaming fetch for pages where only a few fields matter.
+
+The locality pages carry their rate, yield and trend in either the embedded
+page JSON or a few FAQ sentences, and the rate-card page in its embedded
+locality list; the rest of a 1 MB+ page is navigation, scripts and footer.
+``stream_scan`` GETs with ``stream=True``, decodes ``iter_content`` chunks
+incrementally with the charset the response declares (no charset
+detection over the whole body), and feeds the text to a ``PageScanner``.
+Reading stops as soon as the scanner has every field it needs or
+``max_bytes`` have been read, and the connection is closed, so the rest of
+the page is never downloaded, decoded or parsed.
+
+Scanners keep a bounded tail of the text, plus the state blob once it has
+started, never the whole decoded page. The raw body is collected only when
+it goes into the cache or the scanner's fallback parses the whole page.
+
+Fresh cache hits are scanned from the stored body. Pages fetched from the
+network are stored in the response cache only when the whole body was
+received, including a scanner done on its last piece; a page cut short by
+an early stop or the budget is not a page. ``response_bytes_total`` counts
+bytes as they came off the connection, before gzip decoding.
+"""
+
+import abc
+import argparse
+import codecs
+import logging
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+import requests
+
+from scraping.cache import CachedResponse, active_cache, cached_get
+from scraping.embedded_state import (NEXT_DATA_MARKER, REACT_STATE_MARKER, SCRIPT_END, extract_embedded_state,
+                                     locality_rates_from_state)
+from scraping.faq import FaqScanner
+from scraping.metrics import default_metrics
+from scraping.profiling import stage
+from scraping.rate_limit import AdaptiveRateLimiter, wire_bytes
+
+logger = logging.getLogger("Streaming")
+
+CHUNK_SIZE = 64 * 1024
+DEFAULT_BYTE_BUDGET = 4 * 1024 * 1024      # as far as extract_embedded_state looks for the state blob
+DEFAULT_ENCODING = "utf-8"
+CHARSET_RE = re.compile(r"charset\s*=\s*[\"']?([\w.:-]+)", re.I)
+
+
+def declared_encoding(response) -> str:
+    """Charset from the Content-Type header, else UTF-8 (what 99acres serves)"""
+    match = CHARSET_RE.search(response.headers.get("Content-Type") or "")
+    encoding = match.group(1) if match else None
+    if encoding is None and isinstance(response, CachedResponse):
+        # Cache entries keep the encoding their body was first decoded with
+        encoding = response.encoding
+    try:
+        return codecs.lookup(encoding or DEFAULT_ENCODING).name
+    except LookupError:
+        return DEFAULT_ENCODING
+
+
+class PageScanner(abc.ABC):
+    """
+    Consumes a page's decoded text chunk by chunk, keeping only what it
+    still needs (a bounded tail, a state blob that has started). ``feed``
+    returns True once the scanner has what it needs; ``result`` gives the
+    value for whatever was read, complete page or not. A scanner whose
+    fallback parses the whole page sets ``needs_body`` and is handed the
+    raw bytes read.
+    """
+
+    needs_body = False
+
+    @abc.abstractmethod
+    def feed(self, chunk: str) -> bool:
+        """Look at the next piece of text; True once done"""
+
+    @abc.abstractmethod
+    def result(self, body: Optional[bytes] = None) -> Any:
+        """Value for what was read; ``body`` is set when ``needs_body`` is"""
+
+
+class EmbeddedStateScanner(PageScanner):
+    """
+    Waits for the ``__NEXT_DATA__`` / ``reactInitialState`` blob to close and
+    maps it with ``from_state``; done when that gives a value. Otherwise
+    ``fallback`` runs over the body read once reading stops. Text before the
+    blob is dropped as it is scanned; the blob itself is kept until it closes.
+    """
+
+    _MARKER_TAIL = max(len(NEXT_DATA_MARKER), len(REACT_STATE_MARKER)) - 1
+
+    def __init__(self, from_state: Callable[[Optional[Dict]], Any], fallback: Callable[[Optional[bytes]], Any],
+                 needs_body: bool = True):
+        self.from_state = from_state
+        self.fallback = fallback
+        self.needs_body = needs_body
+        self.state_value = None
+        self._tail = ""          # end of the text before the blob, for a marker cut by a chunk boundary
+        self._blob = None        # pieces of the blob, once its marker has been seen
+        self._seam = ""          # end of the blob so far, for a closing tag cut by a chunk boundary
+        self._state_done = False
+
+    def _check_state(self, chunk: str) -> bool:
+        if self._state_done:
+            return self.state_value is not None
+        if self._blob is None:
+            text = self._tail + chunk
+            hits = [i for i in (text.find(m) for m in (NEXT_DATA_MARKER, REACT_STATE_MARKER)) if i != -1]
+            if not hits:
+                self._tail = text[-self._MARKER_TAIL:]
+                return False
+            self._blob = [text[min(hits):]]
+            seam = self._blob[0]
+        else:
+            self._blob.append(chunk)
+            seam = self._seam + chunk
+        if SCRIPT_END not in seam:
+            self._seam = seam[-(len(SCRIPT_END) - 1):]
+            return False
+        # Decode the blob once, when its script has closed
+        self._state_done = True
+        blob, self._blob = "".join(self._blob), None
+        self.state_value = self.from_state(extract_embedded_state(blob)) or None
+        return self.state_value is not None
+
+    def feed(self, chunk: str) -> bool:
+        return self._check_state(chunk)
+
+    def result(self, body: Optional[bytes] = None) -> Any:
+        if self.state_value is not None:
+            return self.state_value
+        if self._blob is not None:
+            # Budget cut or no closing tag: try whatever part of the blob arrived
+            value = self.from_state(extract_embedded_state("".join(self._blob)))
+            if value:
+                return value
+        return self.fallback(body)
+
+
+class LocalityRatesScanner(EmbeddedStateScanner):
+    """
+    Locality rate/trend pages: the embedded overview, or the FAQ sentences
+    scanned as they arrive. Done once either has given the current rate,
+    rental yield and 1/3/5-year trend.
+    """
+
+    def __init__(self):
+        self.faq = FaqScanner()
+        super().__init__(locality_rates_from_state, lambda _body: self.faq.rates, needs_body=False)
+
+    def feed(self, chunk: str) -> bool:
+        return self._check_state(chunk) or self.faq.feed(chunk)
+
+
+@dataclass
+class StreamResult:
+    """Outcome of a streamed GET; ``value`` is the scanner's result, ``stopped`` why reading ended"""
+    url: str
+    status_code: Optional[int] = None
+    value: Any = None
+    bytes_read: int = 0          # decoded body bytes scanned
+    stopped: str = ""            # "found", "budget" or "end"
+    from_cache: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code is not None and self.status_code < 400
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise requests.HTTPError(f"{self.status_code} for url: {self.url}")
+
+
+def stream_scan(session, url: str, scanner: PageScanner, limiter: Optional[AdaptiveRateLimiter] = None,
+                max_bytes: int = DEFAULT_BYTE_BUDGET, chunk_size: int = CHUNK_SIZE, **kwargs) -> StreamResult:
+    """
+    GET ``url`` through the cache and rate limiter and feed the body to
+    ``scanner`` until it is done, ``max_bytes`` have been read or the body
+    ends. Non-200 responses are returned without reading the body.
+    """
+    response = cached_get(session, url, limiter, stream=True, **kwargs)
+    result = StreamResult(url, status_code=response.status_code, from_cache=getattr(response, "from_cache", False))
+    if response.status_code != 200:
+        response.close()
+        return result
+
+    cache = active_cache()
+    store = cache is not None and not result.from_cache
+    keep = [] if store or scanner.needs_body else None
+    complete = False
+    decoder = codecs.getincrementaldecoder(declared_encoding(response))(errors="replace")
+    chunks = response.iter_content(chunk_size)
+    try:
+        result.stopped = "end"
+        for chunk in chunks:
+            chunk = chunk[:max_bytes - result.bytes_read]
+            result.bytes_read += len(chunk)
+            if keep is not None:
+                keep.append(chunk)
+            with stage("parse"):
+                done = scanner.feed(decoder.decode(chunk))
+            if done:
+                result.stopped = "found"
+                if store and _body_received(response):
+                    # Done on the last piece: only decoded bytes are left, keep them for the cache
+                    keep.extend(chunks)
+                    complete = True
+                break
+            if result.bytes_read >= max_bytes:
+                result.stopped = "budget"
+                break
+        else:
+            scanner.feed(decoder.decode(b"", final=True))
+            complete = True
+    finally:
+        response.close()
+
+    metrics = default_metrics()
+    if not result.from_cache:
+        metrics.inc("response_bytes_total", wire_bytes(response, result.bytes_read), host=AdaptiveRateLimiter.host_of(url))
+    metrics.inc("stream_stops_total", stopped=result.stopped)
+    body = b"".join(keep) if keep is not None else None
+    keep = None                  # one copy of the body, not the chunks as well
+    if store and complete:
+        cache.store(url, CachedResponse(url, 200, body, dict(response.headers),
+                                        declared_encoding(response), from_cache=False))
+    with stage("parse"):
+        result.value = scanner.result(body if scanner.needs_body else None)
+    logger.debug(f"{url}: {result.bytes_read} bytes read, stopped: {result.stopped}")
+    return result
+
+
+def _body_received(response) -> bool:
+    """True once urllib3 has read the whole body off the connection (not known for chunked bodies)"""
+    raw = getattr(response, "raw", None)
+    return bool(getattr(raw, "closed", False))
+
+
+def add_streaming_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--stream", action="store_true",
+                        help="Read pages incrementally and stop once the needed fields are found")
+    parser.add_argument("--byte-budget", type=int, default=DEFAULT_BYTE_BUDGET // 1024,
+                        help="With --stream, stop reading a page after this many KiB")
+
+
+def byte_budget_from_args(args: argparse.Namespace) -> Optional[int]:
+    """Bytes per page when streaming is on, else None"""
+    return args.byte_budget * 1024 if args.stream else None
@@ -0,0 +1,201 @@
+"""
+Seeded, vectorized synthetic market generator.
+
+Produces society-level rate rows and monthly price history for
+N localities x M societies with NumPy, in chunks, so datasets of tens of
+millions of rows can be streamed to disk for load tests without holding
+them in memory. It uses the same model as the scraper's fallback data:
+
+    zone rate bands   Mira Road East 6500-9500, Mira Road West 7000-10500,
+                      elsewhere 6000-9000 (Rs/sq ft)
+    appreciation      15-45 % over 5 years, spread evenly per year
+    history           rate / (1 + annual) ** years_back
+
+Random draws come from one generator per block of ``BLOCK_ROWS`` society
+rows, spawned from the seed's ``SeedSequence``, so the same seed gives the
+same data whatever the chunk size.
+
+    python -m scraping.synthetic --localities 1000 --societies 200 --months 60 --seed 7 --out data/synthetic
+"""
+
+import argparse
+import os
+import time
+from datetime import date
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+ZONES = ["Mira Road East", "Mira Road West", "Mira Bhayandar", "Kashimira"]
+SOCIETIES = [
+    "Rustomjee Urbania", "Kanakia Paris", "Runwal Gardens", "Lodha Splendora",
+    "Acme Ozone", "Evershine Millennium Paradise", "Sheth Vasant Oasis",
+    "Poonam Sagar", "Beverly Park", "Golden Nest", "Silver Park",
+    "Maxus Mall Residency", "Haware Citi", "Shree Krishna Towers",
+    "Sai Sarang", "Sheetal Tapovan", "Gundecha Valley", "Thakur Village"
+]
+
+# (low, high) inclusive rate band per zone, in ZONES order
+ZONE_RATE_BANDS = np.array([[6500, 9500], [7000, 10500], [6000, 9000], [6000, 9000]], dtype=np.int32)
+APPRECIATION_5YR_RANGE = (15.0, 45.0)
+RENTAL_YIELD_RANGE = (2.5, 4.5)
+BLOCK_ROWS = 4096           # society rows per spawned generator
+
+
+def society_names(n: int) -> List[str]:
+    """The real society names first, then numbered phases of them"""
+    return [SOCIETIES[i] if i < len(SOCIETIES) else f"{SOCIETIES[i % len(SOCIETIES)]} Phase {i // len(SOCIETIES) + 1}"
+            for i in range(n)]
+
+
+def locality_names(n: int) -> List[str]:
+    return ZONES[:n] if n <= len(ZONES) else [f"{ZONES[i % len(ZONES)]} Sector {i // len(ZONES) + 1}" for i in range(n)]
+
+
+class SyntheticMarket:
+    """
+    Generator for ``n_localities`` x ``societies_per_locality`` society rows.
+    Locality ``i`` lies in zone ``i % 4``; each row gets a rate from its
+    zone's band, a 5-year appreciation and a rental yield.
+    """
+
+    def __init__(self, n_localities: int, societies_per_locality: int, months: int = 60,
+                 seed: Optional[int] = None, as_of: Optional[date] = None):
+        self.n_localities = n_localities
+        self.societies_per_locality = societies_per_locality
+        self.months = months
+        self.seed = seed
+        self.as_of = as_of or date.today()
+        self.locality_dtype = pd.CategoricalDtype(locality_names(n_localities))
+        self.locality_zone = np.arange(n_localities) % len(ZONES)
+        self.society_dtype = pd.CategoricalDtype(society_names(societies_per_locality))
+
+    @property
+    def n_rows(self) -> int:
+        return self.n_localities * self.societies_per_locality
+
+    def _draw_block(self, seed: np.random.SeedSequence, block: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Rate, appreciation and rental yield for every row of one block"""
+        rng = np.random.default_rng(seed)
+        idx = np.arange(block * BLOCK_ROWS, min((block + 1) * BLOCK_ROWS, self.n_rows))
+        zone = self.locality_zone[idx // self.societies_per_locality]
+        rate = rng.integers(ZONE_RATE_BANDS[zone, 0], ZONE_RATE_BANDS[zone, 1] + 1, dtype=np.int32)
+        appreciation = np.round(rng.uniform(*APPRECIATION_5YR_RANGE, size=len(idx)), 1).astype(np.float32)
+        rental_yield = np.round(rng.uniform(*RENTAL_YIELD_RANGE, size=len(idx)), 2).astype(np.float32)
+        return rate, appreciation, rental_yield
+
+    def _draw(self, seeds: List[np.random.SeedSequence], start: int, stop: int) -> List[np.ndarray]:
+        """Draws for rows ``start:stop``, cut from the blocks they fall in"""
+        first, last = start // BLOCK_ROWS, (stop - 1) // BLOCK_ROWS
+        blocks = [self._draw_block(seeds[b], b) for b in range(first, last + 1)]
+        offset = first * BLOCK_ROWS
+        return [np.concatenate(parts)[start - offset:stop - offset] for parts in zip(*blocks)]
+
+    def chunks(self, chunk_rows: int = 100_000) -> Iterator[Tuple[pd.DataFrame, pd.DataFrame]]:
+        """Yield (rates, history) frames covering about ``chunk_rows`` history rows each"""
+        seeds = np.random.SeedSequence(self.seed).spawn(-(-self.n_rows // BLOCK_ROWS))
+        per_chunk = max(1, chunk_rows // (self.months + 1))
+        months_back = np.arange(self.months + 1)
+        years_back = months_back / 12
+        dates = (np.datetime64(self.as_of, "M") - months_back).astype("datetime64[D]")
+        zone_cat = pd.CategoricalDtype(ZONES)
+
+        for start in range(0, self.n_rows, per_chunk):
+            idx = np.arange(start, min(start + per_chunk, self.n_rows))
+            locality = idx // self.societies_per_locality
+            society = idx % self.societies_per_locality
+            zone = self.locality_zone[locality]
+            rate, appreciation, rental_yield = self._draw(seeds, idx[0], idx[-1] + 1)
+
+            rates = pd.DataFrame({
+                "area_name": pd.Categorical.from_codes(society, dtype=self.society_dtype),
+                "locality": pd.Categorical.from_codes(locality, dtype=self.locality_dtype),
+                "zone": pd.Categorical.from_codes(zone, dtype=zone_cat),
+                "property_type": "Residential",
+                "rate_per_sqft": rate,
+                "appreciation_5yr": appreciation,
+                "rental_yield": rental_yield,
+                "data_source": "synthetic",
+            })
+
+            annual = appreciation.astype(np.float64) / 100 / 5
+            history_rate = (rate[:, None] / (1 + annual[:, None]) ** years_back[None, :]).astype(np.int32)
+            n_points = len(months_back)
+            history = pd.DataFrame({
+                "area_name": pd.Categorical.from_codes(np.repeat(society, n_points), dtype=self.society_dtype),
+                "locality": pd.Categorical.from_codes(np.repeat(locality, n_points), dtype=self.locality_dtype),
+                "zone": pd.Categorical.from_codes(np.repeat(zone, n_points), dtype=zone_cat),
+                "date": np.tile(dates, len(idx)),
+                "rate_per_sqft": history_rate.ravel(),
+                "data_source": "synthetic_historical",
+            })
+            yield rates, history
+
+
+def generate(n_localities: int, societies_per_locality: int, months: int = 60,
+             seed: Optional[int] = None, as_of: Optional[date] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Whole dataset in memory; for small runs and the scraper's fallback"""
+    market = SyntheticMarket(n_localities, societies_per_locality, months, seed, as_of)
+    parts = list(market.chunks(chunk_rows=max(1, market.n_rows) * (months + 1)))
+    return tuple(pd.concat(frames, ignore_index=True) for frames in zip(*parts))
+
+
+class _ChunkSink:
+    """Appends frames to a CSV or Parquet file"""
+
+    def __init__(self, path: str, fmt: str):
+        self.path = path
+        self.fmt = fmt
+        self.rows = 0
+        self._writer = None
+
+    def write(self, frame: pd.DataFrame):
+        if self.fmt == "csv":
+            frame.to_csv(self.path, mode="a" if self.rows else "w", header=not self.rows, index=False)
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema, compression="zstd")
+            self._writer.write_table(table)
+        self.rows += len(frame)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a seeded synthetic market dataset for load tests")
+    parser.add_argument("--localities", type=int, default=100)
+    parser.add_argument("--societies", type=int, default=100, help="Societies per locality")
+    parser.add_argument("--months", type=int, default=60, help="Monthly history points per society (plus the current month)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-rows", type=int, default=500_000, help="History rows generated per chunk")
+    parser.add_argument("--format", choices=("csv", "parquet"), default="csv")
+    parser.add_argument("--out", default=os.path.join("data", "synthetic"), help="Output directory")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.out, exist_ok=True)
+    market = SyntheticMarket(args.localities, args.societies, args.months, args.seed)
+    rates_sink = _ChunkSink(os.path.join(args.out, f"synthetic_rates.{args.format}"), args.format)
+    history_sink = _ChunkSink(os.path.join(args.out, f"synthetic_history.{args.format}"), args.format)
+
+    start = time.perf_counter()
+    try:
+        for rates, history in market.chunks(args.chunk_rows):
+            rates_sink.write(rates)
+            history_sink.write(history)
+    finally:
+        rates_sink.close()
+        history_sink.close()
+    elapsed = time.perf_counter() - start
+    total = rates_sink.rows + history_sink.rows
+    print(f"Wrote {rates_sink.rows} rate rows and {history_sink.rows} history rows to {args.out} "
+          f"in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Batched back-calculation of locality price series.
+
+99acres states a current rate and the 1/3/5-year price movement per
+locality. For a batch of localities this module turns those into
+
+* anchor prices, ``current / (1 + p/100)`` for every horizon, in one
+  NumPy pass, dated relative to the scrape date rather than fixed years;
+* a dense monthly series that is CAGR-consistent between anchors, i.e.
+  log-linear interpolation: within each anchor interval the price grows at
+  a constant monthly rate.
+
+Localities without a trend get NaN past prices and are skipped by the
+record builders.
+"""
+
+from datetime import date
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from scraping.rates import LocalityRates
+
+HORIZON_YEARS = (1, 3, 5)
+
+
+def rates_arrays(rates: Sequence[Optional[LocalityRates]]) -> Tuple[np.ndarray, np.ndarray]:
+    """(current rate, change % per horizon) arrays; missing values are NaN"""
+    current = np.array([r.current_rate if r and r.current_rate else np.nan for r in rates], dtype=np.float64)
+    changes = np.array(
+        [[r.change_1y, r.change_3y, r.change_5y] if r and r.has_trend else [np.nan] * 3 for r in rates],
+        dtype=np.float64,
+    ).reshape(len(rates), len(HORIZON_YEARS))
+    return current, changes
+
+
+def anchor_prices(current: np.ndarray, changes: np.ndarray) -> np.ndarray:
+    """
+    Prices at [now, 1y, 3y, 5y ago], shape (n, 4): ``current / (1 + p/100)``
+    per horizon, truncated to whole rupees like the old per-row code.
+    """
+    past = np.floor(current[:, None] / (1 + changes / 100))
+    return np.column_stack([current, past])
+
+
+def anchor_years(scrape_date: Optional[date] = None) -> List[int]:
+    """Calendar years of the anchors, counted back from the scrape date"""
+    year = (scrape_date or date.today()).year
+    return [year] + [year - h for h in HORIZON_YEARS]
+
+
+def _interpolation_weights(months: int) -> np.ndarray:
+    """(4, months + 1) matrix mapping anchor values to each month back, linear between anchors"""
+    anchor_months = np.array([0] + [12 * h for h in HORIZON_YEARS], dtype=np.float64)
+    months_back = np.minimum(np.arange(months + 1), anchor_months[-1])
+    weights = np.zeros((len(anchor_months), months + 1))
+    segment = np.clip(np.searchsorted(anchor_months, months_back, side="right") - 1, 0, len(anchor_months) - 2)
+    left, right = anchor_months[segment], anchor_months[segment + 1]
+    t = (months_back - left) / (right - left)
+    cols = np.arange(months + 1)
+    weights[segment, cols] = 1 - t
+    weights[segment + 1, cols] = t
+    return weights
+
+
+def monthly_series(current: np.ndarray, changes: np.ndarray, months: int = 60) -> np.ndarray:
+    """
+    Monthly prices for 0..``months`` months back, shape (n, months + 1).
+    Log prices are interpolated linearly between anchors, so every
+    interval compounds at its own constant rate and hits the anchors exactly.
+    """
+    anchors = current[:, None] / (1 + np.column_stack([np.zeros(len(current)), changes]) / 100)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.exp(np.log(anchors) @ _interpolation_weights(months))
+
+
+def month_starts(scrape_date: Optional[date] = None, months: int = 60) -> np.ndarray:
+    """First day of the scrape month and each month before it"""
+    return (np.datetime64(scrape_date or date.today(), "M") - np.arange(months + 1)).astype("datetime64[D]")
+
+
+def monthly_frame(localities: Sequence[str], rates: Sequence[Optional[LocalityRates]],
+                  scrape_date: Optional[date] = None, months: int = 60) -> pd.DataFrame:
+    """Long (locality, date, price_per_sqft) frame for every locality that has a trend"""
+    current, changes = rates_arrays(rates)
+    series = monthly_series(current, changes, months)
+    keep = np.isfinite(series).all(axis=1)
+    n_points = months + 1
+    return pd.DataFrame({
+        "locality": np.repeat(np.asarray(localities, dtype=object)[keep], n_points),
+        "date": np.tile(month_starts(scrape_date, months), int(keep.sum())),
+        "price_per_sqft": np.rint(series[keep]).astype(np.int32).ravel(),
+    })
+
+
+def monthly_points(localities: Sequence[str], rates: Sequence[Optional[LocalityRates]],
+                   scrape_date: Optional[date] = None, months: int = 60,
+                   source: str = "99acres_faq_interpolated") -> List[Dict]:
+    """Monthly series as records for the historical price store"""
+    frame = monthly_frame(localities, rates, scrape_date, months)
+    frame["date"] = frame["date"].dt.strftime("%Y-%m-%d")
+    frame["source"] = source
+    return frame.to_dict("records")
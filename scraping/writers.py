@@ -0,0 +1,98 @@
+"""
+Incremental output writers for scraper records.
+"""
+
+import gzip
+import json
+from typing import Dict, Iterator, List, Optional
+
+
+class JsonArrayWriter:
+    """
+    Writes a JSON array one element at a time, byte-for-byte the same
+    layout ``json.dump(records, f, indent=2, ensure_ascii=False)`` produces,
+    without holding the records in memory.
+    """
+
+    def __init__(self, path: str, indent: int = 2):
+        self.path = path
+        self.indent = indent
+        self.count = 0
+        self._f = open(path, "w", encoding="utf-8")
+        self._f.write("[")
+
+    def write(self, record: Dict):
+        body = json.dumps(record, indent=self.indent, ensure_ascii=False)
+        pad = " " * self.indent
+        self._f.write(",\n" if self.count else "\n")
+        self._f.write("\n".join(pad + line for line in body.split("\n")))
+        self.count += 1
+
+    def close(self):
+        if self._f.closed:
+            return
+        self._f.write("\n]" if self.count else "]")
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class NdjsonWriter:
+    """
+    Writes one compact JSON object per line. Paths ending in ``.gz`` are
+    gzip-compressed with one gzip member per ``flush``, so the file stays
+    readable when it is later truncated at a flush offset and appended to.
+    """
+
+    def __init__(self, path: str, truncate_at: Optional[int] = None, flush_every: int = 1000):
+        self.path = path
+        self.count = 0
+        self.compress = path.endswith(".gz")
+        self.flush_every = flush_every
+        self._buffer: List[bytes] = []
+        if truncate_at is None:
+            self._f = open(path, "wb")
+        else:
+            # Resume: drop anything written after the last checkpointed flush
+            self._f = open(path, "r+b")
+            self._f.truncate(truncate_at)
+            self._f.seek(truncate_at)
+
+    def write(self, record: Dict):
+        self._buffer.append(json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n")
+        self.count += 1
+        if len(self._buffer) >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> int:
+        """Push buffered lines to disk; returns the file offset they end at"""
+        if self._buffer:
+            data = b"".join(self._buffer)
+            self._buffer.clear()
+            self._f.write(gzip.compress(data) if self.compress else data)
+        self._f.flush()
+        return self._f.tell()
+
+    def close(self):
+        if not self._f.closed:
+            self.flush()
+            self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_ndjson(path: str) -> Iterator[Dict]:
+    """Read records back from a (possibly gzip) NDJSON file"""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)